@@ -0,0 +1,89 @@
+"""
+data.py
+-------
+Deterministic synthetic review data for the benchmarks: raw Places API
+payloads (for normalisation and the route) and normalised, extracted
+reviews (for scoring and forming). Texts mix English and German and name
+dishes from the bundled lexicon, so prefilter and aggregation behave like
+they do on real places.
+"""
+
+import random
+from typing import Any, Dict, List
+
+from src.nlp.prefilter import load_bundled_lexicon
+from src.normalisation.schemas import DishRecord, ReviewRecord, make_review_id
+
+DISHES = load_bundled_lexicon()
+
+TEMPLATES = [
+    "We ordered the {a} and the {b}. Both were delicious and the portions were generous.",
+    "The {a} was fantastic, but the {b} was a bit too salty for my taste. Service was friendly.",
+    "Wir hatten {a} und {b}, beides sehr lecker. Die Bedienung war aufmerksam.",
+    "Great atmosphere, quick service and fair prices.",
+    "Das {a} war ein Traum! Nächstes Mal probiere ich das {b}.",
+    "Tried the {a} on a friend's recommendation. Would come back for the {b} alone.",
+    "Lovely evening. {a} to start, {b} as a main, and coffee afterwards.",
+]
+FILLER = (
+    "The room was busy but we did not wait long. Staff explained the menu and "
+    "recommended a wine. Prices are reasonable for the area and the location is easy to reach."
+)
+AUTHORS = ["Anna Berg", "Jonas", "Maria Müller", "Tom K", "Lena Schmidt", "Yusuf Hadi", "Chris"]
+
+
+def review_text(rng: random.Random) -> str:
+    text = rng.choice(TEMPLATES).format(a=rng.choice(DISHES), b=rng.choice(DISHES))
+    # a quarter of the reviews are long enough to need several chunks
+    if rng.random() < 0.25:
+        text += " " + " ".join([FILLER] * rng.randint(5, 40))
+    return text
+
+
+def raw_google_reviews(n: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Raw Places API (v1) review objects."""
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"places/bench/reviews/{i}",
+            "rating": rng.randint(1, 5),
+            "text": {"text": review_text(rng), "languageCode": "en"},
+            "originalText": {"text": "", "languageCode": rng.choice(["en", "de"])},
+            "authorAttribution": {"displayName": rng.choice(AUTHORS)},
+            "publishTime": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00.123456789Z",
+            "googleMapsUri": f"https://www.google.com/maps/reviews/bench{i}",
+        }
+        for i in range(n)
+    ]
+
+
+def place_payload(place_id: str, n: int, seed: int = 7) -> Dict[str, Any]:
+    """A full raw Places API (v1) place payload with `n` reviews."""
+    return {
+        "id": place_id,
+        "displayName": {"text": "Benchmark Bistro"},
+        "formattedAddress": "Teststraße 1, 10115 Berlin",
+        "rating": 4.4,
+        "googleMapsUri": "https://maps.google.com/?cid=1",
+        "reviews": raw_google_reviews(n, seed),
+    }
+
+
+def scored_input(n: int, seed: int = 7) -> List[ReviewRecord]:
+    """Normalised reviews with extracted (unranked) dishes, as scoring receives them."""
+    rng = random.Random(seed)
+    reviews = []
+    for i in range(n):
+        text = review_text(rng)
+        source_type = "blog" if rng.random() < 0.05 else "google"
+        reviews.append(ReviewRecord(
+            id=make_review_id(text, source_type),
+            author=rng.choice(AUTHORS),
+            rating=float(rng.randint(1, 5)),
+            text=text,
+            timestamp=1_700_000_000 + rng.randint(0, 40_000_000),
+            source_type=source_type,
+            source="Google Reviews" if source_type == "google" else "Food Blog",
+            dishes=[DishRecord(rng.choice(DISHES)) for _ in range(rng.randint(0, 3))],
+        ))
+    return reviews
@@ -0,0 +1,40 @@
+"""
+fake_llm.py
+-----------
+Completion backend standing in for OpenAI in benchmarks: answers with the
+lexicon dishes found in each text after a configurable latency, for both
+single prompts and batched JSON prompts. Drop-in via
+`extractor_openai.set_backend`.
+"""
+
+import re
+import json
+import random
+import asyncio
+from typing import Any, Dict, Optional
+
+from src.nlp.prefilter import DishPrefilter, load_bundled_lexicon
+
+_BATCH_ITEM = re.compile(r"\[(c\d+)\]\n(.*?)(?=\n\n\[c\d+\]\n|\Z)", re.S)
+
+
+class FakeLLM:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 7):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lexicon = DishPrefilter(load_bundled_lexicon())
+
+    async def complete(self, prompt: str, text_format: Optional[Dict[str, Any]] = None) -> str:
+        self.calls += 1
+        delay = self.latency + self._rng.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if text_format is not None:
+            answer = {chunk_id: self._lexicon.match(text) for chunk_id, text in _BATCH_ITEM.findall(prompt)}
+            return json.dumps(answer, ensure_ascii=False)
+
+        text = prompt.rsplit("Text: ", 1)[-1].rsplit("\nOutput:", 1)[0]
+        return ", ".join(self._lexicon.match(text)) or "none"
@@ -0,0 +1,61 @@
+"""
+route.py
+--------
+End-to-end benchmark of GET /recommendations/{place_id}: the FastAPI app
+in-process, Google Places served from recorded payloads through the stub
+transport, OpenAI replaced by `FakeLLM` with a configurable latency.
+
+Cases:
+    route.cold[place]   empty extraction store: every chunk goes to the fake LLM
+    route.warm[place]   extraction store filled by a previous run: no LLM calls
+
+The result store is disabled and the place cache is cleared before every
+run, so each request goes through fetch, extraction, scoring and forming.
+"""
+
+import os
+from typing import Any, Iterator, List
+
+from fastapi.testclient import TestClient
+
+from benchmarks.fake_llm import FakeLLM
+from benchmarks.stages import Case
+from src.fetch.place_cache import place_cache
+from src.fetch.places_client import set_places_client
+from src.fetch.places_stub import stub_client
+from src.nlp.extraction_store import MemoryExtractionStore, set_extraction_store
+from src.nlp.extractor_openai import set_backend
+from src.recs.result_store import NullResultStore, set_result_store
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def fixture_places() -> List[str]:
+    places_dir = os.path.join(FIXTURES_DIR, "places")
+    return sorted(name[:-5] for name in os.listdir(places_dir) if name.endswith(".json"))
+
+
+def route_cases(client: TestClient, llm_latency: float = 0.05) -> Iterator[Case]:
+    """Yields a cold and a warm case per recorded place. `client` wraps main.app."""
+    set_backend(FakeLLM(latency=llm_latency, jitter=llm_latency / 2))
+    set_places_client(stub_client(FIXTURES_DIR))
+    set_result_store(NullResultStore())
+
+    def request(place_id: str) -> Any:
+        place_cache.invalidate()
+        response = client.get(f"/recommendations/{place_id}")
+        response.raise_for_status()
+        return response
+
+    def cold(place_id: str) -> str:
+        set_extraction_store(MemoryExtractionStore())
+        return place_id
+
+    for place_id in fixture_places():
+        yield Case(f"route.cold[{place_id}]", lambda p=place_id: cold(p), request, 0)
+
+        # warm: one untimed request fills the store the timed ones read from
+        store = MemoryExtractionStore()
+        set_extraction_store(store)
+        request(place_id)
+        yield Case(f"route.warm[{place_id}]", lambda p=place_id, s=store: set_extraction_store(s) or p, request, 0)
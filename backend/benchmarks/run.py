@@ -0,0 +1,190 @@
+"""
+run.py
+------
+Runs the benchmark suite, writes the results as JSON and compares them
+against a stored baseline.
+
+    cd backend
+    python -m benchmarks.run --quick                      # up to 10k reviews
+    python -m benchmarks.run -o results.json              # full suite, up to 100k
+    python -m benchmarks.run --only scoring,route --llm-latency 0.2
+    python -m benchmarks.run --update-baseline            # accept current numbers
+
+A case regresses when its best (min) time is more than `--threshold`
+(relative) and `--min-delta` (absolute seconds) slower than the baseline's;
+the min is far less sensitive to scheduler noise than the median. The
+exit code is 1 if any case regressed, so the suite can gate CI. Baselines
+are machine-specific: refresh them on the machine that runs the comparison.
+
+Everything runs offline: Places payloads come from benchmarks/fixtures,
+OpenAI is replaced by `FakeLLM`, and all stores are in memory.
+"""
+
+import os
+
+# benchmarks never touch the on-disk stores or real rate limits
+os.environ.setdefault("EXTRACTION_STORE", "memory")
+os.environ.setdefault("RESULT_STORE", "memory")
+os.environ.setdefault("LLM_REQUESTS_PER_SECOND", "1000")
+os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "100000000")
+os.environ.setdefault("METRICS_ENABLED", "0")
+
+import gc
+import sys
+import json
+import time
+import logging
+import platform
+import argparse
+import statistics
+from typing import Any, Dict, Iterable, List, Optional
+
+from benchmarks.stages import QUICK_SCALES, SCALES, Case, stage_cases
+
+logger = logging.getLogger("benchmarks")
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.25  # 25% slower than the baseline
+DEFAULT_MIN_DELTA = 0.002  # ignore differences below 2 ms (timer noise)
+TIME_BUDGET = 2.0  # seconds of timed runs per case, at least MIN_REPEATS
+
+
+def measure(case: Case, min_repeats: int = 3, max_repeats: int = 25, budget: float = TIME_BUDGET) -> Dict[str, Any]:
+    """Times `case.run` on fresh `case.setup()` inputs until the budget is spent."""
+    times: List[float] = []
+    spent = 0.0
+    while len(times) < max_repeats and (len(times) < min_repeats or spent < budget):
+        arg = case.setup()
+        gc.collect()
+        start = time.perf_counter()
+        case.run(arg)
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        spent += elapsed
+
+    median = statistics.median(times)
+    result = {
+        "median": round(median, 6),
+        "min": round(min(times), 6),
+        "max": round(max(times), 6),
+        "repeats": len(times),
+    }
+    if case.scale:
+        result["scale"] = case.scale
+        result["per_item_us"] = round(median / case.scale * 1e6, 3)
+    return result
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float = DEFAULT_THRESHOLD,
+    min_delta: float = DEFAULT_MIN_DELTA,
+) -> Dict[str, Dict[str, Any]]:
+    """Per case: baseline min, ratio and status (ok / regressed / improved / new)."""
+    report = {}
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            report[name] = {"status": "new"}
+            continue
+        ratio = result["min"] / base["min"] if base["min"] else float("inf")
+        delta = result["min"] - base["min"]
+        if ratio > 1 + threshold and delta > min_delta:
+            status = "regressed"
+        elif ratio < 1 / (1 + threshold) and -delta > min_delta:
+            status = "improved"
+        else:
+            status = "ok"
+        report[name] = {"status": status, "baseline": base["min"], "ratio": round(ratio, 3)}
+    return report
+
+
+def _selected(cases: Iterable[Case], only: Optional[List[str]]) -> Iterable[Case]:
+    for case in cases:
+        if not only or any(case.name.startswith(prefix) for prefix in only):
+            yield case
+
+
+def _route_cases(llm_latency: float) -> Iterable[Case]:
+    from fastapi.testclient import TestClient
+
+    from benchmarks.route import route_cases
+    from main import app
+
+    logging.getLogger().setLevel(logging.WARNING)  # main.py configures INFO logging
+    with TestClient(app) as client:
+        yield from route_cases(client, llm_latency)
+
+
+def run_suite(scales=SCALES, only: Optional[List[str]] = None, llm_latency: float = 0.05) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for cases in (stage_cases(scales), _route_cases(llm_latency)):
+        for case in _selected(cases, only):
+            results[case.name] = measure(case)
+            r = results[case.name]
+            print(f"{case.name:<34} median {r['median'] * 1000:10.2f} ms   min {r['min'] * 1000:10.2f} ms   x{r['repeats']}")
+    return results
+
+
+def _load_baseline(path: str) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="DishTip stage and route benchmarks.")
+    parser.add_argument("--quick", action="store_true", help="skip the 100k-review scale")
+    parser.add_argument("--only", help="comma-separated case name prefixes, e.g. chunk_text,route")
+    parser.add_argument("-o", "--output", help="write results JSON here")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed relative slowdown")
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA, help="allowed absolute slowdown (s)")
+    parser.add_argument("--update-baseline", action="store_true", help="merge current results into the baseline")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake LLM latency per call (s)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)  # the pipeline logs every run at INFO
+    only = [p.strip() for p in args.only.split(",")] if args.only else None
+    results = run_suite(QUICK_SCALES if args.quick else SCALES, only, args.llm_latency)
+
+    report = compare(results, _load_baseline(args.baseline), args.threshold, args.min_delta)
+    doc = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "llm_latency": args.llm_latency,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+        "comparison": report,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+
+    regressed = [name for name, entry in report.items() if entry["status"] == "regressed"]
+    for name, entry in report.items():
+        if entry["status"] in ("regressed", "improved"):
+            print(f"{'❌' if entry['status'] == 'regressed' else '✅'} {name}: {entry['ratio']:.2f}x baseline")
+
+    if args.update_baseline:
+        baseline = _load_baseline(args.baseline)
+        baseline.update({name: {"median": r["median"], "min": r["min"]} for name, r in results.items()})
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": doc["meta"], "results": dict(sorted(baseline.items()))}, f, indent=2)
+            f.write("\n")
+        print(f"📌 Baseline updated: {args.baseline}")
+        return 0
+
+    if regressed:
+        print(f"{len(regressed)} case(s) regressed beyond {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+stages.py
+---------
+Micro-benchmarks of the CPU-bound pipeline stages at growing review counts.
+Each case has an untimed `setup` (fresh inputs per repeat, since scoring
+and forming mutate or reject already-processed reviews) and a timed `run`.
+
+Stages:
+    chunk_text          the pre-chunking.py splitter, kept for comparison
+    iter_chunks         the shared token-aware chunker (src/nlp/chunking.py)
+    make_prompt         building one extraction prompt per review
+    normalise.payload   Places payload -> records (`fetch_google_places_data` path)
+    normalise.strict    the same reviews through the Pydantic adapter
+    assign_dish_scores  feature scoring of extracted dishes
+    form_recommendations  aggregation and ranking of scored dishes
+"""
+
+import re
+import random
+from typing import Any, Callable, Iterator, List, NamedTuple, Sequence
+
+from benchmarks.data import place_payload, review_text, scored_input
+from src.fetch.google_api import normalise_place_payload
+from src.nlp.chunking import get_token_counter, iter_chunks
+from src.nlp.extractor_openai import MODEL_NAME, make_prompt
+from src.normalisation.bulk import normalise_reviews
+from src.ranking.scoring import assign_dish_scores
+from src.recs.forming import form_recommendations
+
+SCALES = (10, 100, 1_000, 10_000, 100_000)
+QUICK_SCALES = (10, 100, 1_000, 10_000)
+
+
+class Case(NamedTuple):
+    name: str
+    setup: Callable[[], Any]
+    run: Callable[[Any], Any]
+    scale: int
+
+
+def chunk_text(text: str, max_words: int = 500) -> list[str]:
+    """The word-count splitter both extractors used before chunking.py (baseline only)."""
+    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+    chunks, current_chunk = [], []
+    word_count = 0
+
+    for sentence in sentences:
+        words = sentence.split()
+        if word_count + len(words) > max_words:
+            chunks.append(" ".join(current_chunk))
+            current_chunk = []
+            word_count = 0
+        current_chunk.extend(words)
+        word_count += len(words)
+
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+    return chunks
+
+
+def _texts(n: int) -> List[str]:
+    rng = random.Random(n)
+    return [review_text(rng) for _ in range(n)]
+
+
+def _scored(n: int) -> List[Any]:
+    reviews = scored_input(n)
+    assign_dish_scores(reviews, now=1_750_000_000)
+    return reviews
+
+
+def stage_cases(scales: Sequence[int] = SCALES) -> Iterator[Case]:
+    """Yields the cases scale by scale, so inputs of one scale are freed before the next."""
+    count = get_token_counter(MODEL_NAME)
+    for n in scales:
+        texts = _texts(n)
+        payload = place_payload("bench", n)
+        scored = _scored(n)
+
+        yield from [
+            Case(f"chunk_text[{n}]", lambda t=texts: t,
+                 lambda t: [chunk_text(text) for text in t], n),
+            Case(f"iter_chunks[{n}]", lambda t=texts: t,
+                 lambda t: [list(iter_chunks(text, count_tokens=count)) for text in t], n),
+            Case(f"make_prompt[{n}]", lambda t=texts: t,
+                 lambda t: [make_prompt(text) for text in t], n),
+            Case(f"normalise.payload[{n}]", lambda p=payload: p,
+                 normalise_place_payload, n),
+            Case(f"normalise.strict[{n}]", lambda r=payload["reviews"]: r,
+                 lambda r: normalise_reviews(r, strict=True), n),
+            Case(f"assign_dish_scores[{n}]", lambda n=n: scored_input(n),
+                 lambda reviews: assign_dish_scores(reviews, now=1_750_000_000), n),
+            Case(f"form_recommendations[{n}]", lambda s=scored: s,
+                 form_recommendations, n),
+        ]
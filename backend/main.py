@@ -1,19 +1,58 @@
-from fastapi import FastAPI, HTTPException
+import time
+_IMPORT_START = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
 import traceback
-import time
+import orjson
 import logging
 import inspect
+from contextlib import asynccontextmanager
+from typing import List, Optional
 
 # ---- DishTip modules ----
-from src.fetch.google_api import fetch_google_places_data
-from src.nlp.extractor_openai import extract_dishes_openai
+from src.fetch.place_cache import get_place_data
+from src.fetch.place_index import autocomplete
+from src import metrics
+from src.normalisation.schemas import json_default
+from src.nlp import registry
+from src.pipeline import get_stored_recommendations, get_stored_recommendations_many
 from src.ranking.scoring import assign_dish_scores
-from src.recs.forming import form_recommendations
+from src.recs.forming import InvalidCursor, decode_cursor, form_recommendations, paginate
+
+# ---- Responses ----
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+class RecordJSONResponse(JSONResponse):
+    """
+    Serialises pipeline records (slotted dataclasses) and pydantic URLs with
+    orjson in one pass. Routes return it directly, bypassing jsonable_encoder.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=json_default, option=JSON_OPTIONS)
+
 
 # ---- App setup ----
-app = FastAPI(title="DishTip Backend", version="3.0", debug=True)
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+metrics.STARTUP_SECONDS.set(IMPORT_SECONDS, phase="app_import")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Logs the cold start cost and optionally warms the extractor in the background."""
+    logger.info(f"🚀 App imported in {IMPORT_SECONDS:.2f}s, extractor '{registry.EXTRACTOR}' loads on first use")
+    registry.start_warm_up()
+    yield
+
+
+app = FastAPI(
+    title="DishTip Backend", version="3.0", debug=True,
+    default_response_class=RecordJSONResponse, lifespan=lifespan,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,16 +62,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+MAX_PAGE_SIZE = 100
+MAX_BATCH_PLACES = 50
+
 # Logger config
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
 
 
 # ---- Timing Decorator ----
+def _status_code(exc: Optional[BaseException] = None, response=None) -> str:
+    """Status label for dishtip_request_seconds: the response's, the HTTPException's, or 500."""
+    if exc is not None:
+        return str(exc.status_code if isinstance(exc, HTTPException) else 500)
+    return str(getattr(response, "status_code", 200))
+
+
 def timed(func):
     """
     Measures execution time of sync or async functions and logs it.
-    Works with FastAPI (async) and plain functions.
+    Works with FastAPI (async) and plain functions. Async routes also record
+    the dishtip_request_seconds histogram (by route and status, failures
+    included) and log their per-stage breakdown.
     """
     import functools
     import inspect
@@ -44,9 +95,18 @@ def timed(func):
         async def async_wrapper(*args, **kwargs):
             start = time.perf_counter()
             logger.info(f"⏳ Starting async: {func.__name__}")
-            result = await func(*args, **kwargs)
-            duration = time.perf_counter() - start
-            logger.info(f"✅ Finished async: {func.__name__} in {duration:.2f}s")
+            status = "500"
+            with metrics.trace() as spans:
+                try:
+                    result = await func(*args, **kwargs)
+                    status = _status_code(response=result)
+                except BaseException as e:
+                    status = _status_code(e)
+                    raise
+                finally:
+                    duration = time.perf_counter() - start
+                    metrics.REQUEST_SECONDS.observe(duration, route=func.__name__, status=status)
+            logger.info(f"✅ Finished async: {func.__name__} in {duration:.2f}s {metrics.summarise(spans)}")
             return result
 
         return async_wrapper
@@ -70,37 +130,162 @@ def root():
     return {"message": "This API is not a snack, it's the whole damn meal!"}
 
 
+@app.get("/health")
+def health():
+    """Liveness plus cold start report (app import, extractor import and warm-up seconds)."""
+    return {"status": "ok", "app_import_seconds": round(IMPORT_SECONDS, 3), **registry.startup_report()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus scrape endpoint (stage latencies, cache lookups, LLM calls)."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # ✅ Timed and non-blocking route
 @app.get("/recommendations/{place_id}")
 @timed
-async def get_recommendations(place_id: str):
-    try:
-        restaurant, reviews = await run_in_threadpool(fetch_google_places_data, place_id)
-        logger.info(f"📄 Retrieved {len(reviews)} reviews")
-        logger.info(f"📄 Retrieved restaurant information on {restaurant.get('name')} ")
-
-        reviews = await extract_dishes_openai(reviews, True)
+async def get_recommendations(
+    place_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+):
+    if cursor is not None:
+        try:
+            offset = decode_cursor(cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
+    try:
+        entry = await get_stored_recommendations(place_id)
+        if entry is None:
+            return RecordJSONResponse(paginate([], limit, offset))
 
-        assign_dish_scores(reviews)
-        recommendations = form_recommendations(reviews)
-
-        return {"recommendations": recommendations}
+        with metrics.span("forming"):
+            page = paginate(entry["recommendations"], limit, offset)
+        page["computed_at"] = entry["computed_at"]
+        return RecordJSONResponse(page)
 
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class BatchRequest(BaseModel):
+    place_ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_PLACES)
+    limit: Optional[int] = Field(None, ge=1, le=MAX_PAGE_SIZE)
+
+
+@app.post("/recommendations/batch")
+@timed
+async def get_recommendations_batch(request: BatchRequest):
+    """
+    Recommendations and restaurant info for up to MAX_BATCH_PLACES places in
+    one call, for list and map views. Places are computed together (shared
+    extraction, deduplicated chunks); one failing place does not fail the
+    others, it is reported with status "not_found" or "error".
+    """
+    entries = await get_stored_recommendations_many(request.place_ids)
+
+    results = []
+    for place_id, entry in entries.items():
+        if isinstance(entry, Exception):
+            logger.error(f"❌ Batch recommendations failed for {place_id}: {entry}")
+            results.append({"place_id": place_id, "status": "error", "detail": str(entry)})
+        elif entry is None:
+            results.append({"place_id": place_id, "status": "not_found"})
+        else:
+            with metrics.span("forming"):
+                page = paginate(entry["recommendations"], request.limit, 0)
+            results.append({
+                "place_id": place_id,
+                "status": "ok",
+                "restaurant_info": entry["restaurant_info"],
+                **page,
+                "computed_at": entry["computed_at"],
+            })
+
+    failed = sum(1 for r in results if r["status"] != "ok")
+    return RecordJSONResponse({"results": results, "ok": len(results) - failed, "failed": failed})
+
+
+@app.get("/autocomplete")
+async def get_autocomplete(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(5, ge=1, le=20)):
+    """
+    Place suggestions for search-as-you-type, from the local place index;
+    Google's Find Place is only asked on a miss.
+    """
+    start = time.perf_counter()
+    status = "500"
+    try:
+        result = await autocomplete(q, limit)
+        status = "200"
+    finally:
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, route="autocomplete", status=status)
+    return RecordJSONResponse(result)
+
+
 @app.get("/restaurant_info/{place_id}")
 @timed
 async def get_restaurant_info(place_id: str):
     try:
-        restaurant, reviews = await run_in_threadpool(fetch_google_places_data, place_id)
+        restaurant, reviews = await get_place_data(place_id)
         logger.info(f"📄 Retrieved restaurant information on {restaurant.get('name')} ")
 
-        return {"restaurant_info": restaurant}
+        return RecordJSONResponse({"restaurant_info": restaurant})
 
     except Exception as e:
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ---- Streaming route ----
+def _stream_event(event: str, payload: dict, fmt: str) -> str:
+    """Encodes one stream event as an NDJSON line or an SSE message."""
+    data = orjson.dumps({"event": event, **payload}, default=json_default, option=JSON_OPTIONS).decode()
+    if fmt == "sse":
+        return f"event: {event}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+@app.get("/recommendations/{place_id}/stream")
+async def stream_recommendations(place_id: str, format: str = "ndjson"):
+    """
+    Streams restaurant info first, then dish recommendations per review as
+    each extraction finishes, and finally the full re-ranked list.
+    `format` is "ndjson" (default) or "sse".
+    """
+    start = time.perf_counter()
+    if format not in ("ndjson", "sse"):
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, route="stream_recommendations", status="400")
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    try:
+        restaurant, reviews = await get_place_data(place_id)
+    except Exception as e:
+        traceback.print_exc()
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, route="stream_recommendations", status="500")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def events():
+        yield _stream_event("restaurant_info", {"restaurant_info": restaurant}, format)
+        try:
+            async for i, review in registry.iter_extract_dishes(reviews):
+                if not review["dishes"]:
+                    continue
+                with metrics.span("scoring"):
+                    assign_dish_scores([review])
+                yield _stream_event("dishes", {"review": i, "recommendations": form_recommendations([review])}, format)
+
+            yield _stream_event("recommendations", {"recommendations": form_recommendations(reviews)}, format)
+            duration = time.perf_counter() - start
+            metrics.REQUEST_SECONDS.observe(duration, route="stream_recommendations", status="200")
+            logger.info(f"✅ Finished stream for {place_id} in {duration:.2f}s")
+        except Exception as e:
+            traceback.print_exc()
+            metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, route="stream_recommendations", status="500")
+            yield _stream_event("error", {"detail": str(e)}, format)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type)
@@ -0,0 +1,302 @@
+"""
+batch.py
+--------
+Offline bulk runner: computes recommendations for many places without the
+HTTP server, e.g. to precompute results or re-run a city after a model or
+prompt change.
+
+    python -m src.batch places.txt -o results.jsonl
+    cat places.txt | python -m src.batch - -o results.parquet --concurrency 8
+    python -m src.batch places.txt -o out.jsonl --fixtures fixtures/ --record
+
+Input is one place id per line ('#' comments allowed). Places go through the
+same pipeline as the API (fetch → extract → score → form, see pipeline.py),
+so the extraction store, prefilter and LLM scheduler all apply.
+
+Places flow through a bounded queue into `--concurrency` workers, so reading
+never runs ahead of processing. A place id is appended to a checkpoint file
+once its output is on disk; re-running the same command skips them, so an
+interrupted job resumes where it stopped. Failed places (including a failed
+LLM call for any of their chunks) are written to <output>.errors.jsonl and
+not checkpointed, so they are retried next run.
+
+With `--fixtures DIR`, Places payloads and LLM answers are replayed from
+recordings in DIR instead of calling Google / OpenAI (fully offline and
+deterministic: the run uses an in-memory extraction store and a prefilter
+frozen at the bundled lexicon). Add `--record` to fill missing recordings
+from the live APIs.
+
+Output is JSON lines (one place per line) or, with pyarrow installed,
+Parquet with the restaurant info and recommendations stored as JSON columns.
+Parquet rows are written in parts of PARQUET_PART_ROWS places under
+<output>.parts/ and merged into the output file when the run ends.
+"""
+
+import os
+import sys
+import glob
+import time
+import shutil
+import asyncio
+import logging
+import argparse
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import orjson
+
+from src.fetch.fixtures import PlaceFixtures
+from src.fetch.places_client import fetch_place_data
+from src.nlp.extraction_store import MemoryExtractionStore, set_extraction_store
+from src.nlp.extractor_openai import get_backend, set_backend
+from src.nlp.prefilter import DishPrefilter, load_bundled_lexicon, set_prefilter
+from src.nlp.recorded_backend import RecordedBackend
+from src.normalisation.schemas import json_default
+from src.pipeline import run_place_pipeline
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE_PER_WORKER = 2
+PARQUET_PART_ROWS = 256
+LLM_RECORDINGS_FILE = "llm_recordings.json"
+
+
+# ---- Input / checkpoint ----
+def read_place_ids(lines: Iterable[str]) -> List[str]:
+    """Returns unique place ids in input order, skipping blanks and comments."""
+    ids = (line.split("#", 1)[0].strip() for line in lines)
+    return list(dict.fromkeys(place_id for place_id in ids if place_id))
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+# ---- Writers ----
+def _dumps(obj: Any) -> str:
+    return orjson.dumps(obj, default=json_default, option=orjson.OPT_PASSTHROUGH_DATACLASS).decode()
+
+
+class JsonlWriter:
+    """
+    Appends one line per place. Writers return the place ids whose rows are
+    on disk, from `write` and `flush`; only those get checkpointed.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, result: Dict[str, Any]) -> List[str]:
+        self._file.write(_dumps(result) + "\n")
+        self._file.flush()
+        return [result["place_id"]]
+
+    def flush(self) -> List[str]:
+        return []
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetWriter:
+    """
+    Buffers rows and writes every `part_rows` places as a complete Parquet
+    file under <path>.parts/, so finished places survive an interruption.
+    `close` merges the existing output and all parts into `path`.
+    """
+
+    def __init__(self, path: str, part_rows: int = PARQUET_PART_ROWS):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        self.path = path
+        self.parts_dir = path + ".parts"
+        self._part_rows = part_rows
+        self._rows: List[Dict[str, Any]] = []
+        os.makedirs(self.parts_dir, exist_ok=True)
+        self._next_part = len(glob.glob(os.path.join(self.parts_dir, "part-*.parquet")))
+
+    def write(self, result: Dict[str, Any]) -> List[str]:
+        self._rows.append({
+            "place_id": result["place_id"],
+            "name": result["restaurant_info"].get("name"),
+            "recommendation_count": len(result["recommendations"]),
+            "restaurant_info": _dumps(result["restaurant_info"]),
+            "recommendations": _dumps(result["recommendations"]),
+        })
+        return self.flush() if len(self._rows) >= self._part_rows else []
+
+    def flush(self) -> List[str]:
+        """Writes buffered rows as the next part file; returns their place ids."""
+        if not self._rows:
+            return []
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        part = os.path.join(self.parts_dir, f"part-{self._next_part:05d}.parquet")
+        pq.write_table(pa.Table.from_pylist(self._rows), part + ".tmp")
+        os.replace(part + ".tmp", part)  # a part is either complete or absent
+        self._next_part += 1
+        place_ids = [row["place_id"] for row in self._rows]
+        self._rows = []
+        return place_ids
+
+    def close(self) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.flush()
+        parts = sorted(glob.glob(os.path.join(self.parts_dir, "part-*.parquet")))
+        if parts:
+            # resumed run: keep the rows written before the interruption
+            tables = [pq.read_table(self.path)] if os.path.exists(self.path) else []
+            tables.extend(pq.read_table(part) for part in parts)
+            pq.write_table(pa.concat_tables(tables), self.path + ".tmp")
+            os.replace(self.path + ".tmp", self.path)
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+
+
+def make_writer(path: str, fmt: Optional[str]):
+    fmt = fmt or ("parquet" if path.endswith(".parquet") else "jsonl")
+    return ParquetWriter(path) if fmt == "parquet" else JsonlWriter(path)
+
+
+# ---- Runner ----
+async def run_batch(
+    place_ids: List[str],
+    writer,
+    fetch,
+    concurrency: int = 4,
+    checkpoint_path: Optional[str] = None,
+    errors_path: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Processes places with `concurrency` workers fed through a bounded queue.
+    Returns counts of done, failed and skipped places.
+    """
+    done = load_checkpoint(checkpoint_path) if checkpoint_path else set()
+    todo = [place_id for place_id in place_ids if place_id not in done]
+    counts = {"done": 0, "failed": 0, "skipped": len(place_ids) - len(todo)}
+    if counts["skipped"]:
+        logger.info(f"⏭️ Skipping {counts['skipped']} places already in the checkpoint")
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * QUEUE_SIZE_PER_WORKER)
+    checkpoint = open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path else None
+    errors = open(errors_path, "a", encoding="utf-8") if errors_path else None
+
+    def mark_done(place_ids: List[str]) -> None:
+        if checkpoint and place_ids:
+            checkpoint.write("".join(place_id + "\n" for place_id in place_ids))
+            checkpoint.flush()
+
+    async def producer():
+        for place_id in todo:
+            await queue.put(place_id)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def worker():
+        while True:
+            place_id = await queue.get()
+            if place_id is None:
+                return
+            start = time.perf_counter()
+            try:
+                result = await run_place_pipeline(place_id, fetch=fetch, limit=limit, strict=True)
+                if not result["restaurant_info"]:
+                    raise LookupError("place not found or Places API error")
+            except Exception as e:
+                counts["failed"] += 1
+                logger.warning(f"⚠️ {place_id} failed: {e}")
+                if errors:
+                    errors.write(_dumps({"place_id": place_id, "error": f"{type(e).__name__}: {e}"}) + "\n")
+                    errors.flush()
+                continue
+
+            mark_done(writer.write(result))
+            counts["done"] += 1
+            logger.info(
+                f"✅ [{counts['done'] + counts['failed']}/{len(todo)}] {place_id}: "
+                f"{len(result['recommendations'])} dishes in {time.perf_counter() - start:.2f}s"
+            )
+
+    try:
+        await asyncio.gather(producer(), *(worker() for _ in range(concurrency)))
+    finally:
+        mark_done(writer.flush())
+        for f in (checkpoint, errors):
+            if f:
+                f.close()
+    return counts
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m src.batch", description="Bulk dish recommendations for many places.")
+    parser.add_argument("input", help="file with one place id per line, or '-' for stdin")
+    parser.add_argument("-o", "--output", required=True, help="output file (.jsonl or .parquet)")
+    parser.add_argument("--format", choices=("jsonl", "parquet"), help="output format (default: from extension)")
+    parser.add_argument("--concurrency", type=int, default=4, help="places processed at once (default 4)")
+    parser.add_argument("--limit", type=int, help="keep only the top N recommendations per place")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--fixtures", help="replay Places payloads and LLM answers recorded in this directory")
+    parser.add_argument("--record", action="store_true", help="with --fixtures: record missing fixtures from the live APIs")
+    return parser.parse_args(argv)
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, int]:
+    if args.input == "-":
+        place_ids = read_place_ids(sys.stdin)
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            place_ids = read_place_ids(f)
+
+    fetch = fetch_place_data
+    recorded = None
+    if args.fixtures:
+        # replays must not depend on what earlier runs cached or taught the prefilter
+        set_extraction_store(MemoryExtractionStore())
+        set_prefilter(DishPrefilter(load_bundled_lexicon(), learning=False))
+        fetch = PlaceFixtures(args.fixtures, record=args.record).load
+        recorded = RecordedBackend(
+            os.path.join(args.fixtures, LLM_RECORDINGS_FILE),
+            inner=get_backend() if args.record else None,
+        )
+        set_backend(recorded)
+
+    writer = make_writer(args.output, args.format)
+    try:
+        counts = await run_batch(
+            place_ids,
+            writer,
+            fetch,
+            concurrency=max(1, args.concurrency),
+            checkpoint_path=args.checkpoint or args.output + ".checkpoint",
+            errors_path=args.output + ".errors.jsonl",
+            limit=args.limit,
+        )
+    finally:
+        writer.close()
+        if recorded:
+            recorded.save()
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    args = parse_args(argv)
+    start = time.perf_counter()
+    counts = asyncio.run(main_async(args))
+    logger.info(
+        f"🏁 Batch finished in {time.perf_counter() - start:.1f}s: "
+        f"{counts['done']} done, {counts['failed']} failed, {counts['skipped']} skipped"
+    )
+    if counts["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+fixtures.py
+-----------
+Recorded Google Places payloads for offline runs (batch jobs, benchmarks).
+
+Layout:
+    <fixtures_dir>/places/<place_id>.json    raw Places API (v1) payload
+
+Recorded payloads go through the same `normalise_place_payload` as live
+responses, so offline runs exercise the real normalisation code. With
+`record=True`, missing places are fetched live once and saved.
+
+Public:
+    - PlaceFixtures
+"""
+
+import os
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+
+from src.fetch.google_api import normalise_place_payload
+from src.fetch.places_client import get_places_client
+
+logger = logging.getLogger(__name__)
+
+
+class PlaceFixtures:
+    """Async place loader backed by recorded payload files."""
+
+    def __init__(self, directory: str, record: bool = False):
+        self.directory = os.path.join(directory, "places")
+        self.record = record
+
+    def _path(self, place_id: str) -> str:
+        return os.path.join(self.directory, f"{place_id}.json")
+
+    async def load(self, place_id: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Returns (restaurant, reviews) from the recording, recording it first if allowed."""
+        path = self._path(place_id)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return normalise_place_payload(json.load(f))
+
+        if not self.record:
+            raise FileNotFoundError(f"No recorded Places payload for {place_id} in {self.directory}")
+
+        data = await get_places_client().get_place_payload(place_id)
+        if data is None:
+            return {}, []
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        logger.info(f"📼 Recorded Places payload for {place_id}")
+        return normalise_place_payload(data)
@@ -4,6 +4,9 @@ google_api.py
 Fetches a restaurant's info and reviews from Google Places API,
 and normalises them into simple dicts ready for downstream processing.
 
+These are the blocking variants (notebooks, scripts); the API server and
+batch jobs use the async client in places_client.py.
+
 Returns:
     restaurant: Dict[str, Any]
     reviews: List[Dict[str, Any]]
@@ -14,7 +17,8 @@ import requests
 import logging
 from typing import Optional, Any, Dict, List
 from dotenv import load_dotenv
-from src.normalisation.basemodel import Restaurant, Review
+from src.normalisation.basemodel import Restaurant
+from src.normalisation.bulk import normalise_reviews
 
 logger = logging.getLogger(__name__)
 
@@ -23,30 +27,31 @@ load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 BASE_URL_GOOGLEPLACES = "https://places.googleapis.com/v1/places/"
 URL_FINDPLACE = "https://maps.googleapis.com/maps/api/place/findplacefromtext/json"
-
-
-def fetch_google_places_data(place_id: str) -> tuple[Dict[str, Any], List[Dict[str, Any]]]:
+PLACES_FIELD_MASK = (
+    "id,"
+    "displayName.text,"
+    "formattedAddress,"
+    "websiteUri,"
+    "googleMapsUri,"
+    "rating,"
+    "reviews.rating,"
+    "reviews.text.text,"
+    "reviews.authorAttribution.displayName,"
+    "reviews.publishTime,"
+    "reviews.googleMapsUri,"
+    "reviews.originalText.languageCode"
+)
+
+
+def fetch_place_payload(place_id: str) -> Optional[Dict[str, Any]]:
     """
-    Fetch restaurant metadata + reviews for a given Google Place ID.
-    Returns validated + flattened dicts, not Pydantic objects.
+    Fetch the raw Places API payload for a given Google Place ID.
+    Returns None on HTTP or API errors.
     """
     headers = {
         "Content-Type": "application/json",
         "X-Goog-Api-Key": GOOGLE_API_KEY,
-        "X-Goog-FieldMask": (
-            "id,"
-            "displayName.text,"
-            "formattedAddress,"
-            "websiteUri,"
-            "googleMapsUri,"
-            "rating,"
-            "reviews.rating,"
-            "reviews.text.text,"
-            "reviews.authorAttribution.displayName,"
-            "reviews.publishTime,"
-            "reviews.googleMapsUri,"
-            "reviews.originalText.languageCode"
-        ),
+        "X-Goog-FieldMask": PLACES_FIELD_MASK,
     }
 
     resp = requests.get(BASE_URL_GOOGLEPLACES + place_id, headers=headers)
@@ -54,12 +59,20 @@ def fetch_google_places_data(place_id: str) -> tuple[Dict[str, Any], List[Dict[s
 
     if resp.status_code != 200:
         logger.error(f"HTTP error {resp.status_code}: {data}")
-        return {}, []
+        return None
 
     if "error_message" in data:
         logger.error(f"Google API error: {data['error_message']}")
-        return {}, []
+        return None
 
+    return data
+
+
+def normalise_place_payload(data: Dict[str, Any]) -> tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Validates and flattens a raw Places API payload (live or recorded)
+    into the restaurant dict and review dicts used downstream.
+    """
     display_name = (data.get("displayName") or {}).get("text", "Unknown")
     address = data.get("formattedAddress", "No address available")
     logger.info(f"\nFound restaurant: {display_name}\n{address}\n")
@@ -75,8 +88,7 @@ def fetch_google_places_data(place_id: str) -> tuple[Dict[str, Any], List[Dict[s
         logger.info(f"No reviews found for {restaurant.name}")
         return restaurant_dict, []
 
-    reviews_models = [Review(**r) for r in reviews_data]
-    reviews_dicts = [r.model_dump() for r in reviews_models]
+    reviews_dicts = normalise_reviews(reviews_data)
 
     for r in reviews_dicts:
         r["source_type"] = "google"
@@ -85,9 +97,31 @@ def fetch_google_places_data(place_id: str) -> tuple[Dict[str, Any], List[Dict[s
     return restaurant_dict, reviews_dicts
 
 
+def fetch_google_places_data(place_id: str) -> tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Fetch restaurant metadata + reviews for a given Google Place ID.
+    Returns validated + flattened dicts, not Pydantic objects.
+    """
+    data = fetch_place_payload(place_id)
+    if data is None:
+        return {}, []
+    return normalise_place_payload(data)
+
+
 # ---- Helper: find Place ID by restaurant name ----
 def fetch_place_id(restaurant_name: str) -> Optional[str]:
-    """Fetch the Google Place ID for a given restaurant name."""
+    """
+    Fetch the Google Place ID for a given restaurant name. Names already in
+    the local place index are answered without calling Google, and every
+    candidate Google returns is added to it.
+    """
+    from src.fetch.place_index import get_place_index
+
+    index = get_place_index()
+    place_id = index.resolve(restaurant_name)
+    if place_id is not None:
+        return place_id
+
     params = {
         "input": restaurant_name,
         "inputtype": "textquery",
@@ -102,6 +136,7 @@ def fetch_place_id(restaurant_name: str) -> Optional[str]:
     if not candidates:
         logger.warning(f"No candidates found for '{restaurant_name}'")
         return None
+    index.add_candidates(candidates)
 
     candidate = candidates[0]
     logger.info(
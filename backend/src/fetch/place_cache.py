@@ -0,0 +1,194 @@
+"""
+place_cache.py
+--------------
+Shared in-process cache in front of the Google Places fetcher, so that
+/restaurant_info and /recommendations for the same place reuse one upstream
+call instead of hitting Google twice per page view.
+
+Features:
+    - TTL expiry per entry
+    - bounded size with LRU eviction
+    - single-flight: concurrent misses for one place_id share one request,
+      which keeps running if the caller that started it is cancelled
+    - hit / miss / coalesced counters via `stats()`
+
+Public:
+    - PlaceCache
+    - place_cache (process-wide instance)
+    - get_place_data(place_id)
+"""
+
+import os
+import copy
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.fetch.place_index import get_place_index
+from src.fetch.sources import fetch_place_reviews
+from src.metrics import CACHE_LOOKUPS, span
+
+logger = logging.getLogger(__name__)
+
+PlaceData = Tuple[Dict[str, Any], List[Dict[str, Any]]]
+
+# ---- Config ----
+PLACE_CACHE_TTL = float(os.getenv("PLACE_CACHE_TTL", "600"))  # seconds
+PLACE_CACHE_MAX_ENTRIES = int(os.getenv("PLACE_CACHE_MAX_ENTRIES", "1024"))
+
+
+async def _fetch_from_sources(place_id: str) -> PlaceData:
+    """
+    Default loader: Google (async pooled client) plus any extra review
+    sources. Fetched places are recorded in the place index for autocomplete.
+    """
+    restaurant, reviews = await fetch_place_reviews(place_id)
+    if restaurant.get("name"):
+        await asyncio.to_thread(get_place_index().add_restaurant, restaurant)
+    return restaurant, reviews
+
+
+def _copy_review(review: Dict[str, Any]) -> Dict[str, Any]:
+    """Copies a review record and its dish list (the only mutable field)."""
+    copied = review.copy()
+    if "dishes" in review:
+        # always a new list, even an empty one, so appends never reach the cache
+        copied["dishes"] = [dish.copy() for dish in review["dishes"] or ()]
+    return copied
+
+
+def _copy_place_data(data: PlaceData) -> PlaceData:
+    """
+    Returns copies of the restaurant and review records, down to each
+    review's dishes. The pipeline mutates reviews in place (dishes,
+    rankings), which must never leak back into the cached entry.
+    """
+    restaurant, reviews = data
+    return copy.deepcopy(restaurant), [_copy_review(r) for r in reviews]
+
+
+class PlaceCache:
+    """
+    Async TTL + LRU cache with request coalescing for place data.
+
+    Empty results (Google errors, unknown place IDs) are not cached, so a
+    transient upstream failure is retried on the next request.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Awaitable[PlaceData]] = _fetch_from_sources,
+        ttl: float = PLACE_CACHE_TTL,
+        max_entries: int = PLACE_CACHE_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._loader = loader
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, PlaceData]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # ---- lookups ----
+    def _lookup(self, place_id: str) -> Optional[PlaceData]:
+        entry = self._entries.get(place_id)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if self._clock() >= expires_at:
+            del self._entries[place_id]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(place_id)
+        return data
+
+    def _store(self, place_id: str, data: PlaceData) -> None:
+        self._entries[place_id] = (self._clock() + self._ttl, data)
+        self._entries.move_to_end(place_id)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, place_id: str) -> PlaceData:
+        """
+        Returns (restaurant, reviews) for a place, fetching upstream only on
+        a miss. Callers always receive their own copies of the dicts.
+        """
+        data = self._lookup(place_id)
+        if data is not None:
+            self.hits += 1
+            CACHE_LOOKUPS.inc(cache="place", result="hit")
+            logger.debug(f"📦 Place cache hit for {place_id}")
+            return _copy_place_data(data)
+
+        pending = self._inflight.get(place_id)
+        if pending is not None:
+            self.coalesced += 1
+            CACHE_LOOKUPS.inc(cache="place", result="coalesced")
+            logger.debug(f"📦 Joining in-flight fetch for {place_id}")
+            return _copy_place_data(await asyncio.shield(pending))
+
+        self.misses += 1
+        CACHE_LOOKUPS.inc(cache="place", result="miss")
+        task = asyncio.create_task(self._load(place_id))
+        self._inflight[place_id] = task
+        task.add_done_callback(lambda t: self._finish(place_id, t))
+        return _copy_place_data(await asyncio.shield(task))
+
+    async def _load(self, place_id: str) -> PlaceData:
+        """
+        Runs the loader in its own task, shared by the caller that started it
+        and every caller that joined: a waiter that is cancelled (client went
+        away) stops waiting but never cancels the fetch for the others.
+        """
+        with span("fetch"):
+            data = await self._loader(place_id)
+        restaurant, _ = data
+        if restaurant:
+            self._store(place_id, data)
+        return data
+
+    def _finish(self, place_id: str, task: asyncio.Task) -> None:
+        self._inflight.pop(place_id, None)
+        if not task.cancelled():
+            task.exception()  # retrieved, so a failure nobody awaited anymore does not warn on GC
+
+    # ---- maintenance ----
+    def invalidate(self, place_id: Optional[str] = None) -> None:
+        """Drops one place, or the whole cache when no place_id is given."""
+        if place_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(place_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns counters and current size for logging / monitoring."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "max_entries": self._max_entries,
+            "ttl": self._ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+# ---- Process-wide instance ----
+place_cache = PlaceCache()
+
+
+async def get_place_data(place_id: str) -> PlaceData:
+    """Cached replacement for `fetch_google_places_data` in async routes."""
+    return await place_cache.get(place_id)
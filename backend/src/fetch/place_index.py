@@ -0,0 +1,365 @@
+"""
+place_index.py
+--------------
+Local index of every place we have seen (name, address, place_id), so name
+lookups and search-as-you-type are answered without calling Google.
+
+Places are added whenever they are resolved: Find Place candidates (all of
+them, not just the first) and every place fetched for recommendations.
+Lookups use two in-memory indexes:
+
+    prefix    sorted word-suffixes of the folded name, searched with bisect,
+              so "torb" finds "Brasserie Torbar"
+    trigram   posting lists of name trigrams for typo-tolerant matches,
+              scored by how much of the query occurs in the name
+
+Name resolution only trusts an exact (normalised) name match, and
+autocomplete only answers locally with a prefix match; everything else goes
+to Google's Find Place, for queries of at least
+PLACE_INDEX_MIN_REMOTE_CHARS characters; queries Google had no answer for
+are not asked again for PLACE_INDEX_MISS_TTL seconds (the newest
+PLACE_INDEX_MISS_MAX of them, oldest dropped first). The index is
+persisted in SQLite (batched writes, run off the event loop) and reloaded
+at startup (memory only if the file cannot be opened, e.g. on read-only
+serverless filesystems).
+
+Config (environment):
+    PLACE_INDEX                    "sqlite" (default) or "memory"
+    PLACE_INDEX_PATH               SQLite file
+    PLACE_INDEX_MIN_REMOTE_CHARS   shortest query sent to Google on a miss
+    PLACE_INDEX_MISS_TTL           seconds a Google miss is remembered
+    PLACE_INDEX_MISS_MAX           most Google misses remembered at once
+
+Public:
+    - PlaceIndex
+    - get_place_index(), set_place_index(index)
+    - autocomplete(query, limit)
+    - resolve_place_id(name)
+"""
+
+import os
+import re
+import time
+import bisect
+import asyncio
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.fetch.places_client import get_places_client
+from src.metrics import CACHE_LOOKUPS
+from src.normalisation.text import fold
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+PLACE_INDEX = os.getenv("PLACE_INDEX", "sqlite").lower()
+PLACE_INDEX_PATH = os.getenv("PLACE_INDEX_PATH", ".cache/dishtip_places.sqlite3")
+PLACE_INDEX_MIN_REMOTE_CHARS = int(os.getenv("PLACE_INDEX_MIN_REMOTE_CHARS", "3"))
+PLACE_INDEX_MISS_TTL = float(os.getenv("PLACE_INDEX_MISS_TTL", "600"))
+PLACE_INDEX_MISS_MAX = int(os.getenv("PLACE_INDEX_MISS_MAX", "4096"))
+FUZZY_MIN_SCORE = 0.5     # share of query trigrams found in the name
+LOCAL_MIN_SCORE = 0.9     # autocomplete answers locally only with a prefix match
+PREFIX_SCAN_LIMIT = 200   # prefix entries inspected per lookup
+
+_WORD = re.compile(r"\w+")
+
+
+def normalise_name(text: str) -> str:
+    """Folded, punctuation-free form used for matching ("Café Zur Rose!" -> "cafe zur rose")."""
+    return " ".join(_WORD.findall(fold(text or "")))
+
+
+def trigrams(key: str) -> Set[str]:
+    """Trigrams of each word, padded so that word starts count double."""
+    grams: Set[str] = set()
+    for word in key.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class PlaceIndex:
+    """In-memory prefix + trigram index over known places, optionally persisted to SQLite."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS places (
+            place_id   TEXT PRIMARY KEY,
+            name       TEXT NOT NULL,
+            address    TEXT NOT NULL,
+            last_seen  REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()        # in-memory indexes
+        self._write_lock = threading.Lock()  # SQLite connection
+        self._places: Dict[str, Tuple[str, str, str]] = {}  # place_id -> (name, address, key)
+        self._prefixes: List[Tuple[str, str]] = []           # sorted (word-suffix of key, place_id)
+        self._trigrams: Dict[str, Set[str]] = {}             # trigram -> place_ids
+        self._conn: Optional[sqlite3.Connection] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.remote_calls = 0
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self._SCHEMA)
+            for place_id, name, address in self._conn.execute("SELECT place_id, name, address FROM places"):
+                self._index(place_id, name, address, keep_sorted=False)
+            self._prefixes.sort()
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    # ---- Writes ----
+    def _index(self, place_id: str, name: str, address: str, keep_sorted: bool = True) -> None:
+        key = normalise_name(name)
+        old = self._places.get(place_id)
+        if old is not None and old[2] != key:
+            self._unindex(place_id, old[2])
+        self._places[place_id] = (name, address, key)
+        if old is not None and old[2] == key:
+            return
+        words = key.split()
+        for i in range(len(words)):
+            entry = (" ".join(words[i:]), place_id)
+            if keep_sorted:
+                bisect.insort(self._prefixes, entry)
+            else:
+                self._prefixes.append(entry)
+        for gram in trigrams(key):
+            self._trigrams.setdefault(gram, set()).add(place_id)
+
+    def _unindex(self, place_id: str, key: str) -> None:
+        self._prefixes = [entry for entry in self._prefixes if entry[1] != place_id]
+        for gram in trigrams(key):
+            self._trigrams.get(gram, set()).discard(place_id)
+
+    def add_many(self, places: Iterable[Tuple[Optional[str], Optional[str], Optional[str]]]) -> None:
+        """
+        Adds or updates (place_id, name, address) rows; unchanged places are
+        not rewritten. The in-memory indexes are updated first, then changed
+        rows go to SQLite in one statement outside the index lock, so
+        lookups never wait on the disk. Async callers run this in a thread.
+        """
+        changed = []
+        with self._lock:
+            for place_id, name, address in places:
+                if not place_id or not name:
+                    continue
+                address = address or ""
+                old = self._places.get(place_id)
+                if old is not None and old[:2] == (name, address):
+                    continue
+                self._index(place_id, name, address)
+                changed.append((place_id, name, address, time.time()))
+        if changed and self._conn is not None:
+            with self._write_lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO places (place_id, name, address, last_seen) VALUES (?, ?, ?, ?)",
+                    changed,
+                )
+
+    def add(self, place_id: str, name: str, address: str = "") -> None:
+        """Adds or updates one place."""
+        self.add_many([(place_id, name, address)])
+
+    def add_restaurant(self, restaurant: Dict[str, Any]) -> None:
+        """Adds a normalised restaurant dict (see google_api.normalise_place_payload)."""
+        self.add(restaurant.get("place_id"), restaurant.get("name"), restaurant.get("address"))
+
+    def add_candidates(self, candidates: List[Dict[str, Any]]) -> None:
+        """Adds Find Place candidates ({"place_id", "name", "formatted_address"})."""
+        self.add_many((c.get("place_id"), c.get("name"), c.get("formatted_address")) for c in candidates)
+
+    # ---- Reads ----
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Best matches for a (partial) name, most relevant first. Prefix matches
+        score 1.0 (whole name) or 0.9 (later word); trigram matches score up
+        to 0.8.
+        """
+        key = normalise_name(query)
+        if not key:
+            return []
+
+        scores: Dict[str, float] = {}
+        with self._lock:
+            start = bisect.bisect_left(self._prefixes, (key, ""))
+            for suffix, place_id in self._prefixes[start:start + PREFIX_SCAN_LIMIT]:
+                if not suffix.startswith(key):
+                    break
+                score = 1.0 if self._places[place_id][2].startswith(key) else 0.9
+                scores[place_id] = max(scores.get(place_id, 0.0), score)
+
+            if len(scores) < limit:
+                query_grams = trigrams(key)
+                shared: Dict[str, int] = {}
+                for gram in query_grams:
+                    for place_id in self._trigrams.get(gram, ()):
+                        shared[place_id] = shared.get(place_id, 0) + 1
+                for place_id, count in shared.items():
+                    coverage = count / len(query_grams)
+                    if coverage >= FUZZY_MIN_SCORE and place_id not in scores:
+                        scores[place_id] = round(0.8 * coverage, 3)
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], len(self._places[item[0]][2]), item[0]))
+            results = [
+                {"place_id": place_id, "name": self._places[place_id][0],
+                 "address": self._places[place_id][1], "score": score}
+                for place_id, score in ranked[:limit]
+            ]
+
+        if results:
+            self.hits += 1
+        else:
+            self.misses += 1
+        CACHE_LOOKUPS.inc(cache="place_index", result="hit" if results else "miss")
+        return results
+
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Place ID for a name if exactly one known place has that normalised
+        name. Prefixes and near-misses are never resolved ("Luigi" must not
+        become "Luigi's Pizza"); those go to Google.
+        """
+        key = normalise_name(name)
+        if not key:
+            return None
+        with self._lock:
+            start = bisect.bisect_left(self._prefixes, (key, ""))
+            matches = [
+                place_id
+                for suffix, place_id in self._prefixes[start:start + PREFIX_SCAN_LIMIT]
+                if suffix == key and self._places[place_id][2] == key
+            ]
+        place_id = matches[0] if len(matches) == 1 else None
+        if place_id is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        CACHE_LOOKUPS.inc(cache="place_index", result="hit" if place_id else "miss")
+        return place_id
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "sqlite" if self._conn is not None else "memory",
+            "places": len(self._places),
+            "hits": self.hits,
+            "misses": self.misses,
+            "remote_calls": self.remote_calls,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# ----------------------------------------------------------------------
+# Shared instance
+# ----------------------------------------------------------------------
+_index: Optional[PlaceIndex] = None
+_index_lock = threading.Lock()
+# normalised query -> time Google had no candidates, oldest first
+_remote_misses: "OrderedDict[str, float]" = OrderedDict()
+
+
+def get_place_index() -> PlaceIndex:
+    """Returns the process-wide index configured by PLACE_INDEX (memory if SQLite fails)."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                if PLACE_INDEX == "memory":
+                    _index = PlaceIndex()
+                else:
+                    try:
+                        _index = PlaceIndex(PLACE_INDEX_PATH)
+                    except (sqlite3.Error, OSError) as e:
+                        logger.warning(f"⚠️ Could not open place index at {PLACE_INDEX_PATH} ({e}), using memory.")
+                        _index = PlaceIndex()
+                logger.info(f"🗺️ Place index ready with {len(_index)} places")
+    return _index
+
+
+def set_place_index(index: PlaceIndex) -> None:
+    """Overrides the shared index (tests, offline jobs)."""
+    global _index
+    _index = index
+
+
+def _recent_miss(key: str) -> bool:
+    """True if Google had no candidates for `key` within the TTL; drops expired misses."""
+    now = time.monotonic()
+    while _remote_misses:
+        oldest, missed_at = next(iter(_remote_misses.items()))
+        if now - missed_at < PLACE_INDEX_MISS_TTL:
+            break
+        del _remote_misses[oldest]
+    return key in _remote_misses
+
+
+def _remember_miss(key: str) -> None:
+    _remote_misses[key] = time.monotonic()
+    _remote_misses.move_to_end(key)
+    while len(_remote_misses) > PLACE_INDEX_MISS_MAX:
+        _remote_misses.popitem(last=False)
+
+
+async def _find_remote(query: str) -> List[Dict[str, Any]]:
+    """Find Place candidates for a query, indexed as they arrive; recent misses are not retried."""
+    key = normalise_name(query)
+    if _recent_miss(key):
+        return []
+
+    index = get_place_index()
+    index.remote_calls += 1
+    candidates = await get_places_client().find_places(query)
+    if candidates:
+        await asyncio.to_thread(index.add_candidates, candidates)
+        _remote_misses.pop(key, None)
+    else:
+        _remember_miss(key)
+    return candidates
+
+
+async def autocomplete(query: str, limit: int = 5) -> Dict[str, Any]:
+    """
+    Place suggestions for a search box. Returns {"query", "source", "results"}
+    with source "local" (index hit), "google" (answered upstream) or "none".
+
+    Only prefix matches (score >= LOCAL_MIN_SCORE) answer locally. With
+    nothing better than fuzzy matches, Google is asked too and the fuzzy
+    hits are kept as extra suggestions after its candidates.
+    """
+    local = get_place_index().search(query, limit)
+    if any(r["score"] >= LOCAL_MIN_SCORE for r in local):
+        return {"query": query, "source": "local", "results": local}
+    if len(normalise_name(query)) < PLACE_INDEX_MIN_REMOTE_CHARS:
+        return {"query": query, "source": "local" if local else "none", "results": local}
+
+    candidates = await _find_remote(query)
+    remote = [
+        {"place_id": c.get("place_id"), "name": c.get("name"), "address": c.get("formatted_address"), "score": None}
+        for c in candidates
+    ]
+    seen = {r["place_id"] for r in remote}
+    results = (remote + [r for r in local if r["place_id"] not in seen])[:limit]
+    source = "google" if remote else "local" if local else "none"
+    return {"query": query, "source": source, "results": results}
+
+
+async def resolve_place_id(restaurant_name: str) -> Optional[str]:
+    """Place ID for a restaurant name: from the index if known, else the first Find Place candidate."""
+    place_id = get_place_index().resolve(restaurant_name)
+    if place_id is not None:
+        return place_id
+    candidates = await _find_remote(restaurant_name)
+    return candidates[0].get("place_id") if candidates else None
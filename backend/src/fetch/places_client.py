@@ -0,0 +1,329 @@
+"""
+places_client.py
+----------------
+Native async client for the Google Places API, replacing the blocking
+`requests` calls that used to hold a threadpool slot per fetch.
+
+Features:
+    - one shared httpx.AsyncClient: keep-alive pool, HTTP/2 when `h2` is installed
+    - bounded connect / read timeouts
+    - retries with jittered exponential backoff on 429 / 5xx / transport errors
+    - circuit breaker: after repeated failures, calls fail fast for a cooldown
+      instead of piling up behind a degraded upstream
+
+Results keep the semantics of google_api.py: payload lookups return None on
+errors and `fetch_place_data` returns ({}, []), which the place cache does
+not store.
+
+Config (environment):
+    PLACES_BASE_URL            Places API (v1) base, e.g. a local stub server
+    PLACES_FINDPLACE_URL       Find Place endpoint
+    PLACES_TIMEOUT             read timeout in seconds
+    PLACES_CONNECT_TIMEOUT     connect timeout in seconds
+    PLACES_MAX_RETRIES         retries after the first attempt
+    PLACES_MAX_CONNECTIONS     size of the HTTP connection pool
+    PLACES_HTTP2               "1" (default) or "0"
+    PLACES_BREAKER_THRESHOLD   consecutive failures before the breaker opens
+    PLACES_BREAKER_COOLDOWN    seconds the breaker stays open
+
+Public:
+    - PlacesClient (get_place_payload, find_places, find_place_id), CircuitBreaker, CircuitOpenError
+    - get_places_client(), set_places_client(client)
+    - fetch_place_data(place_id), fetch_place_id_async(name)
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from src.fetch.google_api import (
+    BASE_URL_GOOGLEPLACES,
+    GOOGLE_API_KEY,
+    PLACES_FIELD_MASK,
+    URL_FINDPLACE,
+    normalise_place_payload,
+)
+from src.retry import backoff_delay, retry_after
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+PLACES_BASE_URL = os.getenv("PLACES_BASE_URL", BASE_URL_GOOGLEPLACES)
+PLACES_FINDPLACE_URL = os.getenv("PLACES_FINDPLACE_URL", URL_FINDPLACE)
+PLACES_TIMEOUT = float(os.getenv("PLACES_TIMEOUT", "10"))
+PLACES_CONNECT_TIMEOUT = float(os.getenv("PLACES_CONNECT_TIMEOUT", "3"))
+PLACES_MAX_RETRIES = int(os.getenv("PLACES_MAX_RETRIES", "2"))
+PLACES_MAX_CONNECTIONS = int(os.getenv("PLACES_MAX_CONNECTIONS", "20"))
+PLACES_HTTP2 = os.getenv("PLACES_HTTP2", "1") != "0"
+PLACES_BREAKER_THRESHOLD = int(os.getenv("PLACES_BREAKER_THRESHOLD", "5"))
+PLACES_BREAKER_COOLDOWN = float(os.getenv("PLACES_BREAKER_COOLDOWN", "30"))
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is rejected because the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker with three states:
+
+        closed      calls pass; `threshold` failures in a row open it
+        open        calls fail fast until `cooldown` has passed
+        half_open   one trial call passes; success closes, failure reopens
+
+    A trial that ends without a result (cancelled, e.g. the client went
+    away) is handed back with `release_trial`, so the next call can try.
+    """
+
+    def __init__(
+        self,
+        threshold: int = PLACES_BREAKER_THRESHOLD,
+        cooldown: float = PLACES_BREAKER_COOLDOWN,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._clock() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """
+        Raises CircuitOpenError if the call must not go upstream. Returns
+        True if the call is the half-open trial.
+        """
+        state = self.state
+        if state == "closed":
+            return False
+        if state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        self.rejected += 1
+        raise CircuitOpenError("Google Places circuit breaker is open")
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def release_trial(self) -> None:
+        """Ends a trial that produced no result; the breaker stays half-open."""
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_running or self.failures >= self.threshold:
+            if self.opened_at is None or self._trial_running:
+                logger.warning(f"🔌 Places circuit breaker opened after {self.failures} failures")
+            self.opened_at = self._clock()
+            self._trial_running = False
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return False
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class PlacesClient:
+    """
+    Async Places API client. The httpx client is created lazily, once per
+    event loop, so importing this module never opens connections.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = PLACES_BASE_URL,
+        findplace_url: str = PLACES_FINDPLACE_URL,
+        timeout: float = PLACES_TIMEOUT,
+        connect_timeout: float = PLACES_CONNECT_TIMEOUT,
+        max_retries: int = PLACES_MAX_RETRIES,
+        max_connections: int = PLACES_MAX_CONNECTIONS,
+        http2: bool = PLACES_HTTP2,
+        breaker: Optional[CircuitBreaker] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self._api_key = api_key
+        self.base_url = base_url
+        self.findplace_url = findplace_url
+        self._timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._max_retries = max_retries
+        self._max_connections = max_connections
+        self._http2 = http2
+        self._transport = transport
+        self.breaker = breaker or CircuitBreaker()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return self._api_key or GOOGLE_API_KEY
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            http2 = self._http2 and _http2_available()
+            if self._http2 and not http2:
+                logger.info("ℹ️ h2 not installed, Places client uses HTTP/1.1 keep-alive")
+            self._client = httpx.AsyncClient(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=self._max_connections,
+                    max_keepalive_connections=self._max_connections,
+                    keepalive_expiry=30.0,
+                ),
+                timeout=self._timeout,
+                transport=self._transport,
+            )
+            self._loop = loop
+        return self._client
+
+    async def _get(self, url: str, **kwargs: Any) -> httpx.Response:
+        """GET with breaker, bounded timeouts and jittered retries."""
+        attempt = 0
+        while True:
+            trial = self.breaker.allow()
+            try:
+                response = await self.client.get(url, **kwargs)
+                if response.status_code == 429 or response.status_code >= 500:
+                    response.raise_for_status()
+            except Exception as e:
+                self.breaker.record_failure()
+                if attempt >= self._max_retries or not _is_retryable(e) or self.breaker.state == "open":
+                    raise
+                delay = retry_after(e) or backoff_delay(attempt)
+                attempt += 1
+                logger.warning(
+                    f"🔁 Places call failed ({type(e).__name__}), retry {attempt}/{self._max_retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # cancelled mid-call: says nothing about upstream health, but must not keep the trial
+                if trial:
+                    self.breaker.release_trial()
+                raise
+
+            self.breaker.record_success()
+            return response
+
+    async def get_place_payload(self, place_id: str) -> Optional[Dict[str, Any]]:
+        """Raw Places API payload for a place, or None on errors."""
+        headers = {
+            "Content-Type": "application/json",
+            "X-Goog-Api-Key": self.api_key or "",
+            "X-Goog-FieldMask": PLACES_FIELD_MASK,
+        }
+        try:
+            resp = await self._get(self.base_url + place_id, headers=headers)
+            data = resp.json()
+        except CircuitOpenError as e:
+            logger.error(f"⛔ {e}, not fetching {place_id}")
+            return None
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error(f"Places request for {place_id} failed: {type(e).__name__}: {e}")
+            return None
+
+        if resp.status_code != 200:
+            logger.error(f"HTTP error {resp.status_code}: {data}")
+            return None
+        if "error_message" in data:
+            logger.error(f"Google API error: {data['error_message']}")
+            return None
+        return data
+
+    async def find_places(self, restaurant_name: str) -> List[Dict[str, Any]]:
+        """All Find Place candidates ({"place_id", "name", "formatted_address"}) for a name."""
+        params = {
+            "input": restaurant_name,
+            "inputtype": "textquery",
+            "fields": "place_id,name,formatted_address",
+            "key": self.api_key or "",
+        }
+        try:
+            data = (await self._get(self.findplace_url, params=params)).json()
+        except (CircuitOpenError, httpx.HTTPError, ValueError) as e:
+            logger.error(f"Find Place request for '{restaurant_name}' failed: {e}")
+            return []
+
+        candidates = data.get("candidates", [])
+        if not candidates:
+            logger.warning(f"No candidates found for '{restaurant_name}'")
+        return candidates
+
+    async def find_place_id(self, restaurant_name: str) -> Optional[str]:
+        """Place ID of the best Find Place match for a name, or None."""
+        candidates = await self.find_places(restaurant_name)
+        return candidates[0].get("place_id") if candidates else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "breaker_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "rejected": self.breaker.rejected,
+        }
+
+    async def aclose(self) -> None:
+        """Closes the pooled HTTP connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# ---- Shared instance ----
+_client: Optional[PlacesClient] = None
+
+
+def get_places_client() -> PlacesClient:
+    """Returns the process-wide Places client."""
+    global _client
+    if _client is None:
+        _client = PlacesClient()
+    return _client
+
+
+def set_places_client(client: PlacesClient) -> None:
+    """Overrides the shared client (stub server, tests, offline jobs)."""
+    global _client
+    _client = client
+
+
+async def fetch_place_data(place_id: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Async counterpart of `fetch_google_places_data`: normalised (restaurant, reviews)."""
+    data = await get_places_client().get_place_payload(place_id)
+    if data is None:
+        return {}, []
+    return normalise_place_payload(data)
+
+
+async def fetch_place_id_async(restaurant_name: str) -> Optional[str]:
+    """Async counterpart of `fetch_place_id`; known names are answered by the local place index."""
+    from src.fetch.place_index import resolve_place_id
+
+    return await resolve_place_id(restaurant_name)
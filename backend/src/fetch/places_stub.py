@@ -0,0 +1,140 @@
+"""
+places_stub.py
+--------------
+Local stand-in for the Google Places API, serving recorded payloads from a
+fixtures directory (same layout as fixtures.py). Latency and upstream
+failures can be injected to exercise the client's timeouts, retries and
+circuit breaker without touching Google.
+
+Run as a server and point the backend at it:
+
+    python -m src.fetch.places_stub fixtures/ --port 8765 --latency 0.2 --failure-rate 0.1
+    PLACES_BASE_URL=http://127.0.0.1:8765/v1/places/ \
+    PLACES_FINDPLACE_URL=http://127.0.0.1:8765/findplacefromtext/json uvicorn main:app
+
+or in-process, without sockets:
+
+    set_places_client(stub_client("fixtures/"))
+
+Public:
+    - make_stub_app(fixtures_dir, latency, failure_rate, fail_status)
+    - stub_client(fixtures_dir, app, client_options, **stub_options)
+"""
+
+import os
+import json
+import random
+import asyncio
+import argparse
+from typing import Any, Dict, Optional
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from src.fetch.places_client import PlacesClient
+
+STUB_BASE = "http://places-stub"
+
+
+def make_stub_app(
+    fixtures_dir: str,
+    latency: float = 0.0,
+    failure_rate: float = 0.0,
+    fail_status: int = 503,
+) -> FastAPI:
+    """
+    Builds the stub app. `app.state.requests` counts served requests;
+    latency, failure_rate and fail_status live on `app.state` too and can be
+    changed while it runs (e.g. to take the upstream down mid-test).
+    """
+    places_dir = os.path.join(fixtures_dir, "places")
+    app = FastAPI(title="Places API stub")
+    app.state.requests = 0
+    app.state.latency = latency
+    app.state.failure_rate = failure_rate
+    app.state.fail_status = fail_status
+
+    def load(place_id: str) -> Dict[str, Any]:
+        with open(os.path.join(places_dir, f"{place_id}.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    async def upstream_behaviour():
+        app.state.requests += 1
+        if app.state.latency:
+            await asyncio.sleep(app.state.latency)
+        if app.state.failure_rate and random.random() < app.state.failure_rate:
+            status = app.state.fail_status
+            return JSONResponse({"error": {"code": status, "status": "UNAVAILABLE"}}, status_code=status)
+        return None
+
+    @app.get("/v1/places/{place_id}")
+    async def place_details(place_id: str):
+        failure = await upstream_behaviour()
+        if failure is not None:
+            return failure
+        try:
+            return load(place_id)
+        except FileNotFoundError:
+            return JSONResponse({"error": {"code": 404, "status": "NOT_FOUND"}}, status_code=404)
+
+    @app.get("/findplacefromtext/json")
+    async def find_place(input: str = ""):
+        failure = await upstream_behaviour()
+        if failure is not None:
+            return failure
+        query = input.casefold()
+        candidates = []
+        if os.path.isdir(places_dir):
+            for name in sorted(os.listdir(places_dir)):
+                data = load(name[:-5])
+                display = (data.get("displayName") or {}).get("text", "")
+                if query and query in display.casefold():
+                    candidates.append({
+                        "place_id": data.get("id"),
+                        "name": display,
+                        "formatted_address": data.get("formattedAddress"),
+                    })
+        return {"candidates": candidates, "status": "OK" if candidates else "ZERO_RESULTS"}
+
+    return app
+
+
+def stub_client(
+    fixtures_dir: str,
+    app: Optional[FastAPI] = None,
+    client_options: Optional[Dict[str, Any]] = None,
+    **stub_options: Any,
+) -> PlacesClient:
+    """
+    PlacesClient wired to an in-process stub app through httpx's ASGI
+    transport. Pass `app` to keep a handle on the stub's state, and
+    `client_options` for PlacesClient arguments (retries, breaker, ...).
+    """
+    app = app or make_stub_app(fixtures_dir, **stub_options)
+    return PlacesClient(
+        api_key="stub",
+        base_url=f"{STUB_BASE}/v1/places/",
+        findplace_url=f"{STUB_BASE}/findplacefromtext/json",
+        http2=False,
+        transport=httpx.ASGITransport(app=app),
+        **(client_options or {}),
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(prog="python -m src.fetch.places_stub", description="Local Google Places API stub.")
+    parser.add_argument("fixtures", help="fixtures directory (payloads in <dir>/places/<place_id>.json)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with --fail-status")
+    parser.add_argument("--fail-status", type=int, default=503)
+    args = parser.parse_args()
+    app = make_stub_app(args.fixtures, args.latency, args.failure_rate, args.fail_status)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+sources.py
+----------
+Review source adapters, fanned out concurrently per place and merged into
+one review list for the pipeline.
+
+Sources:
+    google   Places API via the async client (also supplies restaurant info)
+    blog     schema.org Review JSON-LD embedded in saved blog pages,
+             <SOURCES_DIR>/blogs/<place_id>/*.html
+    dump     uploaded review dumps in the legacy Places format,
+             <SOURCES_DIR>/dumps/<place_id>.json or .jsonl
+
+All sources run at once under one deadline. A source that is slow or fails
+is left out and reported, and the others still count (partial results).
+Non-Google records are normalised through `schemas.REVIEW_MAPS`. Reviews
+with (nearly) identical text are kept once: the first source in
+REVIEW_SOURCES wins.
+
+Config (environment):
+    REVIEW_SOURCES     comma-separated source names (default "google")
+    SOURCES_DIR        directory holding blog pages and dumps
+    SOURCES_DEADLINE   seconds to wait for all sources
+
+Public:
+    - ReviewSource, GoogleSource, BlogSource, DumpSource
+    - gather_reviews(place_id, sources, deadline)
+    - dedupe_reviews(reviews)
+    - fetch_place_reviews(place_id)
+"""
+
+import os
+import re
+import abc
+import json
+import time
+import asyncio
+import logging
+from difflib import SequenceMatcher
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.fetch.places_client import fetch_place_data
+from src.metrics import span
+from src.normalisation.bulk import map_review
+from src.normalisation.schemas import ReviewRecord
+from src.normalisation.text import fold
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+REVIEW_SOURCES = [s.strip() for s in os.getenv("REVIEW_SOURCES", "google").split(",") if s.strip()]
+SOURCES_DIR = os.getenv("SOURCES_DIR", "data/sources")
+SOURCES_DEADLINE = float(os.getenv("SOURCES_DEADLINE", "8"))
+NEAR_DUPLICATE_RATIO = 0.92  # SequenceMatcher ratio on folded text
+DEDUPE_BLOCK_WORDS = 4       # leading words used to block near-duplicate comparisons
+
+_NON_WORD = re.compile(r"[^\w]+")
+_PLACE_ID = re.compile(r"^[A-Za-z0-9_-]+$")  # Google place ids; keeps file sources inside SOURCES_DIR
+
+SourceResult = Tuple[Dict[str, Any], List[ReviewRecord]]
+
+
+# ----------------------------------------------------------------------
+# Sources
+# ----------------------------------------------------------------------
+def _check_place_id(place_id: str) -> str:
+    """Rejects place ids that could address files outside a source directory."""
+    if not _PLACE_ID.match(place_id):
+        raise ValueError(f"Invalid place id for a file source: {place_id!r}")
+    return place_id
+
+
+class ReviewSource(abc.ABC):
+    """A source of reviews for a place. `fetch` returns (restaurant_info, reviews)."""
+
+    name = "source"
+
+    @abc.abstractmethod
+    async def fetch(self, place_id: str) -> SourceResult:
+        ...
+
+
+class GoogleSource(ReviewSource):
+    name = "google"
+
+    async def fetch(self, place_id: str) -> SourceResult:
+        return await fetch_place_data(place_id)
+
+
+class _JsonLdParser(HTMLParser):
+    """Collects the contents of <script type="application/ld+json"> blocks."""
+
+    def __init__(self):
+        super().__init__()
+        self.blocks: List[str] = []
+        self._inside = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "script" and dict(attrs).get("type", "").lower() == "application/ld+json":
+            self._inside = True
+            self.blocks.append("")
+
+    def handle_endtag(self, tag):
+        if tag == "script":
+            self._inside = False
+
+    def handle_data(self, data):
+        if self._inside:
+            self.blocks[-1] += data
+
+
+def _iter_jsonld_reviews(node: Any) -> Iterator[Dict[str, Any]]:
+    """Yields every schema.org Review object in a JSON-LD tree."""
+    if isinstance(node, list):
+        for item in node:
+            yield from _iter_jsonld_reviews(item)
+    elif isinstance(node, dict):
+        types = node.get("@type")
+        types = types if isinstance(types, list) else [types]
+        if "Review" in types:
+            yield node
+        for key in ("@graph", "review", "reviews", "itemListElement", "item", "mainEntity"):
+            if key in node:
+                yield from _iter_jsonld_reviews(node[key])
+
+
+class BlogSource(ReviewSource):
+    """Blog reviews from saved HTML pages with JSON-LD markup."""
+
+    name = "blog"
+
+    def __init__(self, directory: str = SOURCES_DIR):
+        self.directory = os.path.join(directory, "blogs")
+
+    def _read(self, place_id: str) -> List[ReviewRecord]:
+        place_dir = os.path.join(self.directory, _check_place_id(place_id))
+        if not os.path.isdir(place_dir):
+            return []
+
+        reviews = []
+        for filename in sorted(os.listdir(place_dir)):
+            if not filename.endswith((".html", ".htm")):
+                continue
+            parser = _JsonLdParser()
+            with open(os.path.join(place_dir, filename), encoding="utf-8") as f:
+                parser.feed(f.read())
+            for block in parser.blocks:
+                try:
+                    data = json.loads(block)
+                except ValueError:
+                    logger.warning(f"⚠️ Skipping malformed JSON-LD in {filename}")
+                    continue
+                for raw in _iter_jsonld_reviews(data):
+                    publisher = raw.get("publisher")
+                    source = (publisher.get("name") if isinstance(publisher, dict) else publisher) or os.path.splitext(filename)[0]
+                    review = map_review(raw, "blog", source)
+                    if review.text:
+                        reviews.append(review)
+        return reviews
+
+    async def fetch(self, place_id: str) -> SourceResult:
+        return {}, await asyncio.to_thread(self._read, place_id)
+
+
+class DumpSource(ReviewSource):
+    """Uploaded review dumps (legacy Places review format, JSON array or JSON lines)."""
+
+    name = "dump"
+
+    def __init__(self, directory: str = SOURCES_DIR, label: str = "Google Reviews"):
+        self.directory = os.path.join(directory, "dumps")
+        self.label = label
+
+    def _read(self, place_id: str) -> List[ReviewRecord]:
+        base = os.path.join(self.directory, _check_place_id(place_id))
+        if os.path.exists(base + ".jsonl"):
+            with open(base + ".jsonl", encoding="utf-8") as f:
+                raws = [json.loads(line) for line in f if line.strip()]
+        elif os.path.exists(base + ".json"):
+            with open(base + ".json", encoding="utf-8") as f:
+                raws = json.load(f)
+        else:
+            return []
+        return [review for review in (map_review(raw, "google", self.label) for raw in raws) if review.text]
+
+    async def fetch(self, place_id: str) -> SourceResult:
+        return {}, await asyncio.to_thread(self._read, place_id)
+
+
+SOURCE_TYPES = {"google": GoogleSource, "blog": BlogSource, "dump": DumpSource}
+
+
+# ----------------------------------------------------------------------
+# Merge
+# ----------------------------------------------------------------------
+def _dedupe_key(text: Optional[str]) -> str:
+    return _NON_WORD.sub(" ", fold(text or "")).strip()
+
+
+def dedupe_reviews(reviews: List[ReviewRecord]) -> List[ReviewRecord]:
+    """
+    Drops reviews whose text is identical or nearly identical to an earlier
+    one (cross-posted blog reviews, dumps overlapping the live Google set).
+    Near-duplicates are only compared within a block sharing the leading words.
+    """
+    kept: List[ReviewRecord] = []
+    exact = set()
+    blocks: Dict[str, List[str]] = {}
+    for review in reviews:
+        key = _dedupe_key(review.get("text"))
+        if not key:
+            kept.append(review)
+            continue
+        if key in exact:
+            continue
+        block = " ".join(key.split()[:DEDUPE_BLOCK_WORDS])
+        candidates = blocks.setdefault(block, [])
+        if any(
+            SequenceMatcher(None, key, other).quick_ratio() >= NEAR_DUPLICATE_RATIO
+            and SequenceMatcher(None, key, other).ratio() >= NEAR_DUPLICATE_RATIO
+            for other in candidates
+        ):
+            continue
+        exact.add(key)
+        candidates.append(key)
+        kept.append(review)
+
+    if len(kept) < len(reviews):
+        logger.info(f"🧹 Dropped {len(reviews) - len(kept)} duplicate reviews across sources")
+    return kept
+
+
+async def gather_reviews(
+    place_id: str,
+    sources: List[ReviewSource],
+    deadline: float = SOURCES_DEADLINE,
+) -> Tuple[Dict[str, Any], List[ReviewRecord], Dict[str, Dict[str, Any]]]:
+    """
+    Runs all sources concurrently and merges what arrived before `deadline`.
+
+    Returns:
+        (restaurant_info, reviews, report), where report maps each source name
+        to {"status": "ok" | "timeout" | "error", "reviews", "elapsed"}.
+    """
+    start = time.perf_counter()
+    finished_at: Dict[str, float] = {}
+
+    async def run(source: ReviewSource) -> SourceResult:
+        try:
+            with span(f"source_{source.name}"):
+                return await source.fetch(place_id)
+        finally:
+            finished_at[source.name] = round(time.perf_counter() - start, 3)
+
+    tasks = {source.name: asyncio.create_task(run(source)) for source in sources}
+    done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in pending:
+        task.cancel()
+
+    restaurant: Dict[str, Any] = {}
+    reviews: List[ReviewRecord] = []
+    report: Dict[str, Dict[str, Any]] = {}
+    for name, task in tasks.items():
+        if task in pending:
+            report[name] = {"status": "timeout", "reviews": 0, "elapsed": deadline}
+            logger.warning(f"⏱️ Source '{name}' missed the {deadline:.1f}s deadline for {place_id}")
+            continue
+        if task.exception() is not None:
+            report[name] = {"status": "error", "reviews": 0, "elapsed": finished_at.get(name)}
+            logger.warning(f"⚠️ Source '{name}' failed for {place_id}: {task.exception()}")
+            continue
+        info, found = task.result()
+        restaurant = restaurant or info
+        reviews.extend(found)
+        report[name] = {"status": "ok", "reviews": len(found), "elapsed": finished_at.get(name)}
+
+    reviews = dedupe_reviews(reviews)
+    counts = ", ".join(f"{name}={entry['reviews']}" for name, entry in report.items())
+    logger.info(f"📚 {len(reviews)} reviews for {place_id} from {counts}")
+    return restaurant, reviews, report
+
+
+def configured_sources() -> List[ReviewSource]:
+    return [SOURCE_TYPES[name]() for name in REVIEW_SOURCES]
+
+
+async def fetch_place_reviews(place_id: str) -> SourceResult:
+    """
+    Place loader over the configured sources. If only non-Google sources
+    answered, the restaurant info is reduced to the place id.
+    """
+    if REVIEW_SOURCES == ["google"]:
+        return await fetch_place_data(place_id)
+    restaurant, reviews, _ = await gather_reviews(place_id, configured_sources())
+    if not restaurant and reviews:
+        restaurant = {"place_id": place_id}
+    return restaurant, reviews
@@ -0,0 +1,277 @@
+"""
+metrics.py
+----------
+Lightweight in-process instrumentation: counters, gauges and histograms
+rendered in the Prometheus text format, plus per-stage spans.
+
+    with span("fetch"):
+        restaurant, reviews = await get_place_data(place_id)
+
+A span records its duration in the `dishtip_stage_seconds{stage=...}`
+histogram and, while a request trace is active (`trace()`), in that trace's
+breakdown. Spans nest: the trace keeps every stage in order, so a slow
+request can be attributed to Google, OpenAI queueing or our own code.
+
+If OTEL_ENABLED=1 and opentelemetry-api is installed, every span is also
+opened as an OpenTelemetry span. Exporting is configured by the usual OTel
+SDK setup (e.g. opentelemetry-instrument); without an SDK the spans are no-ops.
+
+Config (environment):
+    METRICS_ENABLED   "1" (default) or "0"
+    OTEL_ENABLED      "1" to mirror spans to OpenTelemetry (default "0")
+
+Public:
+    - Counter, Gauge, Histogram, REGISTRY, render()
+    - span(stage, **labels), trace(), untraced_context(), summarise(spans)
+    - STAGE_SECONDS, REQUEST_SECONDS, CACHE_LOOKUPS, LLM_CALLS, LLM_TOKENS,
+      LLM_INFLIGHT, LLM_QUEUE_SECONDS, STARTUP_SECONDS
+"""
+
+import os
+import abc
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+OTEL_ENABLED = os.getenv("OTEL_ENABLED", "0") == "1"
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000)
+
+LabelKey = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# ----------------------------------------------------------------------
+# Metric types
+# ----------------------------------------------------------------------
+class _Metric(abc.ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    @abc.abstractmethod
+    def samples(self) -> List[str]:
+        ...
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {value:g}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def count(self, **labels: Any) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = 'le="%g"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            cumulative += counts[-1]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total:g}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    return REGISTRY.render()
+
+
+# ---- Pipeline metrics ----
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "dishtip_stage_seconds", "Duration of pipeline stages", ["stage"]))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "dishtip_request_seconds", "End-to-end duration of API routes by response status", ["route", "status"]))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "dishtip_cache_lookups_total", "Cache lookups by cache and result (hit / miss)", ["cache", "result"]))
+LLM_CALLS = REGISTRY.register(Counter(
+    "dishtip_llm_calls_total", "LLM calls by outcome", ["outcome"]))
+LLM_TOKENS = REGISTRY.register(Histogram(
+    "dishtip_llm_tokens", "Estimated tokens (prompt + output allowance) per LLM call", buckets=TOKEN_BUCKETS))
+LLM_INFLIGHT = REGISTRY.register(Gauge(
+    "dishtip_llm_inflight", "LLM calls currently running"))
+LLM_QUEUE_SECONDS = REGISTRY.register(Histogram(
+    "dishtip_llm_queue_seconds", "Time LLM calls wait for a scheduler slot"))
+STARTUP_SECONDS = REGISTRY.register(Gauge(
+    "dishtip_startup_seconds", "Cold start cost by phase (app import, extractor import, warm-up)", ["phase"]))
+
+
+# ----------------------------------------------------------------------
+# Spans
+# ----------------------------------------------------------------------
+_trace: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("dishtip_trace", default=None)
+_tracer: Any = None
+
+
+def _otel_tracer() -> Any:
+    global _tracer, OTEL_ENABLED
+    if _tracer is None:
+        try:
+            from opentelemetry import trace as otel_trace
+        except ImportError:
+            logger.warning("⚠️ OTEL_ENABLED=1 but opentelemetry-api is not installed, spans stay local")
+            OTEL_ENABLED = False
+            return None
+        _tracer = otel_trace.get_tracer("dishtip")
+    return _tracer
+
+
+@contextmanager
+def span(stage: str, **attributes: Any) -> Iterator[None]:
+    """Times a pipeline stage (works inside sync and async code)."""
+    otel_span = None
+    if OTEL_ENABLED and _otel_tracer() is not None:
+        otel_span = _tracer.start_as_current_span(f"dishtip.{stage}", attributes=attributes)
+        otel_span.__enter__()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_SECONDS.observe(duration, stage=stage)
+        trace_ = _trace.get()
+        if trace_ is not None:
+            trace_.append((stage, duration))
+        if otel_span is not None:
+            otel_span.__exit__(None, None, None)
+
+
+@contextmanager
+def trace() -> Iterator[List[Tuple[str, float]]]:
+    """
+    Collects the (stage, seconds) spans of the current request, including
+    spans in tasks started from it (they inherit the context).
+    """
+    spans: List[Tuple[str, float]] = []
+    token = _trace.set(spans)
+    try:
+        yield spans
+    finally:
+        _trace.reset(token)
+
+
+def untraced_context() -> Context:
+    """
+    Copy of the current context without the request trace, for background
+    tasks that outlive the request (their spans must not land in its trace).
+    """
+    context = copy_context()
+    context.run(_trace.set, None)
+    return context
+
+
+def summarise(spans: List[Tuple[str, float]]) -> str:
+    """Compact per-stage breakdown, e.g. 'fetch=0.41s llm_call=2.10s(x3)'."""
+    totals: Dict[str, List[float]] = {}
+    for stage, duration in spans:
+        totals.setdefault(stage, []).append(duration)
+    return " ".join(
+        f"{stage}={sum(d):.2f}s" + (f"(x{len(d)})" if len(d) > 1 else "")
+        for stage, d in totals.items()
+    )
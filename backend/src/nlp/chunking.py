@@ -0,0 +1,243 @@
+"""
+chunking.py
+-----------
+Shared, token-aware text chunker for the dish extractors.
+
+Text is split into sentences and packed greedily into chunks of at most
+`max_tokens` tokens, counted for the target model: with `tiktoken` for
+OpenAI models when it is installed, with the model's own tokenizer for
+local (Hugging Face) models when it is cached, otherwise with a character
+estimate (~4 characters per token, the batch packer's, or a pessimistic ~2
+for local models). A sentence longer than the budget
+is split at word boundaries instead of producing an oversized (or empty)
+chunk. With `overlap`, each chunk starts with the trailing sentences of the
+previous one, up to that many tokens.
+
+`iter_chunks` is a generator over a string or any iterable of text pieces
+(e.g. the lines of a blog article or a review dump), so large inputs are
+never materialised as one string or one chunk list. Words are re-joined
+with single spaces, so a short review yields exactly its whitespace-
+normalised text (the key its cached extraction is stored under).
+
+Both extractors turn the model's answer for a chunk into dish names with
+`parse_dish_list` (comma-separated answers) or `normalise_dish_names`
+(names already in a list, e.g. from a JSON answer).
+
+Config (environment):
+    CHUNK_MAX_TOKENS       token budget per chunk (default 640)
+    CHUNK_OVERLAP_TOKENS   tokens repeated from the previous chunk (default 0)
+
+Public:
+    - iter_chunks(source, max_tokens, overlap, count_tokens)
+    - iter_sentences(source)
+    - get_token_counter(model), approx_tokens(text), conservative_tokens(text)
+    - parse_dish_list(output), normalise_dish_names(names)
+"""
+
+import os
+import re
+import logging
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "640"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "0"))
+MAX_PENDING_CHARS = 65536  # text without any sentence end is cut here (at a space)
+OPENAI_MODEL_PREFIXES = ("gpt-", "o1", "o3", "o4")
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+TokenCounter = Callable[[str], int]
+Source = Union[str, Iterable[str]]
+
+
+def approx_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), also used for batch packing."""
+    return len(text) // 4 + 1
+
+
+def conservative_tokens(text: str) -> int:
+    """
+    Pessimistic estimate (~2 characters per token) for SentencePiece models
+    such as T5 when their tokenizer is not available: T5 needs ~3 characters
+    per token on English prose and fewer on German compounds, rare words and
+    symbols, so ~4 would overrun the input window.
+    """
+    return len(text) // 2 + 1
+
+
+@lru_cache(maxsize=None)
+def _tiktoken_counter(model: str) -> TokenCounter:
+    try:
+        import tiktoken
+    except ImportError:
+        return approx_tokens
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+    except Exception as e:  # encodings are downloaded on first use
+        logger.warning(f"⚠️ tiktoken encoding for {model} unavailable ({e}), estimating tokens")
+        return approx_tokens
+    return lambda text: len(encoding.encode_ordinary(text))
+
+
+_hf_counters: Dict[str, TokenCounter] = {}
+_hf_unavailable: Set[str] = set()
+
+
+def _hf_counter(model: str) -> Optional[TokenCounter]:
+    """
+    Counter from the model's own Hugging Face tokenizer, if transformers is
+    installed and the tokenizer files are already cached locally (the web
+    process never downloads them; the inference process does on load).
+    Failures are retried on the next call, successes are kept.
+    """
+    counter = _hf_counters.get(model)
+    if counter is not None:
+        return counter
+    try:
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(model, local_files_only=True)
+    except Exception as e:
+        if model not in _hf_unavailable:
+            _hf_unavailable.add(model)
+            logger.warning(f"⚠️ Tokenizer for {model} unavailable ({type(e).__name__}), estimating tokens conservatively")
+        return None
+    counter = _hf_counters[model] = lambda text: len(tokenizer(text, add_special_tokens=False)["input_ids"])
+    return counter
+
+
+def get_token_counter(model: Optional[str] = None) -> TokenCounter:
+    """
+    Token counter for a model:
+
+        OpenAI models   tiktoken's encoding if installed, else `approx_tokens`
+        other models    the model's Hugging Face tokenizer if available
+                        locally, else `conservative_tokens`
+        no model        `approx_tokens`
+    """
+    if not model:
+        return approx_tokens
+    if model.startswith(OPENAI_MODEL_PREFIXES):
+        return _tiktoken_counter(model)
+    return _hf_counter(model) or conservative_tokens
+
+
+def iter_sentences(source: Source) -> Iterator[str]:
+    """Yields sentences from a string or a stream of text pieces, buffering only one partial sentence."""
+    if isinstance(source, str):
+        source = (source,)
+    pending = ""
+    for piece in source:
+        sentences = _SENTENCE_END.split(pending + piece)
+        pending = sentences.pop()
+        yield from sentences
+        if len(pending) > MAX_PENDING_CHARS:
+            cut = pending.rfind(" ", 0, MAX_PENDING_CHARS)
+            cut = cut if cut > 0 else MAX_PENDING_CHARS
+            yield pending[:cut]
+            pending = pending[cut:]
+    if pending:
+        yield pending
+
+
+def _split_long(sentence: str, tokens: int, max_tokens: int) -> Iterator[Tuple[str, int]]:
+    """
+    Splits an over-long sentence into pieces of at most `max_tokens`, at word
+    boundaries where possible. Sizes are scaled from the sentence's own
+    token count, so each piece does not need to be tokenised again.
+    """
+    max_chars = max(1, int(len(sentence) * max_tokens / tokens))
+    piece: List[str] = []
+    length = 0
+    for word in sentence.split(" "):
+        while len(word) > max_chars:  # a single "word" longer than the budget (URLs, garbage)
+            if piece:
+                yield " ".join(piece), -(-length * tokens // len(sentence))
+                piece, length = [], 0
+            yield word[:max_chars], max_tokens
+            word = word[max_chars:]
+        if piece and length + 1 + len(word) > max_chars:
+            yield " ".join(piece), -(-length * tokens // len(sentence))
+            piece, length = [], 0
+        length += len(word) + (1 if piece else 0)
+        piece.append(word)
+    if piece:
+        yield " ".join(piece), -(-length * tokens // len(sentence))
+
+
+def iter_chunks(
+    source: Source,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap: int = CHUNK_OVERLAP_TOKENS,
+    count_tokens: Optional[TokenCounter] = None,
+) -> Iterator[str]:
+    """
+    Yields chunks of whole sentences, each at most `max_tokens` tokens.
+
+    Args:
+        source: Text, or an iterable of text pieces read lazily.
+        max_tokens: Token budget per chunk.
+        overlap: Tokens of trailing sentences repeated at the start of the next chunk
+            (must be below `max_tokens`).
+        count_tokens: Token counter, e.g. `get_token_counter(MODEL_NAME)`; defaults to `approx_tokens`.
+    """
+    count = count_tokens or approx_tokens
+    overlap = min(overlap, max_tokens - 1)
+
+    # most reviews fit in one chunk: skip sentence splitting entirely
+    if isinstance(source, str) and count(source) <= max_tokens:
+        text = " ".join(source.split())
+        if text:
+            yield text
+        return
+
+    current: List[str] = []
+    sizes: List[int] = []
+    used = 0
+
+    for raw in iter_sentences(source):
+        sentence = " ".join(raw.split())
+        if not sentence:
+            continue
+        tokens = count(sentence)
+        pieces = ((sentence, tokens),) if tokens <= max_tokens else _split_long(sentence, tokens, max_tokens)
+
+        for piece, piece_tokens in pieces:
+            if used + piece_tokens > max_tokens and current:
+                yield " ".join(current)
+                # keep the trailing sentences that fit into `overlap` (and leave room for this piece)
+                keep, kept = 0, 0
+                for size in reversed(sizes):
+                    if kept + size > overlap or kept + size + piece_tokens > max_tokens:
+                        break
+                    keep += 1
+                    kept += size
+                current = current[len(current) - keep:] if keep else []
+                sizes = sizes[len(sizes) - keep:] if keep else []
+                used = kept
+            current.append(piece)
+            sizes.append(piece_tokens)
+            used += piece_tokens
+
+    if current:
+        yield " ".join(current)
+
+
+def normalise_dish_names(names: Iterable[str]) -> List[str]:
+    """Sorted, lowercased, de-duplicated dish names without blanks and 'none'."""
+    return sorted({n.strip().lower() for n in names if n.strip() and n.strip().lower() != "none"})
+
+
+def parse_dish_list(output: str) -> List[str]:
+    """Turns a model's comma-separated answer for one chunk into normalised dish names."""
+    output = output.strip()
+    if not output or output.lower() == "none":
+        return []
+    return normalise_dish_names(output.split(","))
@@ -0,0 +1,403 @@
+"""
+extraction_store.py
+-------------------
+Persistent, content-addressed cache for dish extraction results.
+
+Entries are keyed by a hash of (model name, prompt version, normalised chunk
+text) and hold the list of dish names the model returned for that chunk.
+A second key space indexes whole reviews by their content ID (see
+schemas.make_review_id), so a refreshed place only sends new or edited
+reviews to the extractor, however they end up chunked or batched.
+The SQLite backend survives restarts and can be shared by several uvicorn
+workers on the same host; the in-memory backend is a drop-in for tests,
+notebooks and read-only filesystems.
+
+Lookups and writes come in batches (`get_many` / `put_many`). Async callers
+use `aget_many` / `aput_many`, which run blocking backends (SQLite: busy
+timeouts while another worker writes, eviction scans) in a thread so the
+event loop never waits on the file.
+
+Config (environment):
+    EXTRACTION_STORE          "sqlite" (default), "memory" or "none"
+    EXTRACTION_STORE_PATH     SQLite file path
+    EXTRACTION_STORE_MAX_MB   size budget before least-recently-used eviction
+
+Public:
+    - make_extraction_key(model_name, prompt_version, chunk)
+    - make_review_key(model_name, prompt_version, review_id)
+    - ExtractionStore, MemoryExtractionStore, SQLiteExtractionStore
+    - get_extraction_store()
+"""
+
+import os
+import re
+import abc
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+EXTRACTION_STORE = os.getenv("EXTRACTION_STORE", "sqlite").lower()
+EXTRACTION_STORE_PATH = os.getenv("EXTRACTION_STORE_PATH", ".cache/dishtip_extractions.sqlite3")
+EXTRACTION_STORE_MAX_MB = float(os.getenv("EXTRACTION_STORE_MAX_MB", "256"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+# ----------------------------------------------------------------------
+# Keys
+# ----------------------------------------------------------------------
+def normalise_chunk(text: str) -> str:
+    """Unicode-normalises, case-folds and collapses whitespace in a chunk."""
+    text = unicodedata.normalize("NFKC", text or "")
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+def make_extraction_key(model_name: str, prompt_version: str, chunk: str) -> str:
+    """Stable content hash for one (model, prompt, chunk) extraction."""
+    payload = "\x1f".join((model_name, prompt_version, normalise_chunk(chunk)))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_review_key(model_name: str, prompt_version: str, review_id: str) -> str:
+    """Key of the per-review dish index entry for one review content ID."""
+    payload = "\x1f".join(("review", model_name, prompt_version, review_id))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Backends
+# ----------------------------------------------------------------------
+class ExtractionStore(abc.ABC):
+    """
+    Interface for extraction caches. `get` returns None on a miss and the
+    stored dish list (possibly empty) on a hit.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    blocking = False  # True if calls may wait on disk or locks (async callers use a thread)
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[List[str]]:
+        ...
+
+    @abc.abstractmethod
+    def put(self, key: str, dishes: List[str], model_name: str = "") -> None:
+        ...
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """Stored dish lists for the keys that hit; misses are left out."""
+        found = {}
+        for key in dict.fromkeys(keys):
+            dishes = self.get(key)
+            if dishes is not None:
+                found[key] = dishes
+        return found
+
+    def put_many(self, entries: Iterable[Tuple[str, List[str]]], model_name: str = "") -> None:
+        """Stores several (key, dishes) entries."""
+        for key, dishes in entries:
+            self.put(key, dishes, model_name)
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """`get_many` for async callers, off the event loop for blocking backends."""
+        keys = list(keys)
+        if self.blocking and keys:
+            return await asyncio.to_thread(self.get_many, keys)
+        return self.get_many(keys)
+
+    async def aput_many(self, entries: Iterable[Tuple[str, List[str]]], model_name: str = "") -> None:
+        """`put_many` for async callers, off the event loop for blocking backends."""
+        entries = list(entries)
+        if self.blocking and entries:
+            await asyncio.to_thread(self.put_many, entries, model_name)
+        elif entries:
+            self.put_many(entries, model_name)
+
+    def iter_dishes(self, limit: int = 10000) -> Iterator[str]:
+        """Yields dish names from the most recently used entries (lexicon seeding)."""
+        return iter(())
+
+    def _count(self, result: Optional[List[str]]) -> Optional[List[str]]:
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        CACHE_LOOKUPS.inc(cache="extraction", result="miss" if result is None else "hit")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Process-local hit/miss counters plus backend-specific size info."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "warm_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class NullExtractionStore(ExtractionStore):
+    """Never stores anything; used when caching is switched off."""
+
+    def get(self, key: str) -> Optional[List[str]]:
+        return self._count(None)
+
+    def put(self, key: str, dishes: List[str], model_name: str = "") -> None:
+        pass
+
+
+class MemoryExtractionStore(ExtractionStore):
+    """Process-local LRU store bounded by entry count."""
+
+    def __init__(self, max_entries: int = 4096):
+        super().__init__()
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            dishes = self._entries.get(key)
+            if dishes is not None:
+                self._entries.move_to_end(key)
+                dishes = list(dishes)
+        return self._count(dishes)
+
+    def put(self, key: str, dishes: List[str], model_name: str = "") -> None:
+        with self._lock:
+            self._entries[key] = list(dishes)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        self.writes += 1
+
+    def iter_dishes(self, limit: int = 10000) -> Iterator[str]:
+        with self._lock:
+            recent = list(self._entries.values())[-limit:]
+        for dishes in reversed(recent):
+            yield from dishes
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["entries"] = len(self._entries)
+        return stats
+
+
+class SQLiteExtractionStore(ExtractionStore):
+    """
+    SQLite-backed store shared between processes via WAL mode.
+
+    Eviction is size based: once the stored payload exceeds `max_bytes`,
+    the least recently used entries are deleted down to 90% of the budget.
+
+    Reads go through a per-thread connection and never take the write lock.
+    A hit only bumps `last_access` when the stored value is older than
+    `_TOUCH_AFTER`; those keys are queued and written in one batch on the
+    next put (or once enough have piled up), so recency is day-granular.
+    Calls block on the file (`blocking`), so async code goes through
+    `aget_many` / `aput_many`.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS extractions (
+            key         TEXT PRIMARY KEY,
+            model       TEXT NOT NULL,
+            dishes      TEXT NOT NULL,
+            size        INTEGER NOT NULL,
+            created_at  REAL NOT NULL,
+            last_access REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_extractions_last_access
+            ON extractions (last_access);
+    """
+
+    _EVICT_CHECK_EVERY = 64  # puts between size checks
+    _TOUCH_AFTER = 24 * 3600  # seconds before a hit refreshes last_access
+    _TOUCH_BATCH = 256  # queued touches that force a flush without a put
+    _SELECT_BATCH = 500  # keys per SELECT ... IN (...) (SQLite caps bound parameters)
+
+    blocking = True
+
+    def __init__(self, path: str = EXTRACTION_STORE_PATH, max_bytes: int = int(EXTRACTION_STORE_MAX_MB * 1024 * 1024)):
+        super().__init__()
+        self.path = path
+        self._max_bytes = max_bytes
+        self._puts_since_check = 0
+        self._lock = threading.Lock()        # write connection
+        self._touch_lock = threading.Lock()  # _pending_touches (readers in any thread)
+        self._local = threading.local()
+        self._pending_touches: Dict[str, float] = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+
+    def _reader(self) -> sqlite3.Connection:
+        """Per-thread read connection; WAL lets readers run alongside the writer."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[List[str]]:
+        found = self.get_many([key])
+        return found.get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        keys = list(dict.fromkeys(keys))
+        rows = []
+        reader = self._reader()
+        for start in range(0, len(keys), self._SELECT_BATCH):
+            batch = keys[start:start + self._SELECT_BATCH]
+            rows.extend(reader.execute(
+                f"SELECT key, dishes, last_access FROM extractions WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall())
+
+        now = time.time()
+        stale = [key for key, _, last_access in rows if now - last_access > self._TOUCH_AFTER]
+        if stale:
+            with self._touch_lock:
+                self._pending_touches.update(dict.fromkeys(stale, now))
+                flush = len(self._pending_touches) >= self._TOUCH_BATCH
+            if flush:
+                with self._lock:
+                    self._flush_touches()
+
+        found = {key: json.loads(payload) for key, payload, _ in rows}
+        for key in keys:
+            self._count(found.get(key))
+        return found
+
+    def _flush_touches(self) -> None:
+        """Writes queued last_access bumps in one statement batch (caller holds the write lock)."""
+        with self._touch_lock:
+            touches, self._pending_touches = self._pending_touches, {}
+        if touches:
+            self._conn.executemany(
+                "UPDATE extractions SET last_access = ? WHERE key = ?",
+                [(at, key) for key, at in touches.items()],
+            )
+
+    def put(self, key: str, dishes: List[str], model_name: str = "") -> None:
+        self.put_many([(key, dishes)], model_name)
+
+    def put_many(self, entries: Iterable[Tuple[str, List[str]]], model_name: str = "") -> None:
+        """Writes all entries in one transaction."""
+        now = time.time()
+        rows = []
+        for key, dishes in entries:
+            payload = json.dumps(list(dishes), ensure_ascii=False)
+            rows.append((key, model_name, payload, len(key) + len(payload), now, now))
+        if not rows:
+            return
+        with self._lock:
+            self._flush_touches()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO extractions (key, model, dishes, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._puts_since_check += len(rows)
+            if self._puts_since_check >= self._EVICT_CHECK_EVERY:
+                self._puts_since_check = 0
+                self._evict()
+        self.writes += len(rows)
+
+    def iter_dishes(self, limit: int = 10000) -> Iterator[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT dishes FROM extractions WHERE dishes != '[]' ORDER BY last_access DESC LIMIT ?", (limit,)
+            ).fetchall()
+        for (payload,) in rows:
+            yield from json.loads(payload)
+
+    def _evict(self) -> None:
+        """Deletes least recently used rows until under 90% of the size budget."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+        if total <= self._max_bytes:
+            return
+        target = total - int(self._max_bytes * 0.9)
+        freed = 0
+        stale_keys = []
+        for key, size in self._conn.execute("SELECT key, size FROM extractions ORDER BY last_access ASC"):
+            stale_keys.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        self._conn.executemany("DELETE FROM extractions WHERE key = ?", stale_keys)
+        logger.info(f"🧹 Evicted {len(stale_keys)} cached extractions ({freed} bytes)")
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions"
+            ).fetchone()
+        stats.update({"path": self.path, "entries": entries, "bytes": size, "max_bytes": self._max_bytes})
+        return stats
+
+
+# ----------------------------------------------------------------------
+# Shared instance
+# ----------------------------------------------------------------------
+_store: Optional[ExtractionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_extraction_store() -> ExtractionStore:
+    """
+    Returns the process-wide store configured by EXTRACTION_STORE.
+    Falls back to memory if the SQLite file cannot be opened
+    (e.g. read-only serverless filesystems).
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if EXTRACTION_STORE == "none":
+                    _store = NullExtractionStore()
+                elif EXTRACTION_STORE == "memory":
+                    _store = MemoryExtractionStore()
+                else:
+                    try:
+                        _store = SQLiteExtractionStore()
+                    except (sqlite3.Error, OSError) as e:
+                        logger.warning(f"⚠️ Could not open extraction store at {EXTRACTION_STORE_PATH} ({e}), using memory.")
+                        _store = MemoryExtractionStore()
+                logger.info(f"🗄️ Extraction store: {type(_store).__name__}")
+    return _store
+
+
+def set_extraction_store(store: ExtractionStore) -> None:
+    """Overrides the shared store (tests, notebooks, offline jobs)."""
+    global _store
+    _store = store
@@ -3,83 +3,50 @@ dish_extractor.py
 -----------------
 Extracts dish names mentioned in restaurant reviews using a generative LLM
 (Flan-T5).  Wraps model loading, prompting, inference, and post-processing into
-a simple API.  Includes in-memory caching for repeated inputs.
+a simple API.  Results are cached in the shared extraction store
+(see extraction_store.py), so repeated inputs survive restarts; uncached
+chunks run through one batched pass of the local engine (see local_engine.py).
 
 Public functions:
-    - extract_dishes_from_reviews(reviews)
+    - extract_dishes(reviews)
+    - extract_dishes_async(reviews)  (shares micro-batches across requests)
+    - warm_up()  (starts the inference process and loads the model)
 """
 
-import re
-from typing import Any, Dict, List
-from functools import lru_cache
+import asyncio
+from typing import Any, Dict, List, Optional, Set
 import logging
-from transformers import pipeline
-from src.normalisation.schemas import DISH
+from src.normalisation.schemas import DishRecord
+from src.metrics import span
+from src.nlp.chunking import get_token_counter, iter_chunks, parse_dish_list
+from src.nlp.extraction_store import get_extraction_store, make_extraction_key, make_review_key
+from src.nlp.local_engine import LOCAL_MODEL_NAME, MAX_INPUT_TOKENS, LocalEngine, get_engine
+from src.nlp.local_batcher import get_batcher
+from src.nlp.prefilter import get_prefilter, learn_dishes, prefilter_chunks
 
 logger = logging.getLogger(__name__)
 
 # ---- Config ----
-MODEL_NAME = "google/flan-t5-large"
-MAX_TOKENS = 100       # Increased from 20 → safer for multi-dish outputs
-BATCH_SIZE = 16
-DEVICE = -1
+MODEL_NAME = LOCAL_MODEL_NAME
+PROMPT_VERSION = "v1"  # bump whenever make_prompt changes, invalidates cached extractions
+# Chunks are measured with the T5 tokenizer when it is cached locally, else with
+# chunking.conservative_tokens (~2 chars/token); the engine truncates anything
+# that still overruns. 64 tokens leave room for the prompt around the chunk.
+CHUNK_MAX_TOKENS = MAX_INPUT_TOKENS - 64
 
-_extractor = None  # Lazy singleton model
 
-import torch
-torch.set_num_threads(8)
-logger.info(f"✅ Using 8 CPU threads for PyTorch")
-
-
-
-def chunk_text(text: str, max_words: int = 500) -> list[str]:
+# ---- 1. Lazy model loader ----
+def get_extractor() -> LocalEngine:
     """
-    Splits long review text into smaller chunks (~max_words each)
-    while respecting sentence boundaries.
+    Returns the shared local inference engine (weights load on first use).
     """
-    # Split by sentence-ending punctuation
-    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-    chunks, current_chunk = [], []
-    word_count = 0
-
-    for sentence in sentences:
-        words = sentence.split()
-        if word_count + len(words) > max_words:
-            chunks.append(" ".join(current_chunk))
-            current_chunk = []
-            word_count = 0
-        current_chunk.extend(words)
-        word_count += len(words)
-
-    if chunks:
-        logger.info(f"Text chunked into {len(chunks)+1} parts.")
-
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
+    return get_engine()
 
-    return chunks
 
-
-
-# ---- 1. Lazy model loader ----
-def get_extractor():
-    """
-    Loads the Hugging Face pipeline only once.
-    """
-    global _extractor
-    if _extractor is None:
-        logger.info(f"Loading model: {MODEL_NAME} ...")
-        _extractor = pipeline(
-            "text2text-generation",
-            model=MODEL_NAME,
-            do_sample=False,
-            temperature=0.0,
-            truncation=True,
-            batch_size=BATCH_SIZE,
-            device=DEVICE,
-        )
-        logger.info("Model loaded successfully.")
-    return _extractor
+async def warm_up() -> None:
+    """Loads the model in the batcher's worker process with one tiny prompt."""
+    await asyncio.to_thread(get_prefilter)  # also opens the extraction store
+    await get_batcher().generate([make_prompt("warm up")])
 
 
 # ---- 2. Prompt builder ----
@@ -97,18 +64,137 @@ def make_prompt(review: str) -> str:
 
 
 # ---- 3. Cached inference ----
-@lru_cache(maxsize=512)
-def _cached_extract_single(prompt: str) -> str:
+def _chunk_keys(chunks: List[str]) -> Dict[str, str]:
+    """Extraction store key per unique chunk (model, prompt version, normalised text)."""
+    return {chunk: make_extraction_key(MODEL_NAME, PROMPT_VERSION, chunk) for chunk in dict.fromkeys(chunks)}
+
+
+def _split_hits(
+    keys: Dict[str, str], found: Dict[str, List[str]], prefiltered: Optional[Set[str]] = None
+) -> tuple[Dict[str, List[str]], List[str]]:
     """
-    Runs model inference for one prompt with LRU caching.
-    Cached by exact prompt text (up to 512 unique reviews).
+    Resolves unique chunks through the extraction store hits in `found` and
+    the rule-based prefilter. Returns (hits, chunks that still need the
+    model); chunks answered by the prefilter are added to `prefiltered`, if
+    given.
     """
-    extractor = get_extractor()
-    result = extractor(prompt, max_new_tokens=MAX_TOKENS)[0]
-    return result.get("generated_text", "").strip()
+    results = {chunk: found[key] for chunk, key in keys.items() if key in found}
+    misses = [chunk for chunk, key in keys.items() if key not in found]
+
+    resolved, misses = prefilter_chunks(misses)
+    results.update(resolved)
+    if prefiltered is not None:
+        prefiltered.update(resolved)
+    return results, misses
+
+
+def _parse_outputs(
+    keys: Dict[str, str], results: Dict[str, List[str]], misses: List[str], outputs: List[str]
+) -> List[tuple[str, List[str]]]:
+    """Parses model outputs for missed chunks into `results`; returns the store entries to write."""
+    entries = []
+    for chunk, output in zip(misses, outputs):
+        dishes = parse_dish_list(output)
+        entries.append((keys[chunk], dishes))
+        learn_dishes(dishes, chunk)
+        results[chunk] = dishes
+    return entries
+
+
+def _cached_extract_batch(chunks: List[str], prefiltered: Optional[Set[str]] = None) -> Dict[str, List[str]]:
+    """Runs all uncached chunks through the engine in one length-bucketed pass."""
+    store = get_extraction_store()
+    keys = _chunk_keys(chunks)
+    results, misses = _split_hits(keys, store.get_many(keys.values()), prefiltered)
+    if misses:
+        outputs = get_extractor().generate([make_prompt(c) for c in misses])
+        store.put_many(_parse_outputs(keys, results, misses, outputs), MODEL_NAME)
+    return results
+
+
+async def _cached_extract_batch_async(
+    chunks: List[str], prefiltered: Optional[Set[str]] = None
+) -> Dict[str, List[str]]:
+    """Like `_cached_extract_batch`, but via the cross-request micro-batcher; store calls stay off the loop."""
+    store = get_extraction_store()
+    keys = _chunk_keys(chunks)
+    results, misses = _split_hits(keys, await store.aget_many(keys.values()), prefiltered)
+    if misses:
+        with span("prompt_build"):
+            prompts = [make_prompt(c) for c in misses]
+        with span("llm_call"):
+            outputs = await get_batcher().generate(prompts)
+        await store.aput_many(_parse_outputs(keys, results, misses, outputs), MODEL_NAME)
+    return results
 
 
 # ---- 4. Core extraction ----
+def _review_keys(reviews: List[Dict[str, Any]]) -> Dict[int, str]:
+    """Per-review dish index key by review position, for reviews with a content 'id'."""
+    return {i: make_review_key(MODEL_NAME, PROMPT_VERSION, r["id"]) for i, r in enumerate(reviews) if r.get("id")}
+
+
+def _known_reviews(review_keys: Dict[int, str], found: Dict[str, List[str]]) -> Dict[int, List[str]]:
+    """Dishes of reviews already in the per-review index, by review position."""
+    known = {i: found[key] for i, key in review_keys.items() if key in found}
+    if known:
+        logger.info(f"♻️ {len(known)}/{len(review_keys)} reviews already extracted, skipping them")
+    return known
+
+
+def _prepare_chunks(reviews: List[Dict[str, Any]], known: Dict[int, List[str]]) -> tuple[List[str], List[int]]:
+    """Chunks every review not in `known`, tracking which review each chunk belongs to."""
+    chunks = []
+    chunk_index_map = []
+    count_tokens = get_token_counter(MODEL_NAME)
+    for i, r in enumerate(reviews):
+        if i in known:
+            continue
+        for c in iter_chunks(r.get("text") or "", max_tokens=CHUNK_MAX_TOKENS, count_tokens=count_tokens):
+            chunks.append(c)
+            chunk_index_map.append(i)
+    return chunks, chunk_index_map
+
+
+def _attach_dishes(
+    reviews: List[Dict[str, Any]],
+    chunks: List[str],
+    chunk_index_map: List[int],
+    results: Dict[str, List[str]],
+    known: Dict[int, List[str]],
+    verbose: bool,
+    prefiltered: Set[str],
+    review_keys: Dict[int, str],
+) -> tuple[List[Dict[str, Any]], List[tuple[str, List[str]]]]:
+    """
+    Merges chunk results by review and attaches normalized dish lists.
+    Returns the reviews and the per-review index entries for newly
+    extracted reviews (none for a review with a chunk only answered by the
+    prefilter).
+    """
+    index_entries = []
+    dishes_by_review: dict[int, set[str]] = {i: set(dishes) for i, dishes in known.items()}
+    provisional: set[int] = set()
+    for idx, chunk in zip(chunk_index_map, chunks):
+        if chunk in prefiltered:
+            provisional.add(idx)
+        dishes = results[chunk]
+        if dishes:
+            dishes_by_review.setdefault(idx, set()).update(dishes)
+
+    for i, review in enumerate(reviews):
+        dishes = dishes_by_review.get(i, set())
+        if i in review_keys and i not in known and i not in provisional:
+            index_entries.append((review_keys[i], sorted(dishes)))
+        review["dishes"] = [_make_dish(name) for name in dishes]
+
+        if verbose:
+            logger.info(f"📝 {(review.get('text') or '')[:500]}")
+            logger.info(f"🍽️ {', '.join(dishes) or 'none'}\n")
+
+    return reviews, index_entries
+
+
 def extract_dishes(
     reviews: List[Dict[str, Any]], verbose: bool = False
 ) -> List[Dict[str, Any]]:
@@ -127,48 +213,48 @@ def extract_dishes(
         logger.warning("No reviews passed to extractor.")
         return []
 
-    # Prepare prompts (chunk-aware)
-    prompts = []
-    chunk_index_map = []  # track which review each chunk belongs to
-
-    for i, r in enumerate(reviews):
-        chunks = chunk_text(r.get("text", ""))
-        for c in chunks:
-            prompts.append(make_prompt(c))
-            chunk_index_map.append(i)
-
-    # Cached inference for each chunk
-    results = [{"generated_text": _cached_extract_single(p)} for p in prompts]
+    store = get_extraction_store()
+    review_keys = _review_keys(reviews)
+    known = _known_reviews(review_keys, store.get_many(review_keys.values()))
+    chunks, chunk_index_map = _prepare_chunks(reviews, known)
+    prefiltered: Set[str] = set()
+    results = _cached_extract_batch(chunks, prefiltered)
+    reviews, index_entries = _attach_dishes(
+        reviews, chunks, chunk_index_map, results, known, verbose, prefiltered, review_keys
+    )
+    store.put_many(index_entries, MODEL_NAME)
+    return reviews
 
-    # Merge dish names by review
-    dishes_by_review: dict[int, set[str]] = {}
-    for idx, res in zip(chunk_index_map, results):
-        output = res.get("generated_text", "").strip()
-        if not output or output.lower() == "none":
-            continue
-        dishes = {
-            d.strip().lower()
-            for d in output.split(",")
-            if d.strip() and d.lower() != "none"
-        }
-        dishes_by_review.setdefault(idx, set()).update(dishes)
-
-    # Attach merged, normalized dish lists
-    for i, review in enumerate(reviews):
-        dishes = dishes_by_review.get(i, set())
-        review["dishes"] = [_make_dish(name) for name in dishes]
 
-        if verbose:
-            logger.info(f"📝 {review.get('text', '')[:500]}")
-            logger.info(f"🍽️ {', '.join(dishes) or 'none'}\n")
+async def extract_dishes_async(
+    reviews: List[Dict[str, Any]], verbose: bool = False, strict: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Async variant of `extract_dishes` for the FastAPI routes. Inference runs
+    in the batcher's worker process, batched together with prompts from
+    other concurrent requests, so the event loop never blocks on the model.
+    A failed batch always raises, so `strict` only matches the registry
+    signature.
+    """
+    if not reviews:
+        logger.warning("No reviews passed to extractor.")
+        return []
 
+    store = get_extraction_store()
+    review_keys = _review_keys(reviews)
+    known = _known_reviews(review_keys, await store.aget_many(review_keys.values()))
+    chunks, chunk_index_map = _prepare_chunks(reviews, known)
+    prefiltered: Set[str] = set()
+    results = await _cached_extract_batch_async(chunks, prefiltered)
+    reviews, index_entries = _attach_dishes(
+        reviews, chunks, chunk_index_map, results, known, verbose, prefiltered, review_keys
+    )
+    await store.aput_many(index_entries, MODEL_NAME)
     return reviews
 
 
 
 # ---- 5. Helper ----
-def _make_dish(name: str) -> Dict[str, Any]:
-    """Returns a new DISH dict with the given name."""
-    dish = DISH.copy()
-    dish["name"] = name
-    return dish
\ No newline at end of file
+def _make_dish(name: str) -> DishRecord:
+    """Returns a new dish record with the given name."""
+    return DishRecord(name)
\ No newline at end of file
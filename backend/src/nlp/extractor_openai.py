@@ -3,62 +3,77 @@ extractor_openai.py
 -------------------
 Extracts dish names mentioned in restaurant reviews using an OpenAI LLM
 (e.g., GPT-5-Nano). Wraps model loading, prompting, inference, and
-post-processing into a simple API, including in-memory caching and
-controlled parallel requests for speed and safety.
+post-processing into a simple API, including a persistent extraction cache
+(see extraction_store.py) and controlled parallel requests for speed and safety.
 
-Public function:
-    - extract_dishes_openai_async(reviews)
+Public functions:
+    - extract_dishes_openai(reviews)
+    - iter_extract_dishes_openai(reviews)  (yields reviews as they finish)
+    - warm_up()
 """
 
 import os
-import re
+import json
 import time
 import logging
 import asyncio
-from typing import Any, Dict, List
-from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 from dotenv import load_dotenv
-from openai import OpenAI
-from src.normalisation.schemas import DISH
+from src.normalisation.schemas import DishRecord
+from src.metrics import LLM_CALLS, LLM_INFLIGHT, LLM_QUEUE_SECONDS, LLM_TOKENS, span
+from src.nlp.chunking import approx_tokens, get_token_counter, iter_chunks, normalise_dish_names, parse_dish_list
+from src.nlp.extraction_store import get_extraction_store, make_extraction_key, make_review_key
+from src.nlp.openai_backend import OpenAIBackend
+from src.nlp.scheduler import get_scheduler
+from src.nlp.prefilter import get_prefilter, learn_dishes, prefilter_chunks
 
 # ----------------------------------------------------------------------
 # Setup
 # ----------------------------------------------------------------------
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
 MODEL_NAME = "gpt-5-nano"
-MAX_WORKERS = 10  # concurrent requests allowed
+PROMPT_VERSION = "v1"  # bump whenever make_prompt changes, invalidates cached single-chunk answers
+BATCH_PROMPT_VERSION = "b1"  # bump whenever make_batch_prompt / batch_output_format change, same for batched answers
+# reviews and results mix both kinds of answers, so their keys depend on both prompts
+ANSWERS_VERSION = f"{PROMPT_VERSION}+{BATCH_PROMPT_VERSION}"
+OUTPUT_TOKEN_ALLOWANCE = 100  # expected answer tokens per call, charged to the rate limiter
+BATCH_MODE = os.getenv("EXTRACTION_BATCH_MODE", "1") != "0"  # pack many chunks into one call
+BATCH_TOKEN_BUDGET = 2000  # approx. input tokens of review text per batched call
+BATCH_MAX_CHUNKS = 25
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
-# Semaphore to limit concurrent async calls
-_sem = asyncio.Semaphore(MAX_WORKERS)
+# Completion backend (AsyncOpenAI by default, swappable for fixtures / fakes)
+_backend: Optional[Any] = None
+
+
+def get_backend() -> Any:
+    """Returns the shared completion backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        _backend = OpenAIBackend(MODEL_NAME)
+    return _backend
+
+
+def set_backend(backend: Any) -> None:
+    """Swaps the completion backend; anything with `async complete(prompt, text_format=None) -> str`."""
+    global _backend
+    _backend = backend
+
+
+async def warm_up() -> None:
+    """Builds the backend client, scheduler and prefilter ahead of the first request."""
+    backend = get_backend()
+    if isinstance(backend, OpenAIBackend):
+        await asyncio.to_thread(lambda: backend.client)  # imports the OpenAI SDK off the event loop
+    get_scheduler()
+    await asyncio.to_thread(get_prefilter)  # also opens the extraction store
+
 
 # ----------------------------------------------------------------------
 # Helpers
 # ----------------------------------------------------------------------
-def chunk_text(text: str, max_words: int = 500) -> list[str]:
-    """Splits long review text into smaller chunks (~max_words each)."""
-    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-    chunks, current_chunk = [], []
-    word_count = 0
-
-    for sentence in sentences:
-        words = sentence.split()
-        if word_count + len(words) > max_words:
-            chunks.append(" ".join(current_chunk))
-            current_chunk = []
-            word_count = 0
-        current_chunk.extend(words)
-        word_count += len(words)
-
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
-    return chunks
-
-
 def make_prompt(review: str) -> str:
     """Builds the LLM extraction prompt."""
     return (
@@ -69,46 +84,345 @@ def make_prompt(review: str) -> str:
     )
 
 
-@lru_cache(maxsize=512)
-def _cached_extract_single(prompt: str) -> str:
+def make_batch_prompt(items: List[Tuple[str, str]]) -> str:
+    """Builds one prompt asking for dishes of several chunks as a JSON object."""
+    texts = "\n\n".join(f"[{chunk_id}]\n{text}" for chunk_id, text in items)
+    return (
+        "For each text below, extract only names of dishes mentioned exactly as written.\n"
+        "Do not invent or infer dishes. Use an empty list if a text mentions none.\n"
+        "Reply with a JSON object mapping every text ID to a list of dish names.\n\n"
+        f"{texts}"
+    )
+
+
+def batch_output_format(chunk_ids: List[str]) -> Dict[str, Any]:
+    """Strict JSON schema for the batched answer: one string list per chunk ID."""
+    return {
+        "type": "json_schema",
+        "name": "dishes_by_text",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                chunk_id: {"type": "array", "items": {"type": "string"}}
+                for chunk_id in chunk_ids
+            },
+            "required": list(chunk_ids),
+            "additionalProperties": False,
+        },
+    }
+
+
+def parse_batch_output(output: str, chunk_ids: List[str]) -> Dict[str, List[str]]:
     """
-    Calls the OpenAI API once for a given prompt (cached by prompt text).
-    This remains synchronous but is called from async context safely.
+    Strictly parses a batched answer. Raises ValueError unless the output is a
+    JSON object with exactly the expected IDs, each mapped to a list of strings.
     """
-    start = time.perf_counter()
-    response = client.responses.create(model=MODEL_NAME, input=prompt, store=True)
-    text = response.output_text.strip()
-    duration = time.perf_counter() - start
-    logger.debug(f"🧠 Cached call took {duration:.2f}s | Output: {text[:80]}")
-    return text
+    try:
+        data = json.loads(output)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"batch output is not JSON: {e}") from e
 
+    if not isinstance(data, dict) or set(data) != set(chunk_ids):
+        raise ValueError("batch output does not map exactly the requested chunk IDs")
 
-def _make_dish(name: str) -> Dict[str, Any]:
-    """Returns a DISH dict with the given name."""
-    dish = DISH.copy()
-    dish["name"] = name
-    return dish
+    parsed: Dict[str, List[str]] = {}
+    for chunk_id in chunk_ids:
+        names = data[chunk_id]
+        if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+            raise ValueError(f"batch output for {chunk_id} is not a list of strings")
+        parsed[chunk_id] = normalise_dish_names(names)
+    return parsed
+
+
+def pack_batches(chunks: List[str], token_budget: int = BATCH_TOKEN_BUDGET, max_chunks: int = BATCH_MAX_CHUNKS) -> List[List[str]]:
+    """
+    Greedily packs chunks into batches under a token budget. A chunk larger
+    than the budget on its own still gets a batch of one.
+    """
+    batches: List[List[str]] = []
+    current: List[str] = []
+    used = 0
+    for chunk in chunks:
+        cost = approx_tokens(chunk)
+        if current and (used + cost > token_budget or len(current) >= max_chunks):
+            batches.append(current)
+            current, used = [], 0
+        current.append(chunk)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _make_dish(name: str) -> DishRecord:
+    """Returns a new dish record with the given name."""
+    return DishRecord(name)
 
 
 # ----------------------------------------------------------------------
-# Async single-call wrapper
+# Async call wrappers
 # ----------------------------------------------------------------------
-async def _extract_single_async(prompt: str) -> str:
+async def _extract_single_async(prompt: str, group: Any = None, **kwargs: Any) -> str:
+    """
+    Sends one prompt through the async backend on the event loop, once the
+    shared scheduler grants a fair, rate-limited slot for this group.
+
+    Each attempt takes its own slot (and rate-limit tokens); backoff sleeps
+    between retries happen with the slot released. Backends without
+    `complete_once` / `retry_delay` get a single `complete` call.
+    """
+    backend = get_backend()
+    call = getattr(backend, "complete_once", None) or backend.complete
+    retry_delay = getattr(backend, "retry_delay", None)
+    tokens = approx_tokens(prompt) + OUTPUT_TOKEN_ALLOWANCE
+    attempt = 0
+    while True:
+        queued_at = time.perf_counter()
+        async with get_scheduler().slot(group, tokens):
+            LLM_QUEUE_SECONDS.observe(time.perf_counter() - queued_at)
+            LLM_TOKENS.observe(tokens)
+            LLM_INFLIGHT.inc()
+            try:
+                with span("llm_call"):
+                    output = await call(prompt, **kwargs)
+            except Exception as e:
+                delay = retry_delay(e, attempt) if retry_delay is not None else None
+                if delay is None:
+                    LLM_CALLS.inc(outcome="error")
+                    raise
+                LLM_CALLS.inc(outcome="retry")
+            else:
+                LLM_CALLS.inc(outcome="ok")
+                return output
+            finally:
+                LLM_INFLIGHT.dec()
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+async def _remember(answers: Dict[str, List[str]], prompt_version: str) -> None:
+    """
+    Stores model answers (chunk -> dishes) under the version of the prompt
+    that produced them, and feeds their dishes to the prefilter lexicon.
+    """
+    await get_extraction_store().aput_many(
+        ((make_extraction_key(MODEL_NAME, prompt_version, chunk), dishes) for chunk, dishes in answers.items()),
+        MODEL_NAME,
+    )
+    for chunk, dishes in answers.items():
+        learn_dishes(dishes, chunk)
+
+
+async def _extract_chunk_async(chunk: str, group: Any = None) -> List[str]:
+    """Calls the model for one chunk and stores the parsed dishes."""
+    with span("prompt_build"):
+        prompt = make_prompt(chunk)
+    dishes = parse_dish_list(await _extract_single_async(prompt, group))
+    await _remember({chunk: dishes}, PROMPT_VERSION)
+    return dishes
+
+
+async def _extract_batch_async(batch: List[str], group: Any = None) -> Dict[str, Any]:
     """
-    Async wrapper that runs the cached synchronous extractor in a thread,
-    using a semaphore to cap concurrency.
+    Extracts dishes for several chunks in one structured call. If the answer
+    is malformed, falls back to one call per chunk.
+
+    Returns a mapping chunk -> dish list (or the exception for that chunk).
     """
-    loop = asyncio.get_running_loop()
-    async with _sem:
-        return await loop.run_in_executor(None, _cached_extract_single, prompt)
+    chunk_ids = [f"c{i}" for i in range(len(batch))]
+    with span("prompt_build"):
+        prompt = make_batch_prompt(list(zip(chunk_ids, batch)))
+        text_format = batch_output_format(chunk_ids)
+    try:
+        output = await _extract_single_async(prompt, group, text_format=text_format)
+        parsed = parse_batch_output(output, chunk_ids)
+    except ValueError as e:
+        logger.warning(f"⚠️ Malformed batch output for {len(batch)} chunks ({e}), falling back to per-chunk calls")
+        outputs = await asyncio.gather(*(_extract_chunk_async(c, group) for c in batch), return_exceptions=True)
+        return dict(zip(batch, outputs))
+
+    answers = {chunk: parsed[chunk_id] for chunk_id, chunk in zip(chunk_ids, batch)}
+    await _remember(answers, BATCH_PROMPT_VERSION)
+    return answers
+
+
+async def _safe_batch(batch: List[str], group: Any) -> Dict[str, Any]:
+    """Runs one batch, mapping every chunk to the exception if the call fails."""
+    try:
+        return await _extract_batch_async(batch, group)
+    except Exception as e:
+        return {chunk: e for chunk in batch}
+
+
+async def _safe_chunk(chunk: str, group: Any) -> Dict[str, Any]:
+    """Runs one per-chunk call, returning {chunk: dishes or exception}."""
+    try:
+        return {chunk: await _extract_chunk_async(chunk, group)}
+    except Exception as e:
+        return {chunk: e}
+
+
+async def _iter_chunk_results(
+    chunks: List[str], group: Any = None, prefiltered: Optional[Set[str]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Resolves unique chunks to dish lists: extraction store first, then the
+    rule-based prefilter, then the model for what is left, batched or one
+    call per chunk depending on BATCH_MODE. Chunks answered by the
+    prefilter are added to `prefiltered`, if given.
+
+    Yields partial {chunk: dishes or exception} mappings as soon as each
+    cache lookup pass / model call finishes. All calls share one scheduler
+    group; calls still running are cancelled if the consumer stops early.
+    """
+    # an answer from either prompt is valid, each under its own prompt version
+    keys = {
+        chunk: (make_extraction_key(MODEL_NAME, PROMPT_VERSION, chunk),
+                make_extraction_key(MODEL_NAME, BATCH_PROMPT_VERSION, chunk))
+        for chunk in dict.fromkeys(chunks)
+    }
+    hits: Dict[str, Any] = {}
+    misses: List[str] = []
+    with span("cache_lookup"):
+        found = await get_extraction_store().aget_many(key for pair in keys.values() for key in pair)
+    for chunk, (single_key, batch_key) in keys.items():
+        dishes = found.get(single_key, found.get(batch_key))
+        if dishes is None:
+            misses.append(chunk)
+        else:
+            hits[chunk] = dishes
+
+    with span("prefilter"):
+        resolved, misses = prefilter_chunks(misses)
+    hits.update(resolved)
+    if prefiltered is not None:
+        prefiltered.update(resolved)
+
+    if hits:
+        yield hits
+    if not misses:
+        return
+
+    if BATCH_MODE:
+        batches = pack_batches(misses)
+        logger.info(f"📦 {len(misses)} uncached chunks packed into {len(batches)} batched calls")
+        tasks = [asyncio.create_task(_safe_batch(b, group)) for b in batches]
+    else:
+        tasks = [asyncio.create_task(_safe_chunk(c, group)) for c in misses]
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
 
 
 # ----------------------------------------------------------------------
 # Main async pipeline
 # ----------------------------------------------------------------------
+async def iter_extract_dishes_openai(
+    reviews: List[Dict[str, Any]],
+    verbose: bool = False,
+    strict: bool = False,
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Streaming variant of `extract_dishes_openai`.
+
+    Yields (index, review) as soon as all chunks of a review are resolved,
+    with the review's 'dishes' key already attached. Reviews without text
+    or already in the per-review dish index (by content 'id') are yielded
+    first; only the rest reach the chunk cache / model. Reviews with a
+    chunk answered by the prefilter are not added to the index. A failed
+    chunk leaves its review without those dishes, or raises with `strict`.
+    """
+    store = get_extraction_store()
+    dishes_by_review: dict[int, set[str]] = {}
+    failed: set[int] = set()
+    provisional: set[int] = set()
+    prefiltered: Set[str] = set()
+
+    # Reviews already in the per-review index skip chunking entirely
+    indexed = set()
+    review_keys = {i: make_review_key(MODEL_NAME, ANSWERS_VERSION, r["id"]) for i, r in enumerate(reviews) if r.get("id")}
+    with span("cache_lookup"):
+        known = await store.aget_many(review_keys.values())
+    for i, key in review_keys.items():
+        if key in known:
+            dishes_by_review[i] = set(known[key])
+            indexed.add(i)
+
+    # Prepare chunks and index mapping
+    chunks = []
+    review_index_map = []
+    for i, r in enumerate(reviews):
+        if i in indexed:
+            continue
+        for c in iter_chunks(r.get("text") or "", count_tokens=get_token_counter(MODEL_NAME)):
+            chunks.append(c)
+            review_index_map.append(i)
+
+    occurrences: Dict[str, List[int]] = {}
+    remaining: Dict[int, int] = {}
+    for idx, chunk in zip(review_index_map, chunks):
+        occurrences.setdefault(chunk, []).append(idx)
+        remaining[idx] = remaining.get(idx, 0) + 1
+
+    index_writes: List[Tuple[str, List[str]]] = []
+
+    def finish(i: int) -> Tuple[int, Dict[str, Any]]:
+        review = reviews[i]
+        dishes = dishes_by_review.get(i, set())
+        if i in review_keys and i not in indexed and i not in failed and i not in provisional:
+            index_writes.append((review_keys[i], sorted(dishes)))
+        review["dishes"] = [_make_dish(name) for name in dishes]
+        if verbose:
+            logger.info(f"🍽️ Extracted from Review #{i+1}: {', '.join(dishes) or 'none'}")
+        return i, review
+
+    async def flush_index() -> None:
+        """Writes finished reviews to the per-review index before they are handed out."""
+        if index_writes:
+            entries = index_writes[:]
+            index_writes.clear()
+            await store.aput_many(entries, MODEL_NAME)
+
+    ready = [finish(i) for i in range(len(reviews)) if i not in remaining]
+    await flush_index()
+    for item in ready:
+        yield item
+
+    if indexed:
+        logger.info(f"♻️ {len(indexed)}/{len(reviews)} reviews already extracted, skipping them")
+    logger.info(f"🚀 Starting async extraction for {len(chunks)} chunks...")
+
+    # --- Resolve chunks via cache / OpenAI, merging by review index ---
+    async for partial in _iter_chunk_results(chunks, get_scheduler().new_group(), prefiltered):
+        ready = []
+        for chunk, result in partial.items():
+            for idx in occurrences[chunk]:
+                if chunk in prefiltered:
+                    provisional.add(idx)
+                if isinstance(result, Exception):
+                    if strict:
+                        raise result
+                    logger.error(f"❌ Extraction failed for review {idx}: {result}")
+                    failed.add(idx)
+                elif result:
+                    dishes_by_review.setdefault(idx, set()).update(result)
+                remaining[idx] -= 1
+                if remaining[idx] == 0:
+                    ready.append(finish(idx))
+        await flush_index()
+        for item in ready:
+            yield item
+
+
 async def extract_dishes_openai(
     reviews: List[Dict[str, Any]],
     verbose: bool = False,
+    strict: bool = False,
 ) -> List[Dict[str, Any]]:
     """
     Extracts dish names from review texts using OpenAI model asynchronously.
@@ -116,6 +430,7 @@ async def extract_dishes_openai(
     Args:
         reviews: List of review dicts, each containing a 'text' field.
         verbose: If True, logs each review and extracted dishes.
+        strict: If True, the first failed chunk raises its exception.
 
     Returns:
         List of reviews with an added 'dishes' key containing normalized dish dicts.
@@ -126,48 +441,8 @@ async def extract_dishes_openai(
 
     start_total = time.perf_counter()
 
-    # Prepare prompts and index mapping
-    prompts = []
-    review_index_map = []
-    for i, r in enumerate(reviews):
-        chunks = chunk_text(r.get("text", ""))
-        for c in chunks:
-            prompts.append(make_prompt(c))
-            review_index_map.append(i)
-
-    logger.info(f"🚀 Starting async extraction for {len(prompts)} chunks...")
-
-    # --- Run all OpenAI calls concurrently ---
-    tasks = [asyncio.create_task(_extract_single_async(p)) for p in prompts]
-    outputs = await asyncio.gather(*tasks, return_exceptions=True)
-
-    # --- Merge results correctly by review index ---
-    dishes_by_review: dict[int, set[str]] = {}
-    for idx, result in zip(review_index_map, outputs):
-        if isinstance(result, Exception):
-            logger.error(f"❌ Extraction failed for review {idx}: {result}")
-            continue
-        if not isinstance(result, str):
-            logger.warning(f"⚠️ Unexpected non-string result for review {idx}: {type(result)}")
-            continue
-
-        output = result.strip()
-        if not output or output.lower() == "none":
-            continue
-
-        dishes = {
-            d.strip().lower()
-            for d in output.split(",")
-            if d.strip() and d.lower() != "none"
-        }
-        dishes_by_review.setdefault(idx, set()).update(dishes)
-
-    # --- Attach results back to reviews ---
-    for i, review in enumerate(reviews):
-        dishes = dishes_by_review.get(i, set())
-        review["dishes"] = [_make_dish(name) for name in dishes]
-        if verbose:
-            logger.info(f"🍽️ Extracted from Review #{i+1}: {', '.join(dishes) or 'none'}")
+    async for _ in iter_extract_dishes_openai(reviews, verbose, strict):
+        pass
 
     duration = time.perf_counter() - start_total
     logger.info(f"✅ Completed dish extraction for {len(reviews)} reviews in {duration:.2f}s")
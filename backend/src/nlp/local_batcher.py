@@ -0,0 +1,194 @@
+"""
+local_batcher.py
+----------------
+Cross-request micro-batching for the local extractor.
+
+A single `/recommendations` call only has a handful of review chunks, so
+batching inside one request leaves the CPU model underused. The batcher
+collects prompts from every concurrent request for a short window (or
+until a batch is full), runs one batched generation in a dedicated worker
+process, and resolves each caller's future with its own output.
+
+The model lives only in the worker process, so inference never blocks the
+FastAPI event loop and the web process does not import torch at all.
+
+Config (environment):
+    LOCAL_BATCH_WINDOW_MS     how long to wait for more prompts
+    LOCAL_BATCH_MAX_PROMPTS   flush immediately at this many prompts
+
+Public:
+    - MicroBatcher
+    - get_batcher()
+"""
+
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+LOCAL_BATCH_WINDOW_MS = float(os.getenv("LOCAL_BATCH_WINDOW_MS", "15"))
+LOCAL_BATCH_MAX_PROMPTS = int(os.getenv("LOCAL_BATCH_MAX_PROMPTS", "32"))
+
+
+# ----------------------------------------------------------------------
+# Worker process side
+# ----------------------------------------------------------------------
+_worker_engine = None
+
+
+def _worker_init() -> None:
+    """Loads the model once when the inference process starts."""
+    global _worker_engine
+    from src.nlp.local_engine import LocalEngine
+
+    _worker_engine = LocalEngine().load()
+
+
+def _worker_generate(prompts: List[str]) -> List[str]:
+    return _worker_engine.generate(prompts)
+
+
+def _make_executor() -> Executor:
+    """One spawned process: fork is unsafe once torch threads exist."""
+    return ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_worker_init,
+    )
+
+
+# ----------------------------------------------------------------------
+# Event loop side
+# ----------------------------------------------------------------------
+class MicroBatcher:
+    """
+    Gathers prompts across callers and runs them as shared batches.
+
+    While one batch is generating, new prompts keep queueing; they go out
+    together as soon as the worker is free.
+    """
+
+    def __init__(
+        self,
+        window_ms: float = LOCAL_BATCH_WINDOW_MS,
+        max_prompts: int = LOCAL_BATCH_MAX_PROMPTS,
+        executor: Optional[Executor] = None,
+        generate_fn=_worker_generate,
+    ):
+        self.window = window_ms / 1000.0
+        self.max_prompts = max_prompts
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._generate_fn = generate_fn
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._has_work: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.prompts = 0
+
+    def _ensure_runner(self) -> None:
+        if self._runner is None or self._runner.done():
+            if self._executor is None:
+                self._executor = _make_executor()
+            self._has_work = asyncio.Event()
+            self._full = asyncio.Event()
+            self._runner = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, prompt: str) -> str:
+        """Queues one prompt and waits for its generated text."""
+        self._ensure_runner()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((prompt, future))
+        self._has_work.set()
+        if len(self._pending) >= self.max_prompts:
+            self._full.set()
+        return await future
+
+    async def generate(self, prompts: List[str]) -> List[str]:
+        """Queues several prompts; they may share batches with other callers."""
+        return list(await asyncio.gather(*(self.submit(p) for p in prompts)))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._has_work.wait()
+
+            # collect for up to `window` seconds unless the batch fills up first
+            if len(self._pending) < self.max_prompts:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.window)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = [item for item in self._pending[:self.max_prompts] if not item[1].done()]
+            del self._pending[:self.max_prompts]
+            if not self._pending:
+                self._has_work.clear()
+            if not batch:
+                continue
+
+            prompts = [prompt for prompt, _ in batch]
+            try:
+                outputs = await loop.run_in_executor(self._executor, self._generate_fn, prompts)
+            except BrokenProcessPool as e:
+                # the worker died (OOM kill, segfault): fail this batch, start a fresh process for the next
+                logger.error(f"❌ Local inference process died during a batch of {len(prompts)} prompts: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                if self._owns_executor:
+                    self._executor.shutdown(wait=False, cancel_futures=True)
+                    self._executor = _make_executor()
+                continue
+            except Exception as e:
+                logger.error(f"❌ Local batch of {len(prompts)} prompts failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.prompts += len(prompts)
+            logger.debug(f"🧠 Micro-batch #{self.batches}: {len(prompts)} prompts")
+            for (_, future), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "prompts": self.prompts,
+            "avg_batch_size": self.prompts / self.batches if self.batches else 0.0,
+            "queued": len(self._pending),
+        }
+
+    def close(self) -> None:
+        """Stops the collector and shuts the inference process down."""
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._owns_executor = True
+
+
+# ---- Lazy singleton ----
+_batcher: Optional[MicroBatcher] = None
+
+
+def get_batcher() -> MicroBatcher:
+    """Returns the process-wide batcher; the worker process starts on first use."""
+    global _batcher
+    if _batcher is None:
+        _batcher = MicroBatcher()
+    return _batcher
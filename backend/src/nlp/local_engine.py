@@ -0,0 +1,239 @@
+"""
+local_engine.py
+---------------
+CPU inference engine for the local Flan-T5 dish extractor.
+
+Replaces the one-prompt-at-a-time HF pipeline with real batched generation:
+prompts are tokenised once, sorted by length and cut into buckets of
+similar length, so padding stays small and every forward pass runs a full
+batch. Three backends are supported:
+
+    torch   plain PyTorch fp32 (default)
+    int8    PyTorch with dynamic int8 quantisation of all Linear layers
+    onnx    ONNX Runtime via `optimum` (pip install optimum[onnxruntime])
+
+Thread counts are derived from the cores this process may actually use
+(CPU affinity, capped by a cgroup CPU quota such as a container's
+`--cpus`) instead of a hard-coded value.
+
+The ONNX backend exports the model once into LOCAL_ONNX_CACHE and later
+processes (every micro-batcher worker, every restart) load the export from
+there instead of converting the model again.
+
+Config (environment):
+    LOCAL_MODEL_NAME          HF model id (default google/flan-t5-large)
+    LOCAL_EXTRACTOR_BACKEND   torch | int8 | onnx
+    LOCAL_NUM_THREADS         override the detected core count
+    LOCAL_BATCH_SIZE          prompts per forward pass
+    LOCAL_ONNX_CACHE          directory for ONNX exports (default .cache/onnx)
+
+Public:
+    - LocalEngine
+    - available_cores(), cgroup_cpu_limit()
+    - onnx_export_dir(model_name)
+    - get_engine()
+"""
+
+import os
+import time
+import shutil
+import logging
+import tempfile
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+LOCAL_MODEL_NAME = os.getenv("LOCAL_MODEL_NAME", "google/flan-t5-large")
+LOCAL_EXTRACTOR_BACKEND = os.getenv("LOCAL_EXTRACTOR_BACKEND", "torch").lower()
+LOCAL_NUM_THREADS = int(os.getenv("LOCAL_NUM_THREADS", "0"))  # 0 = detect
+LOCAL_BATCH_SIZE = int(os.getenv("LOCAL_BATCH_SIZE", "16"))
+LOCAL_ONNX_CACHE = os.getenv("LOCAL_ONNX_CACHE", ".cache/onnx")
+MAX_INPUT_TOKENS = 512  # Flan-T5 context size
+MAX_NEW_TOKENS = 100
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+CGROUP_V2_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_V1_CPU_DIR = "/sys/fs/cgroup/cpu"
+
+
+def cgroup_cpu_limit(v2_path: str = CGROUP_V2_CPU_MAX, v1_dir: str = CGROUP_V1_CPU_DIR) -> Optional[int]:
+    """
+    Whole CPUs granted by a cgroup CFS quota (cgroup v2 `cpu.max`, or v1
+    `cpu.cfs_quota_us` / `cpu.cfs_period_us`), or None without a quota.
+    Affinity does not see quotas: a container limited to 2 CPUs on a
+    32-core host still reports 32 usable cores.
+    """
+    try:
+        with open(v2_path) as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        try:
+            with open(os.path.join(v1_dir, "cpu.cfs_quota_us")) as f:
+                quota = f.read().strip()
+            with open(os.path.join(v1_dir, "cpu.cfs_period_us")) as f:
+                period = f.read().strip()
+        except OSError:
+            return None
+    if quota in ("max", "-1"):
+        return None
+    try:
+        return max(1, int(quota) // int(period))
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def available_cores() -> int:
+    """Number of CPUs this process may use: its CPU affinity, capped by a cgroup CPU quota."""
+    if hasattr(os, "process_cpu_count"):  # Python 3.13+
+        cores = os.process_cpu_count() or 1
+    elif hasattr(os, "sched_getaffinity"):  # not available on macOS / Windows
+        cores = len(os.sched_getaffinity(0))
+    else:
+        cores = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    return max(1, min(cores, limit) if limit else cores)
+
+
+def onnx_export_dir(model_name: str, cache_dir: str = LOCAL_ONNX_CACHE) -> str:
+    """Directory holding the ONNX export of a model ("google/flan-t5-large" -> <cache>/google--flan-t5-large)."""
+    return os.path.join(cache_dir, model_name.replace("/", "--"))
+
+
+class LocalEngine:
+    """
+    Lazily loaded seq2seq model with length-bucketed batch generation.
+
+    `generate(prompts)` returns one decoded string per prompt, in input order.
+    """
+
+    def __init__(
+        self,
+        model_name: str = LOCAL_MODEL_NAME,
+        backend: str = LOCAL_EXTRACTOR_BACKEND,
+        batch_size: int = LOCAL_BATCH_SIZE,
+        num_threads: int = LOCAL_NUM_THREADS,
+        max_new_tokens: int = MAX_NEW_TOKENS,
+        onnx_cache: str = LOCAL_ONNX_CACHE,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown local backend '{backend}', expected one of {BACKENDS}")
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.num_threads = num_threads or available_cores()
+        self.max_new_tokens = max_new_tokens
+        self.onnx_cache = onnx_cache
+        self._tokenizer: Any = None
+        self._model: Any = None
+
+    # ---- loading ----
+    def load(self) -> "LocalEngine":
+        """Loads tokenizer and model once; safe to call repeatedly."""
+        if self._model is not None:
+            return self
+
+        import torch
+        from transformers import AutoTokenizer
+
+        torch.set_num_threads(self.num_threads)
+        start = time.perf_counter()
+        logger.info(f"Loading model: {self.model_name} ({self.backend}, {self.num_threads} threads) ...")
+
+        self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+
+        if self.backend == "onnx":
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = self.num_threads
+            options.inter_op_num_threads = 1
+            self._model = ORTModelForSeq2SeqLM.from_pretrained(
+                self._onnx_export(ORTModelForSeq2SeqLM), session_options=options
+            )
+        else:
+            from transformers import AutoModelForSeq2SeqLM
+
+            model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name).eval()
+            if self.backend == "int8":
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            self._model = model
+
+        logger.info(f"Model loaded successfully in {time.perf_counter() - start:.2f}s.")
+        return self
+
+    def _onnx_export(self, model_cls: Any) -> str:
+        """
+        Returns the cached ONNX export of the model, exporting it first if
+        needed. The export is written to a temporary directory and renamed
+        into place, so concurrent workers never load a half-written one.
+        """
+        target = onnx_export_dir(self.model_name, self.onnx_cache)
+        if os.path.exists(os.path.join(target, "config.json")):
+            return target
+
+        logger.info(f"Exporting {self.model_name} to ONNX in {target} (one-time) ...")
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".export-", dir=os.path.dirname(target) or ".")
+        try:
+            model_cls.from_pretrained(self.model_name, export=True).save_pretrained(tmp)
+            try:
+                os.rename(tmp, target)
+            except OSError:
+                if not os.path.exists(os.path.join(target, "config.json")):
+                    raise
+                # another worker finished its export first; use that one
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return target
+
+    # ---- inference ----
+    def _buckets(self, lengths: List[int]) -> List[List[int]]:
+        """Groups prompt indices into batches of similar token length."""
+        order = sorted(range(len(lengths)), key=lengths.__getitem__)
+        return [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+
+    def generate(self, prompts: List[str]) -> List[str]:
+        """Runs greedy generation for all prompts in length-bucketed batches."""
+        if not prompts:
+            return []
+        self.load()
+
+        import torch
+
+        encoded = self._tokenizer(prompts, truncation=True, max_length=MAX_INPUT_TOKENS)
+        input_ids = encoded["input_ids"]
+        outputs: List[Optional[str]] = [None] * len(prompts)
+
+        start = time.perf_counter()
+        buckets = self._buckets([len(ids) for ids in input_ids])
+        for bucket in buckets:
+            batch = self._tokenizer.pad({"input_ids": [input_ids[i] for i in bucket]}, return_tensors="pt")
+            with torch.inference_mode():
+                generated = self._model.generate(
+                    **batch, max_new_tokens=self.max_new_tokens, do_sample=False
+                )
+            texts = self._tokenizer.batch_decode(generated, skip_special_tokens=True)
+            for i, text in zip(bucket, texts):
+                outputs[i] = text.strip()
+
+        logger.info(
+            f"🧠 Generated {len(prompts)} prompts in {len(buckets)} batches "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return outputs
+
+
+# ---- Lazy singleton ----
+_engine: Optional[LocalEngine] = None
+
+
+def get_engine() -> LocalEngine:
+    """Returns the process-wide engine (model weights load on first generate)."""
+    global _engine
+    if _engine is None:
+        _engine = LocalEngine()
+    return _engine
@@ -0,0 +1,144 @@
+"""
+openai_backend.py
+-----------------
+Native async completion backend for the dish extractor, built on
+`AsyncOpenAI` with a shared pooled httpx client (keep-alive), a per-request
+timeout and retries with jittered exponential backoff on 429 / 5xx /
+transport errors.
+
+Config (environment):
+    OPENAI_API_KEY
+    OPENAI_TIMEOUT            per-request timeout in seconds
+    OPENAI_MAX_RETRIES        retries after the first attempt
+    OPENAI_MAX_CONNECTIONS    size of the HTTP connection pool
+
+Backends may also expose `complete_once` and `retry_delay`; the extractor
+then runs each attempt in its own scheduler slot and sleeps between them
+without holding one.
+
+Public:
+    - OpenAIBackend
+"""
+
+import os
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import httpx
+
+from src.retry import backoff_delay, retry_after
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "64"))
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """429s, 5xx responses, timeouts and connection errors are worth retrying."""
+    import openai
+
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code >= 500
+    return False
+
+
+class OpenAIBackend:
+    """
+    Sends prompts to the OpenAI Responses API and returns the output text.
+
+    The underlying client (and the `openai` SDK itself, ~1s of imports) is
+    loaded lazily on first use, so importing this module costs nothing and
+    never needs an API key.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        api_key: Optional[str] = None,
+        timeout: float = OPENAI_TIMEOUT,
+        max_retries: int = OPENAI_MAX_RETRIES,
+        max_connections: int = OPENAI_MAX_CONNECTIONS,
+    ):
+        self.model_name = model_name
+        self._api_key = api_key
+        self._timeout = timeout
+        self._max_retries = max_retries
+        self._max_connections = max_connections
+        self._client: Optional["AsyncOpenAI"] = None
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self._max_connections,
+                    max_keepalive_connections=self._max_connections,
+                    keepalive_expiry=30.0,
+                ),
+                timeout=httpx.Timeout(self._timeout, connect=5.0),
+            )
+            self._client = AsyncOpenAI(
+                api_key=self._api_key or os.getenv("OPENAI_API_KEY"),
+                http_client=http_client,
+                timeout=self._timeout,
+                max_retries=0,  # retries are handled here, with jitter
+            )
+        return self._client
+
+    async def complete_once(self, prompt: str, text_format: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Runs one prompt with a single attempt. Callers that hold a scheduler
+        slot use this together with `retry_delay`, so the slot is released
+        while backing off and every attempt is charged to the rate limit.
+        """
+        extra: Dict[str, Any] = {"text": {"format": text_format}} if text_format else {}
+        start = time.perf_counter()
+        response = await self.client.responses.create(model=self.model_name, input=prompt, store=True, **extra)
+        text = response.output_text.strip()
+        logger.debug(f"🧠 Model call took {time.perf_counter() - start:.2f}s | Output: {text[:80]}")
+        return text
+
+    def retry_delay(self, exc: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retry number `attempt + 1`, or None to give up."""
+        if attempt >= self._max_retries or not _is_retryable(exc):
+            return None
+        delay = retry_after(exc) or backoff_delay(attempt)
+        logger.warning(
+            f"🔁 OpenAI call failed ({type(exc).__name__}), retry {attempt + 1}/{self._max_retries} in {delay:.2f}s"
+        )
+        return delay
+
+    async def complete(self, prompt: str, text_format: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Runs one prompt, retrying transient failures with jittered backoff.
+        `text_format` is passed as the Responses API output format
+        (e.g. a strict json_schema for structured answers).
+        """
+        attempt = 0
+        while True:
+            try:
+                return await self.complete_once(prompt, text_format)
+            except Exception as e:
+                delay = self.retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        """Closes the pooled HTTP connections."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
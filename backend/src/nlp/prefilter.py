@@ -0,0 +1,322 @@
+"""
+prefilter.py
+------------
+Cheap rule-based first stage in front of the LLM dish extractors.
+
+Every chunk is matched against a dish lexicon with an Aho–Corasick
+automaton (one pass over the text, independent of lexicon size) and then
+classified:
+
+    skip_none   short text without any lexicon match and without food or
+                menu cue words ("Great service!", "Tolles Ambiente, netter
+                Service.") → no dishes, no model call
+    accept      short text in which every word is either part of a lexicon
+                match or a stopword ("Schnitzel und Käsespätzle") → lexicon
+                result, no model call
+    llm         everything else → send to the model
+
+Cue words are matched as English/German words and as German compound
+parts, so an unknown dish such as "Schweinebraten" still counts as food
+talk ("...braten") and goes to the model.
+
+Skipped and accepted answers are a guess, not a model answer: callers use them for the
+current request but never store them under the model's extraction or
+review keys, so a later model call can still correct them.
+
+The lexicon is seeded from the bundled multilingual list in
+data/dish_lexicon.txt plus dishes already stored in the extraction store,
+and keeps learning from new model output (only dishes that appear verbatim
+in the chunk they were extracted from). Matching runs on folded text
+(case-folded, diacritics stripped), so "Käsespätzle", "kasespatzle" and
+"KÄSESPÄTZLE" all hit the same entry for German and English reviews.
+
+Config (environment):
+    PREFILTER_ENABLED         "1" (default) or "0"
+
+Public:
+    - AhoCorasick
+    - DishPrefilter, Decision, is_food_cue(word)
+    - get_prefilter(), set_prefilter(prefilter)
+    - prefilter_chunks(chunks), learn_dishes(dishes, text)
+"""
+
+import os
+import re
+import time
+import logging
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from src.normalisation.text import fold
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+PREFILTER_ENABLED = os.getenv("PREFILTER_ENABLED", "1") != "0"
+LEXICON_PATH = os.path.join(os.path.dirname(__file__), "data", "dish_lexicon.txt")
+SKIP_MAX_WORDS = 12      # only very short texts without any food signal are skipped
+ACCEPT_MAX_WORDS = 15    # lexicon-only answers are trusted for short texts only
+MAX_LEARNED_WORDS = 5    # ignore long model outputs when growing the lexicon
+SEED_LIMIT = 20000       # dishes read from the extraction store at startup
+REBUILD_INTERVAL = 60.0  # seconds between automaton rebuilds after learning
+
+# Function words that may sit between dish names in an accepted chunk (English + German, folded)
+STOPWORDS: Set[str] = {
+    "a", "an", "the", "and", "or", "with", "of", "in", "on", "at", "to", "for", "plus",
+    "some", "also", "then", "i", "we", "my", "our",
+    "und", "oder", "mit", "der", "die", "das", "dem", "den", "des", "ein", "eine", "einen",
+    "einem", "einer", "im", "am", "zum", "zur", "von", "vom", "auf", "als", "auch", "dazu",
+    "sowie", "danach", "ich", "wir", "mein", "meine", "unser", "unsere",
+}
+
+# Words that signal food is being talked about (English + German, folded)
+FOOD_CUES: Set[str] = {
+    "ate", "eat", "eaten", "eating", "had", "have", "got", "ordered", "order", "tried", "try",
+    "taste", "tasted", "tasty", "tasteless", "delicious", "yummy", "bland", "flavour", "flavor",
+    "dish", "dishes", "meal", "meals", "menu", "lunch", "dinner", "breakfast", "brunch", "food",
+    "portion", "portions", "served", "starter", "starters", "appetizer", "dessert", "desserts",
+    "main", "mains", "course", "plate", "drink", "drinks", "wine", "beer", "coffee", "tea",
+    "cooked", "chef", "kitchen", "cuisine", "special", "specials", "recommend", "crispy", "juicy",
+    "gegessen", "essen", "bestellt", "probiert", "lecker", "gericht", "gerichte", "geschmeckt",
+    "schmeckt", "kostlich", "portion", "hauptgang", "hatten", "hatte", "gab", "karte", "kuche",
+    "koch", "getranke", "empfehle", "empfehlen", "frisch", "knusprig", "saftig",
+}
+# German compound parts that mark food words, matched at either end of a word
+# ("schweinebraten", "tagessuppe", "speisekarte", "weinauswahl")
+FOOD_STEMS: Tuple[str, ...] = (
+    "essen", "speise", "gericht", "braten", "schnitzel", "suppe", "salat", "kuchen", "torte",
+    "wurst", "fleisch", "fisch", "brot", "nudel", "knodel", "sosse", "sauce", "teller", "menu",
+    "wein", "bier", "kaffee", "getrank", "nachtisch", "dessert", "fruhstuck", "portion",
+)
+
+# Allowed inflection suffixes after a lexicon match (plural / German endings)
+_SUFFIXES = ("", "s", "es", "n", "en", "e")
+_WORD = re.compile(r"\w+")
+
+
+# ----------------------------------------------------------------------
+# Aho–Corasick automaton
+# ----------------------------------------------------------------------
+class AhoCorasick:
+    """
+    Multi-pattern matcher. `find` returns the longest non-overlapping
+    whole-word matches as (start, end, pattern) tuples.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(pattern)
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Yields every (start, end, pattern) occurrence, overlapping included."""
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for pattern in self._out[node]:
+                yield i + 1 - len(pattern), i + 1, pattern
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """Longest non-overlapping matches on word boundaries."""
+        candidates = []
+        for start, end, pattern in self.iter_matches(text):
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            for suffix in _SUFFIXES:
+                stop = end + len(suffix)
+                if text[end:stop] == suffix and (stop == len(text) or not text[stop].isalnum()):
+                    candidates.append((start, stop, pattern))
+                    break
+
+        candidates.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        matches, last_end = [], 0
+        for start, end, pattern in candidates:
+            if start >= last_end:
+                matches.append((start, end, pattern))
+                last_end = end
+        return matches
+
+
+# ----------------------------------------------------------------------
+# Prefilter
+# ----------------------------------------------------------------------
+def is_food_cue(word: str) -> bool:
+    """True for a folded word that signals food talk (cue word or German compound food part)."""
+    if word in FOOD_CUES:
+        return True
+    return any(word.startswith(stem) or word.endswith(stem) for stem in FOOD_STEMS)
+
+
+class Decision(NamedTuple):
+    action: str          # "skip_none", "accept" or "llm"
+    dishes: List[str]    # lexicon matches (display names)
+    reason: str
+
+
+def load_bundled_lexicon(path: str = LEXICON_PATH) -> List[str]:
+    """Reads the bundled dish list, skipping comments and blank lines."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip().lower() for line in f if line.strip() and not line.startswith("#")]
+
+
+class DishPrefilter:
+    """Lexicon matcher + rule classifier deciding whether a chunk needs the LLM."""
+
+    def __init__(self, names: Iterable[str] = (), learning: bool = True):
+        self.learning = learning  # False freezes the lexicon (reproducible offline replays)
+        self._names: Dict[str, str] = {}  # folded pattern -> display name
+        self._automaton: Optional[AhoCorasick] = None
+        self._dirty = False
+        self._built_at = 0.0
+        self.add(names)
+        self._rebuild()
+
+        self.decisions: Dict[str, int] = {"skip_none": 0, "accept": 0, "llm": 0}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, names: Iterable[str]) -> None:
+        """Adds dish names; the automaton is rebuilt lazily."""
+        for name in names:
+            name = " ".join(name.split()).lower()
+            if not name or len(name.split()) > MAX_LEARNED_WORDS:
+                continue
+            key = fold(name)
+            if len(key) >= 3 and key not in self._names:
+                self._names[key] = name
+                self._dirty = True
+
+    def _rebuild(self) -> None:
+        self._automaton = AhoCorasick(self._names)
+        self._dirty = False
+        self._built_at = time.monotonic()
+
+    def _find(self, folded: str) -> List[Tuple[int, int, str]]:
+        if self._dirty and time.monotonic() - self._built_at >= REBUILD_INTERVAL:
+            self._rebuild()
+        return self._automaton.find(folded)
+
+    def match(self, text: str) -> List[str]:
+        """Returns lexicon dishes found in the text (display names, deduplicated)."""
+        return list(dict.fromkeys(self._names[pattern] for _, _, pattern in self._find(fold(text))))
+
+    def classify(self, text: str) -> Decision:
+        """Decides whether the model is needed for this chunk."""
+        folded = fold(text)
+        found = self._find(folded)
+        dishes = list(dict.fromkeys(self._names[pattern] for _, _, pattern in found))
+        spans = [(start, end) for start, end, _ in found]
+        words = list(_WORD.finditer(folded))
+        uncovered = [
+            w.group() for w in words
+            if w.group() not in STOPWORDS and not w.group().isdigit()
+            and not any(start <= w.start() and w.end() <= end for start, end in spans)
+        ]
+
+        if not dishes and len(words) <= SKIP_MAX_WORDS and not any(is_food_cue(w) for w in uncovered):
+            decision = Decision("skip_none", [], "short text without dish or food cue")
+        elif dishes and not uncovered and len(words) <= ACCEPT_MAX_WORDS:
+            decision = Decision("accept", dishes, "short text fully explained by lexicon")
+        else:
+            decision = Decision("llm", dishes, f"{len(words)} words, {len(uncovered)} outside the lexicon")
+
+        self.decisions[decision.action] += 1
+        return decision
+
+    def stats(self) -> Dict[str, int]:
+        return {"lexicon_size": len(self._names), **self.decisions}
+
+
+# ---- Lazy singleton ----
+_prefilter: Optional[DishPrefilter] = None
+
+
+def get_prefilter() -> DishPrefilter:
+    """
+    Returns the process-wide prefilter, seeded from the bundled lexicon and
+    the dishes already held by the extraction store.
+    """
+    global _prefilter
+    if _prefilter is None:
+        from src.nlp.extraction_store import get_extraction_store
+
+        names = load_bundled_lexicon()
+        names.extend(get_extraction_store().iter_dishes(SEED_LIMIT))
+        _prefilter = DishPrefilter(names)
+        logger.info(f"🔎 Dish prefilter ready with {len(_prefilter)} lexicon entries")
+    return _prefilter
+
+
+def set_prefilter(prefilter: Optional[DishPrefilter]) -> None:
+    """Overrides the shared prefilter (tests, offline jobs); None re-seeds on next use."""
+    global _prefilter
+    _prefilter = prefilter
+
+
+def prefilter_chunks(chunks: List[str]) -> Tuple[Dict[str, List[str]], List[str]]:
+    """
+    Splits chunks into those the prefilter can answer on its own and those
+    that still need the model. Returns (resolved, remaining); resolved
+    answers must not be written to the extraction store.
+    """
+    if not PREFILTER_ENABLED or not chunks:
+        return {}, list(chunks)
+
+    prefilter = get_prefilter()
+    resolved: Dict[str, List[str]] = {}
+    remaining: List[str] = []
+    for chunk in chunks:
+        decision = prefilter.classify(chunk)
+        if decision.action == "llm":
+            remaining.append(chunk)
+        else:
+            resolved[chunk] = decision.dishes
+    if resolved:
+        logger.info(f"🔎 Prefilter answered {len(resolved)}/{len(chunks)} chunks without the model")
+    return resolved, remaining
+
+
+def learn_dishes(dishes: Iterable[str], text: str) -> None:
+    """
+    Grows the lexicon with dishes the model extracted from `text`. Only
+    dishes that appear there verbatim (folded, on word boundaries) are
+    learned, so paraphrased or hallucinated answers stay out.
+    """
+    if not PREFILTER_ENABLED or not get_prefilter().learning:
+        return
+    folded = " " + " ".join(_WORD.findall(fold(text))) + " "
+    verbatim = [d for d in dishes if " " + " ".join(_WORD.findall(fold(d))) + " " in folded]
+    if verbatim:
+        get_prefilter().add(verbatim)
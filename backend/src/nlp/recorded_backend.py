@@ -0,0 +1,65 @@
+"""
+recorded_backend.py
+-------------------
+Completion backend that replays recorded LLM answers, for offline batch
+runs and benchmarks. Drop-in for `OpenAIBackend` via
+`extractor_openai.set_backend`.
+
+Recordings live in one JSON file mapping a hash of (prompt, output format)
+to the model's output text. Given an `inner` backend, misses are forwarded
+to it and recorded; without one, a miss raises KeyError.
+
+Public:
+    - RecordedBackend
+"""
+
+import os
+import json
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def recording_key(prompt: str, text_format: Optional[Dict[str, Any]] = None) -> str:
+    payload = prompt + "\x1f" + json.dumps(text_format, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RecordedBackend:
+    """Replays (and optionally records) model outputs keyed by prompt hash."""
+
+    def __init__(self, path: str, inner: Optional[Any] = None):
+        self.path = path
+        self.inner = inner
+        self._recordings: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._recordings = json.load(f)
+        self._dirty = False
+
+    async def complete(self, prompt: str, text_format: Optional[Dict[str, Any]] = None) -> str:
+        key = recording_key(prompt, text_format)
+        output = self._recordings.get(key)
+        if output is not None:
+            return output
+        if self.inner is None:
+            raise KeyError(f"No recorded LLM output for prompt {key[:12]}")
+
+        output = await self.inner.complete(prompt, text_format=text_format)
+        self._recordings[key] = output
+        self._dirty = True
+        return output
+
+    def save(self) -> None:
+        """Writes new recordings back to disk."""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self._recordings, f, ensure_ascii=False, indent=1, sort_keys=True)
+        self._dirty = False
+        logger.info(f"📼 Saved {len(self._recordings)} LLM recordings to {self.path}")
@@ -0,0 +1,153 @@
+"""
+registry.py
+-----------
+Chooses the dish extractor by configuration and imports it on first use.
+
+The extractor modules are heavy to import (the OpenAI SDK, or the local
+engine and its inference process), so neither is imported when the app
+starts. Routes and jobs call the functions here; the configured extractor
+module is imported by the first call, or by `warm_up()` in the background
+right after startup, so the first request does not pay for it.
+
+    reviews = await extract_dishes(reviews)
+    async for i, review in iter_extract_dishes(reviews): ...
+
+Import and warm-up times are logged and exported as
+`dishtip_startup_seconds{phase=...}`.
+
+Config (environment):
+    EXTRACTOR          "openai" (default) or "local"
+    EXTRACTOR_WARMUP   "1" to load the extractor in the background at startup
+
+Public:
+    - Extractor, EXTRACTORS, register_extractor(name, module, extract, iterate)
+    - get_extractor(name), extractor_version()
+    - extract_dishes(reviews), iter_extract_dishes(reviews)
+    - warm_up(), start_warm_up(), startup_report()
+"""
+
+import os
+import time
+import asyncio
+import logging
+import importlib
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+from src.metrics import STARTUP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+EXTRACTOR = os.getenv("EXTRACTOR", "openai").lower()
+EXTRACTOR_WARMUP = os.getenv("EXTRACTOR_WARMUP", "0") == "1"
+
+
+class Extractor(NamedTuple):
+    """Where an extractor lives: module path and the names of its entry points."""
+    module: str
+    extract: str                   # async (reviews, verbose) -> reviews
+    iterate: Optional[str] = None  # async iterator of (index, review), if streaming is supported
+
+
+EXTRACTORS: Dict[str, Extractor] = {
+    "openai": Extractor("src.nlp.extractor_openai", "extract_dishes_openai", "iter_extract_dishes_openai"),
+    "local": Extractor("src.nlp.extractor_local", "extract_dishes_async"),
+}
+
+_modules: Dict[str, Any] = {}
+_report: Dict[str, Any] = {"extractor": EXTRACTOR, "import_seconds": None, "warmup_seconds": None}
+_warmup_task: Optional[asyncio.Task] = None
+
+
+def register_extractor(name: str, module: str, extract: str, iterate: Optional[str] = None) -> None:
+    """Adds or replaces an extractor; select it with EXTRACTOR=<name>."""
+    EXTRACTORS[name] = Extractor(module, extract, iterate)
+
+
+def get_extractor(name: Optional[str] = None) -> Any:
+    """Returns the extractor module, importing it on first use."""
+    name = name or EXTRACTOR
+    module = _modules.get(name)
+    if module is None:
+        if name not in EXTRACTORS:
+            raise ValueError(f"Unknown extractor '{name}', expected one of {sorted(EXTRACTORS)}")
+        start = time.perf_counter()
+        module = importlib.import_module(EXTRACTORS[name].module)
+        elapsed = time.perf_counter() - start
+        _modules[name] = module
+        if name == EXTRACTOR:
+            _report["import_seconds"] = round(elapsed, 3)
+        STARTUP_SECONDS.set(elapsed, phase=f"import_{name}")
+        logger.info(f"📦 Loaded '{name}' extractor in {elapsed:.2f}s")
+    return module
+
+
+def extractor_version(name: Optional[str] = None) -> str:
+    """
+    '<model>:<prompt version>' of an extractor, e.g. to salt result
+    fingerprints. Extractors with several prompts expose ANSWERS_VERSION,
+    which covers all of them.
+    """
+    module = get_extractor(name)
+    return f"{module.MODEL_NAME}:{getattr(module, 'ANSWERS_VERSION', module.PROMPT_VERSION)}"
+
+
+async def extract_dishes(
+    reviews: List[Dict[str, Any]], verbose: bool = False, strict: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Attaches extracted dishes to each review with the configured extractor.
+    With `strict`, a failed chunk raises instead of leaving its review
+    without dishes (offline jobs must not record partial results).
+    """
+    extract = getattr(get_extractor(), EXTRACTORS[EXTRACTOR].extract)
+    if strict:
+        return await extract(reviews, verbose, strict=True)
+    return await extract(reviews, verbose)
+
+
+async def iter_extract_dishes(reviews: List[Dict[str, Any]]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yields (index, review) as reviews finish extraction. Extractors without a
+    streaming variant extract everything first and then yield in order.
+    """
+    module = get_extractor()
+    iterate = EXTRACTORS[EXTRACTOR].iterate
+    if iterate is not None:
+        async for item in getattr(module, iterate)(reviews):
+            yield item
+        return
+    reviews = await getattr(module, EXTRACTORS[EXTRACTOR].extract)(reviews)
+    for i, review in enumerate(reviews):
+        yield i, review
+
+
+async def warm_up() -> None:
+    """Imports the configured extractor and runs its own `warm_up()`, if any."""
+    start = time.perf_counter()
+    module = await asyncio.to_thread(get_extractor)
+    if hasattr(module, "warm_up"):
+        await module.warm_up()
+    elapsed = time.perf_counter() - start
+    _report["warmup_seconds"] = round(elapsed, 3)
+    STARTUP_SECONDS.set(elapsed, phase="warmup")
+    logger.info(f"🔥 '{EXTRACTOR}' extractor warmed up in {elapsed:.2f}s")
+
+
+def _log_warmup_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"⚠️ Extractor warm-up failed: {task.exception()}")
+
+
+def start_warm_up() -> Optional[asyncio.Task]:
+    """Starts `warm_up()` as a background task if EXTRACTOR_WARMUP is set."""
+    global _warmup_task
+    if EXTRACTOR_WARMUP and _warmup_task is None:
+        _warmup_task = asyncio.create_task(warm_up())
+        _warmup_task.add_done_callback(_log_warmup_failure)
+    return _warmup_task
+
+
+def startup_report() -> Dict[str, Any]:
+    """Configured extractor, whether it is loaded, and its import / warm-up seconds."""
+    return {**_report, "loaded": EXTRACTOR in _modules}
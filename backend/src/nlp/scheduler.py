@@ -0,0 +1,329 @@
+"""
+scheduler.py
+------------
+Process-wide scheduler for LLM calls made by the dish extractors.
+
+Every model call asks the scheduler for a slot. The scheduler enforces:
+    - a global concurrency cap (replaces the per-module semaphore)
+    - a token-bucket limit on requests/sec and model tokens/min
+    - fair round-robin queueing across groups (one group per
+      /recommendations request), so a restaurant with hundreds of chunks
+      cannot starve the requests queued behind it
+
+The rate limit can be shared across uvicorn workers on one host by backing
+the buckets with a small SQLite file instead of process memory.
+
+Config (environment):
+    LLM_MAX_CONCURRENCY       concurrent calls per process
+    LLM_REQUESTS_PER_SECOND   request-rate budget
+    LLM_TOKENS_PER_MINUTE     token budget
+    LLM_RATE_LIMIT_PATH       SQLite file for cross-worker buckets (unset = per-process)
+
+Public:
+    - TokenBucket, SQLiteTokenBucket, RateLimiter
+    - ExtractionScheduler
+    - get_scheduler()
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+import logging
+import itertools
+import threading
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "10"))
+LLM_REQUESTS_PER_SECOND = float(os.getenv("LLM_REQUESTS_PER_SECOND", "20"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+LLM_RATE_LIMIT_PATH = os.getenv("LLM_RATE_LIMIT_PATH")
+
+
+# ----------------------------------------------------------------------
+# Token buckets
+# ----------------------------------------------------------------------
+class TokenBucket:
+    """
+    In-process token bucket refilled continuously at `rate` units/sec, up to
+    `capacity`. `try_take` never blocks: it returns 0 when the units were
+    taken, otherwise the seconds to wait before they would be available.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._level = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_take(self, amount: float) -> float:
+        amount = min(amount, self.capacity)  # oversized asks wait for a full bucket
+        with self._lock:
+            now = self._clock()
+            self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._level >= amount:
+                self._level -= amount
+                return 0.0
+            return (amount - self._level) / self.rate
+
+    def refund(self, amount: float) -> None:
+        """Returns units taken for a call that never happened."""
+        with self._lock:
+            self._level = min(self.capacity, self._level + amount)
+
+
+class SQLiteTokenBucket:
+    """
+    Token bucket whose state lives in a SQLite row, so every worker process
+    on the host draws from the same budget. Same contract as TokenBucket,
+    but `try_take` blocks on SQLite's lock for up to `busy_timeout` seconds,
+    so async callers run it in a worker thread.
+    """
+
+    def __init__(self, path: str, name: str, rate: float, capacity: float, busy_timeout: float = 2.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._name = name
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def try_take(self, amount: float) -> float:
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.time()
+            # BEGIN IMMEDIATE takes the write lock up front, serialising workers
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT level, updated FROM buckets WHERE name = ?", (self._name,)).fetchone()
+                level, updated = row if row else (self.capacity, now)
+                level = min(self.capacity, level + max(0.0, now - updated) * self.rate)
+                wait = 0.0
+                if level >= amount:
+                    level -= amount
+                else:
+                    wait = (amount - level) / self.rate
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, level, updated) VALUES (?, ?, ?)",
+                    (self._name, level, now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def refund(self, amount: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE buckets SET level = MIN(?, level + ?) WHERE name = ?",
+                (self.capacity, amount, self._name),
+            )
+
+
+class RateLimiter:
+    """Combines a requests/sec bucket and a tokens/min bucket."""
+
+    def __init__(
+        self,
+        requests_per_second: float = LLM_REQUESTS_PER_SECOND,
+        tokens_per_minute: float = LLM_TOKENS_PER_MINUTE,
+        shared_path: Optional[str] = LLM_RATE_LIMIT_PATH,
+    ):
+        token_rate = tokens_per_minute / 60.0
+        if shared_path:
+            self._requests = SQLiteTokenBucket(shared_path, "requests", requests_per_second, max(1.0, requests_per_second))
+            self._tokens = SQLiteTokenBucket(shared_path, "tokens", token_rate, tokens_per_minute)
+        else:
+            self._requests = TokenBucket(requests_per_second, max(1.0, requests_per_second))
+            self._tokens = TokenBucket(token_rate, tokens_per_minute)
+        self.shared = bool(shared_path)
+
+    def release(self, tokens: int) -> None:
+        """Gives back a grant that was never used."""
+        self._tokens.refund(tokens)
+        self._requests.refund(1)
+
+    def try_acquire(self, tokens: int) -> float:
+        """
+        Takes one request and `tokens` tokens, or returns the wait in seconds.
+        The request bucket is only charged once the token bucket has room, so
+        a refusal never burns request budget.
+        """
+        wait = self._tokens.try_take(tokens)
+        if wait > 0:
+            return wait
+        wait = self._requests.try_take(1)
+        if wait > 0:
+            self._tokens.refund(tokens)
+        return wait
+
+
+# ----------------------------------------------------------------------
+# Fair scheduler
+# ----------------------------------------------------------------------
+class ExtractionScheduler:
+    """
+    Grants LLM call slots round-robin across groups, subject to the
+    concurrency cap and the rate limiter.
+
+    Usage:
+        async with scheduler.slot(group_id, tokens=estimate):
+            output = await backend.complete(prompt)
+    """
+
+    _BUSY_RETRY = 0.05  # seconds before asking a locked SQLite bucket again
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, limiter: Optional[RateLimiter] = None):
+        self.max_concurrency = max_concurrency
+        self.limiter = limiter or RateLimiter()
+        self._queues: "OrderedDict[Any, Deque[Tuple[asyncio.Future, int]]]" = OrderedDict()
+        self._active = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._group_ids = itertools.count(1)
+
+        self.granted = 0
+        self.throttled_waits = 0
+
+    def new_group(self) -> int:
+        """Returns a fresh group id (one per pipeline run / HTTP request)."""
+        return next(self._group_ids)
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def _ensure_dispatcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # new event loop (e.g. a fresh asyncio.run in a script): drop state tied to the old one
+            self._loop = loop
+            self._queues.clear()
+            self._active = 0
+            self._dispatcher = None
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        """Hands out slots one at a time, rotating through groups."""
+        while True:
+            if not self._queues or self._active >= self.max_concurrency:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            group, queue = next(iter(self._queues.items()))
+            future, tokens = queue[0]
+            if future.cancelled():
+                self._pop(group)
+                continue
+
+            if self.limiter.shared:
+                # the SQLite buckets may wait on another worker's write lock
+                try:
+                    wait = await asyncio.to_thread(self.limiter.try_acquire, tokens)
+                except sqlite3.OperationalError as e:
+                    logger.debug(f"🚦 Rate limit store busy ({e}), retrying")
+                    wait = self._BUSY_RETRY
+            else:
+                wait = self.limiter.try_acquire(tokens)
+            if future.cancelled():
+                if wait == 0:
+                    self.limiter.release(tokens)
+                self._pop(group)
+                continue
+            if wait > 0:
+                self.throttled_waits += 1
+                await asyncio.sleep(wait)
+                continue
+
+            self._pop(group)
+            # rotate: the group goes to the back of the line if it has more work
+            if group in self._queues:
+                self._queues.move_to_end(group)
+            self._active += 1
+            self.granted += 1
+            future.set_result(None)
+
+    def _pop(self, group: Any) -> None:
+        queue = self._queues[group]
+        queue.popleft()
+        if not queue:
+            del self._queues[group]
+
+    def _release(self) -> None:
+        self._active -= 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    @asynccontextmanager
+    async def slot(self, group: Any = None, tokens: int = 0) -> AsyncIterator[None]:
+        """Waits for a fair, rate-limited slot and holds it for the block."""
+        self._ensure_dispatcher()
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(group, deque()).append((future, tokens))
+        self._wakeup.set()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()  # slot was granted just as we were cancelled
+            raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "queued": self.queued,
+            "groups": len(self._queues),
+            "granted": self.granted,
+            "throttled_waits": self.throttled_waits,
+            "max_concurrency": self.max_concurrency,
+            "shared_rate_limit": self.limiter.shared,
+        }
+
+
+# ----------------------------------------------------------------------
+# Shared instance
+# ----------------------------------------------------------------------
+_scheduler: Optional[ExtractionScheduler] = None
+
+
+def get_scheduler() -> ExtractionScheduler:
+    """Returns the process-wide scheduler, creating it on first use."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ExtractionScheduler()
+        mode = "cross-worker" if _scheduler.limiter.shared else "per-process"
+        logger.info(f"🚦 LLM scheduler: {_scheduler.max_concurrency} concurrent, {mode} rate limit")
+    return _scheduler
+
+
+def set_scheduler(scheduler: ExtractionScheduler) -> None:
+    """Overrides the shared scheduler (tests, offline jobs)."""
+    global _scheduler
+    _scheduler = scheduler
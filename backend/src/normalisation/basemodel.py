@@ -8,6 +8,8 @@ from pydantic import BaseModel, HttpUrl, Field, model_validator
 from typing import List, Optional
 from datetime import datetime
 
+from src.normalisation.schemas import make_review_id
+
 class Restaurant(BaseModel):
     place_id: str = Field(..., alias="id")
     name: str
@@ -23,6 +25,7 @@ class Restaurant(BaseModel):
         return values
 
 class Review(BaseModel):
+    id: Optional[str] = None
     author: Optional[str] = None
     url: Optional[HttpUrl] = Field(None, alias="googleMapsUri")
     rating: Optional[float] = None
@@ -60,4 +63,11 @@ class Review(BaseModel):
         elif isinstance(ts, (int, float)):
             values["publishTime"] = int(ts)
         
-        return values
\ No newline at end of file
+        return values
+
+    @model_validator(mode="after")
+    def assign_content_id(self):
+        """Sets the stable content ID (hash of text + source) if not given."""
+        if self.id is None:
+            self.id = make_review_id(self.text, "google")
+        return self
@@ -0,0 +1,165 @@
+"""
+bulk.py
+-------
+Bulk normalisation of raw Google review arrays into the flat review records
+(schemas.ReviewRecord) used by the pipeline, without building one Pydantic
+model per review.
+
+Two paths with the same field semantics as `basemodel.Review`:
+
+    fast (default)  one pure-Python pass per review: flattens the nested
+                    author / text / language fields, parses publishTime
+                    with a precompiled pattern and sets the content id.
+                    Malformed URLs are dropped to None instead of failing
+                    the whole array.
+    strict          validates the whole array in one call through a
+                    compiled TypeAdapter(List[Review]) and dumps it once
+                    (full HttpUrl validation, raises on bad input); URLs
+                    are returned as plain strings, as on the fast path.
+
+Used by `google_api.normalise_place_payload` and by offline ingestion of
+large review dumps.
+
+Records from other sources (blogs, legacy Places dumps) are flat field maps
+and go through `map_review`, which applies `schemas.REVIEW_MAPS`.
+
+Public:
+    - normalise_reviews(raw_reviews, strict=False)
+    - flatten_google_review(raw)
+    - map_review(raw, source_type, source)
+    - parse_timestamp(value)
+"""
+
+import re
+import calendar
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from pydantic import TypeAdapter
+
+from src.normalisation.basemodel import Review
+from src.normalisation.schemas import REVIEW_MAPS, ReviewRecord, make_review_id
+
+logger = logging.getLogger(__name__)
+
+REVIEW_LIST_ADAPTER = TypeAdapter(List[Review])
+
+# RFC 3339 as returned by the Places API, e.g. 2024-05-01T12:34:56.123456789Z
+_RFC3339 = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(?:\.\d+)?(?:(Z)|([+-])(\d{2}):(\d{2}))$"
+)
+
+
+def parse_timestamp(value: Any) -> Optional[int]:
+    """
+    Unix seconds from an RFC 3339 string or a number, like `Review`:
+    fractions are truncated, unparsable values become None.
+    """
+    if isinstance(value, str):
+        m = _RFC3339.match(value)
+        if m is None:
+            # uncommon ISO forms: same parser as the model
+            try:
+                return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+            except ValueError:
+                return None
+        year, month, day, hour, minute, second = (int(g) for g in m.group(1, 2, 3, 4, 5, 6))
+        try:
+            seconds = calendar.timegm((year, month, day, hour, minute, second))
+        except ValueError:
+            return None
+        if m.group(8):
+            offset = int(m.group(9)) * 3600 + int(m.group(10)) * 60
+            seconds -= offset if m.group(8) == "+" else -offset
+        return seconds
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return int(value)
+    return None
+
+
+def _url(value: Any) -> Optional[str]:
+    if isinstance(value, str) and value.startswith(("http://", "https://")) and len(value) > 8:
+        return value
+    return None
+
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def flatten_google_review(raw: Dict[str, Any]) -> ReviewRecord:
+    """Flattens one raw Places API review into a review record (fast path)."""
+    author_attr = raw.get("authorAttribution") or {}
+    text_obj = raw.get("text") or {}
+    original_text = raw.get("originalText") or {}
+
+    text = text_obj.get("text") if isinstance(text_obj, dict) else text_obj
+    return ReviewRecord(
+        id=raw.get("id") or make_review_id(text, "google"),
+        author=author_attr.get("displayName"),
+        url=_url(raw.get("googleMapsUri")),
+        rating=_float(raw.get("rating")),
+        text=text,
+        timestamp=parse_timestamp(raw.get("publishTime")),
+        original_lang=original_text.get("languageCode"),
+    )
+
+
+def normalise_reviews(raw_reviews: Iterable[Dict[str, Any]], strict: bool = False) -> List[ReviewRecord]:
+    """
+    Normalises a whole raw review array into flat review records.
+
+    Args:
+        raw_reviews: Review objects as returned by the Places API (v1).
+        strict: Validate through the compiled Pydantic adapter instead of the
+            fast path (slower, raises ValidationError on malformed input).
+    """
+    if strict:
+        models = REVIEW_LIST_ADAPTER.validate_python(list(raw_reviews))
+        records = [ReviewRecord(**review) for review in REVIEW_LIST_ADAPTER.dump_python(models)]
+        for record in records:
+            # HttpUrl -> str, like the fast path
+            if record.url is not None:
+                record.url = str(record.url)
+        return records
+    return [flatten_google_review(raw) for raw in raw_reviews]
+
+
+def _plain(value: Any) -> Any:
+    """Unwraps schema.org style {"name": ...} / {"text": ...} values."""
+    if isinstance(value, dict):
+        return value.get("name") or value.get("text") or value.get("@id")
+    if isinstance(value, list):
+        return _plain(value[0]) if value else None
+    return value
+
+
+def map_review(raw: Dict[str, Any], source_type: str, source: Optional[str] = None) -> ReviewRecord:
+    """
+    Maps one flat source record to a review record via REVIEW_MAPS.
+    The first non-empty source field wins for each target field.
+    """
+    mapped: Dict[str, Any] = {}
+    for source_field, target in REVIEW_MAPS[source_type].items():
+        value = _plain(raw.get(source_field))
+        if value not in (None, "") and target not in mapped:
+            mapped[target] = value
+
+    text = mapped.get("text")
+    return ReviewRecord(
+        id=make_review_id(text, source_type),
+        author=mapped.get("author"),
+        url=_url(mapped.get("url")),
+        rating=_float(mapped.get("rating")),
+        text=text,
+        timestamp=parse_timestamp(mapped.get("date")),
+        original_lang=mapped.get("language"),
+        source_type=source_type,
+        source=source,
+    )
@@ -1,14 +1,27 @@
 """
 schemas.py
 ----------
-Defines canonical data schemas and source field mappings used for normalization. They are not really used but might be useful later?
+Defines canonical data schemas and source field mappings used for normalization.
+
+The dict templates document the field sets. Inside the pipeline, reviews,
+dishes and recommendations travel as the slotted records defined at the end
+of this module (ReviewRecord, DishRecord, Recommendation). They support
+dict-style access (`r["text"]`, `r.get("dishes")`), so code written against
+the dict schemas keeps working. They are serialised only once, at the API or
+file boundary (see `json_default`).
 """
 
+import copy
+import hashlib
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 
+from pydantic import AnyUrl
+from pydantic_core import Url as CoreUrl
+
 # -------- Canonical Review Schema --------
 REVIEW_SCHEMA: Dict[str, Any] = {
-    "id": None,            # optional unique ID (e.g. hash of text+source)
+    "id": None,            # stable content ID, see make_review_id
     "source_type": None,   # "google", "blog", etc.
     "source": None,        # source name displayed in rec box
     "author": None,        # reviewer/blogger name
@@ -21,6 +34,16 @@ REVIEW_SCHEMA: Dict[str, Any] = {
     "language": None,      # ISO language code (e.g., "en", "de")
 }
 
+
+def make_review_id(text: Optional[str], source_type: Optional[str]) -> str:
+    """
+    Stable content ID of a review: hash of its source type and whitespace-
+    normalised text. Edited reviews get a new ID; unchanged ones keep theirs
+    across fetches and processes.
+    """
+    payload = f"{source_type or ''}\x1f{' '.join((text or '').split())}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
 # -------- Dish Schema --------
 DISH: Dict[str, Any] = {
     "name": None,          # dish name (normalized lowercase)
@@ -40,7 +63,9 @@ REVIEW_MAPS: Dict[str, Dict[str, str]] = {
     },
     "blog": {
         "provider": "author",
+        "author": "author",        # schema.org Review
         "description": "text",
+        "reviewBody": "text",      # schema.org Review
         "datePublished": "date",
         "url": "url",
         # "ratingValue": "rating",   # include if your blogs have explicit ratings
@@ -58,4 +83,97 @@ REC_SCHEMA = {
     "timestamp": None,
     "review_link": None,
     "ranking": None,
+    "mention_count": None,  # aggregated only: number of supporting reviews
+    "reviews": None,        # aggregated only: per-review mentions backing this dish
 }
+
+
+# -------- Internal records --------
+class _Record:
+    """Dict-style access for slotted dataclass records."""
+
+    __slots__ = ()
+    _keys: frozenset = frozenset()  # field names, for fast key checks
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._keys = frozenset(getattr(cls, "__slots__", ()))
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._keys:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self._keys:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Field value like dict.get; methods and other attributes are not keys."""
+        return getattr(self, key) if key in self._keys else default
+
+    def keys(self):
+        return self.__slots__
+
+    def copy(self):
+        """Shallow copy, like dict.copy()."""
+        return copy.copy(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+@dataclass(slots=True)
+class DishRecord(_Record):
+    name: Optional[str] = None
+    ranking: Optional[int] = None
+
+
+@dataclass(slots=True)
+class ReviewRecord(_Record):
+    id: Optional[str] = None
+    author: Optional[str] = None
+    url: Optional[str] = None
+    rating: Optional[float] = None
+    text: Optional[str] = None
+    timestamp: Optional[int] = None
+    original_lang: Optional[str] = None
+    source_type: Optional[str] = None
+    source: Optional[str] = None
+    dishes: List[DishRecord] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Recommendation(_Record):
+    dish_name: Optional[str] = None
+    ranking: Optional[int] = None
+    author: Optional[str] = None
+    source: Optional[str] = None
+    timestamp: Optional[int] = None
+    review_link: Optional[str] = None
+    mention_count: Optional[int] = None
+    reviews: Optional[List["Recommendation"]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        # aggregated-only fields are left out of per-review mentions
+        data = _Record.to_dict(self)
+        if self.mention_count is None:
+            del data["mention_count"], data["reviews"]
+        return data
+
+
+def json_default(obj: Any) -> Any:
+    """
+    `default` hook for json / orjson (with OPT_PASSTHROUGH_DATACLASS):
+    records become dicts and pydantic URLs strings. Anything else raises
+    TypeError, as json.dumps does, instead of being silently stringified.
+    """
+    if isinstance(obj, _Record):
+        return obj.to_dict()
+    if isinstance(obj, (AnyUrl, CoreUrl)):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,13 @@
+"""
+text.py
+-------
+Small text normalisation helpers shared by the NLP and recommendation stages.
+"""
+
+import unicodedata
+
+
+def fold(text: str) -> str:
+    """Case-folds and strips diacritics (ä→a, é→e, ß→ss) for matching."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
@@ -0,0 +1,281 @@
+"""
+pipeline.py
+-----------
+The fetch → extract → score → form pipeline, shared by the API routes and
+offline jobs (see batch.py).
+
+Served recommendations go through the result store (stale-while-revalidate):
+a stored entry is returned at once, and a stale one schedules one
+background refresh per place. A refresh whose review fingerprint is
+unchanged skips extraction and only renews the entry and its restaurant
+info. Result store calls block (SQLite, JSON), so they run in a worker
+thread via `asyncio.to_thread`, like the place index writes.
+
+Several places can be computed in one pass (`get_stored_recommendations_many`):
+the reviews of all places that need extraction go through a single
+extractor call, so identical chunks are extracted once and LLM batches
+are packed across places, all under one scheduler group.
+
+Public:
+    - extract_and_score(reviews)
+    - run_place_pipeline(place_id, fetch, limit, strict)
+    - refresh_recommendations(place_id, fetch)
+    - refresh_many(place_ids, fetch)
+    - get_stored_recommendations(place_id)
+    - get_stored_recommendations_many(place_ids)
+"""
+
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.fetch.place_cache import get_place_data
+from src.metrics import span, untraced_context
+from src.nlp.registry import extract_dishes, extractor_version
+from src.ranking.scoring import assign_dish_scores
+from src.recs.forming import form_recommendations
+from src.recs.result_store import ResultStore, get_result_store, review_fingerprint
+
+logger = logging.getLogger(__name__)
+
+PlaceFetcher = Callable[[str], Awaitable[Tuple[Dict[str, Any], List[Dict[str, Any]]]]]
+
+
+async def extract_and_score(
+    reviews: List[Dict[str, Any]], verbose: bool = False, strict: bool = False
+) -> List[Dict[str, Any]]:
+    """Attaches extracted dishes to each review and scores them in place."""
+    with span("extraction"):
+        reviews = await extract_dishes(reviews, verbose, strict)
+    with span("scoring"):
+        assign_dish_scores(reviews)
+    return reviews
+
+
+async def run_place_pipeline(
+    place_id: str,
+    fetch: PlaceFetcher = get_place_data,
+    limit: Optional[int] = None,
+    strict: bool = False,
+) -> Dict[str, Any]:
+    """
+    Runs the full pipeline for one place. With `strict`, a failed
+    extraction raises instead of yielding partial recommendations.
+
+    Returns:
+        {"place_id", "restaurant_info", "recommendations"}; restaurant_info is
+        empty if the place could not be fetched.
+    """
+    restaurant, reviews = await fetch(place_id)
+    if not restaurant:
+        return {"place_id": place_id, "restaurant_info": {}, "recommendations": []}
+
+    logger.info(f"📄 Retrieved {len(reviews)} reviews for {restaurant.get('name')}")
+    reviews = await extract_and_score(reviews, strict=strict)
+    with span("forming"):
+        recommendations = form_recommendations(reviews, limit=limit)
+    return {
+        "place_id": place_id,
+        "restaurant_info": restaurant,
+        "recommendations": recommendations,
+    }
+
+
+# ---- Stored results ----
+_refreshing: Dict[str, asyncio.Task] = {}
+
+
+def _fingerprint(reviews: List[Dict[str, Any]]) -> str:
+    return review_fingerprint(reviews, salt=extractor_version())
+
+
+def _entry(fingerprint: str, restaurant: Dict[str, Any], recommendations: List[Any]) -> Dict[str, Any]:
+    """A freshly computed entry, shaped like the ones the result store returns."""
+    return {
+        "fingerprint": fingerprint,
+        "restaurant_info": restaurant,
+        "recommendations": recommendations,
+        "computed_at": time.time(),
+    }
+
+
+def _get_entries(store: ResultStore, place_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Stored entry (or None) per place; blocking, run it with asyncio.to_thread."""
+    return {place_id: store.get(place_id) for place_id in place_ids}
+
+
+async def refresh_recommendations(place_id: str, fetch: PlaceFetcher = get_place_data) -> Optional[Dict[str, Any]]:
+    """
+    Recomputes and stores the recommendations for a place. Returns the
+    stored entry, or None if the place could not be fetched.
+    """
+    store = get_result_store()
+    restaurant, reviews = await fetch(place_id)
+    if not restaurant:
+        return None
+
+    fingerprint = _fingerprint(reviews)
+    entry = await asyncio.to_thread(store.get, place_id)
+    if entry is not None and entry["fingerprint"] == fingerprint:
+        logger.info(f"♻️ Reviews for {place_id} unchanged, keeping stored recommendations")
+        await asyncio.to_thread(store.touch, place_id, restaurant)
+        return _entry(fingerprint, restaurant, entry["recommendations"])
+
+    reviews = await extract_and_score(reviews)
+    with span("forming"):
+        recommendations = form_recommendations(reviews)
+    await asyncio.to_thread(store.put, place_id, fingerprint, restaurant, recommendations)
+    return _entry(fingerprint, restaurant, recommendations)
+
+
+async def refresh_many(place_ids: List[str], fetch: PlaceFetcher = get_place_data) -> Dict[str, Any]:
+    """
+    Recomputes and stores several places in one extraction pass.
+
+    Returns:
+        place_id -> stored entry, None if the place could not be fetched, or
+        the exception that failed it.
+    """
+    store = get_result_store()
+    fetched = await asyncio.gather(*(fetch(place_id) for place_id in place_ids), return_exceptions=True)
+
+    results: Dict[str, Any] = {}
+    found = {}
+    for place_id, data in zip(place_ids, fetched):
+        if isinstance(data, Exception):
+            results[place_id] = data
+        elif not data[0]:
+            results[place_id] = None
+        else:
+            found[place_id] = data
+    entries = await asyncio.to_thread(_get_entries, store, list(found))
+
+    pending = []
+    for place_id, (restaurant, reviews) in found.items():
+        fingerprint = _fingerprint(reviews)
+        entry = entries[place_id]
+        if entry is not None and entry["fingerprint"] == fingerprint:
+            await asyncio.to_thread(store.touch, place_id, restaurant)
+            results[place_id] = _entry(fingerprint, restaurant, entry["recommendations"])
+            continue
+        pending.append((place_id, restaurant, reviews, fingerprint))
+
+    if not pending:
+        return results
+
+    combined = [review for _, _, reviews, _ in pending for review in reviews]
+    logger.info(f"🧺 Extracting {len(combined)} reviews of {len(pending)} places in one pass")
+    try:
+        with span("extraction"):
+            await extract_dishes(combined)
+    except Exception as e:
+        for place_id, *_ in pending:
+            results[place_id] = e
+        return results
+
+    # extraction attached the dishes to the review dicts in place
+    for place_id, restaurant, reviews, fingerprint in pending:
+        try:
+            with span("scoring"):
+                assign_dish_scores(reviews)
+            with span("forming"):
+                recommendations = form_recommendations(reviews)
+        except Exception as e:
+            results[place_id] = e
+            continue
+        await asyncio.to_thread(store.put, place_id, fingerprint, restaurant, recommendations)
+        results[place_id] = _entry(fingerprint, restaurant, recommendations)
+    return results
+
+
+def _start_refresh(place_id: str, background: bool = False) -> asyncio.Task:
+    """
+    Returns the running refresh task for a place, starting one if needed.
+    Background refreshes run outside the caller's request trace.
+    """
+    task = _refreshing.get(place_id)
+    if task is None:
+        context = untraced_context() if background else None
+        task = asyncio.create_task(refresh_recommendations(place_id), context=context)
+        _refreshing[place_id] = task
+        task.add_done_callback(lambda _: _refreshing.pop(place_id, None))
+    return task
+
+
+async def _pick(batch: asyncio.Task, place_id: str) -> Optional[Dict[str, Any]]:
+    result = (await asyncio.shield(batch))[place_id]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def _start_refresh_many(place_ids: List[str], background: bool = False) -> Dict[str, asyncio.Task]:
+    """
+    Like `_start_refresh`, for several places at once: places without a
+    running refresh are computed together, each behind its own task so
+    single-place requests arriving meanwhile join it.
+    """
+    tasks = {place_id: _refreshing[place_id] for place_id in place_ids if place_id in _refreshing}
+    new = [place_id for place_id in place_ids if place_id not in tasks]
+    if new:
+        context = untraced_context() if background else None
+        batch = asyncio.create_task(refresh_many(new), context=context)
+        for place_id in new:
+            task = asyncio.create_task(_pick(batch, place_id), context=context)
+            _refreshing[place_id] = tasks[place_id] = task
+            task.add_done_callback(lambda _, p=place_id: _refreshing.pop(p, None))
+    return tasks
+
+
+def _log_refresh_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"⚠️ Background refresh failed: {task.exception()}")
+
+
+async def get_stored_recommendations(place_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the stored entry for a place, computing it on a miss (concurrent
+    misses share one computation). Stale entries are served as-is while one
+    background refresh runs.
+    """
+    store = get_result_store()
+    entry = await asyncio.to_thread(store.get, place_id)
+    if entry is None:
+        return await asyncio.shield(_start_refresh(place_id))
+
+    if store.is_stale(entry) and place_id not in _refreshing:
+        _start_refresh(place_id, background=True).add_done_callback(_log_refresh_failure)
+    return entry
+
+
+async def get_stored_recommendations_many(place_ids: List[str]) -> Dict[str, Any]:
+    """
+    Batch variant of `get_stored_recommendations`. Stored entries are served
+    as-is; misses are computed together in one pass and stale entries are
+    refreshed together in the background.
+
+    Returns:
+        place_id -> entry, None (place not found) or the exception that failed it.
+    """
+    store = get_result_store()
+    results: Dict[str, Any] = {}
+    misses: List[str] = []
+    stale: List[str] = []
+    entries = await asyncio.to_thread(_get_entries, store, list(dict.fromkeys(place_ids)))
+    for place_id, entry in entries.items():
+        if entry is None:
+            misses.append(place_id)
+            continue
+        if store.is_stale(entry) and place_id not in _refreshing:
+            stale.append(place_id)
+        results[place_id] = entry
+
+    if stale:
+        for task in _start_refresh_many(stale, background=True).values():
+            task.add_done_callback(_log_refresh_failure)
+    if misses:
+        tasks = _start_refresh_many(misses)
+        done = await asyncio.gather(*(asyncio.shield(tasks[p]) for p in misses), return_exceptions=True)
+        results.update(zip(misses, done))
+    return {place_id: results[place_id] for place_id in dict.fromkeys(place_ids)}
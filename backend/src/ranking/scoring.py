@@ -1,15 +1,46 @@
 """
 scoring.py
 ----------
-Provides logic for assigning numerical scores to dishes. Scores are based on several 
-heuristics, including the source type (Google vs. blog), author name quality, and 
+Provides logic for assigning numerical scores to dishes. Scores are based on several
+heuristics, including the source type (Google vs. blog), author name quality, and
 length of dish name.
+
+Scoring is columnar: all (review, dish) pairs are flattened once into a
+struct-of-arrays (`DishColumns`), every feature is computed over whole
+columns, and the weighted sum is written back to the dish dicts in one pass.
+Features are pluggable via `register_feature`; the default weights reproduce
+the original source + author + dish-name-length score exactly, while
+recency, review rating and mention frequency are available but weighted 0.
 """
 
 # import
+import math
+import time
 import logging
 logger = logging.getLogger(__name__)
-from typing import Dict, List, Any
+from typing import Any, Callable, Dict, List, Optional
+
+from src.normalisation.text import fold
+
+# constants
+GOOGLE_DEFAULT_POINTS = 0
+BLOG_DEFAULT_POINTS = 1000
+AUTHOR_POINTS = 10          # rewards real min. two word names for google reviewers
+DISH_NAME_CAP = 50          # cap for the cubic dish-name-length reward
+RECENCY_POINTS = 50         # points for a review written today
+RECENCY_HALF_LIFE_DAYS = 365
+RATING_POINTS_PER_STAR = 10 # relative to a neutral 3-star review
+MENTION_POINTS = 10         # per additional mention of the same dish
+
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "source": 1.0,
+    "author": 1.0,
+    "name_length": 1.0,
+    "recency": 0.0,
+    "rating": 0.0,
+    "mention_frequency": 0.0,
+}
+
 
 # helper function
 def count_words(string:str) -> int:
@@ -20,24 +51,127 @@ def count_words(string:str) -> int:
     return word_count
 
 
+# ---- Columnar layout ----
+class DishColumns:
+    """
+    Struct-of-arrays view over all (review, dish) pairs.
+    Per-review attributes are stored once per review and indexed through
+    `review_idx`, so review-level features are computed once per review.
+    """
+
+    __slots__ = ("dishes", "names", "review_idx", "source_types", "authors", "timestamps", "ratings")
+
+    def __init__(self, reviews: List[Dict[str, Any]]):
+        self.dishes: List[Dict[str, Any]] = []
+        self.names: List[str] = []
+        self.review_idx: List[int] = []
+        self.source_types: List[Optional[str]] = []
+        self.authors: List[str] = []
+        self.timestamps: List[Optional[float]] = []
+        self.ratings: List[Optional[float]] = []
+
+        for review in reviews:
+            dishes = review.get("dishes")
+            if not dishes:
+                continue
+            idx = len(self.source_types)
+            self.source_types.append(review.get("source_type"))
+            self.authors.append(review.get("author") or "")
+            self.timestamps.append(review.get("timestamp"))
+            self.ratings.append(review.get("rating"))
+            for dish in dishes:
+                self.dishes.append(dish)
+                self.names.append(dish.get("name") or "")
+                self.review_idx.append(idx)
+
+    def __len__(self) -> int:
+        return len(self.dishes)
+
+    def per_dish(self, review_values: List[float]) -> List[float]:
+        """Broadcasts one value per review to one value per dish."""
+        return [review_values[i] for i in self.review_idx]
+
+
+# ---- Features ----
+# Each feature maps the columns (and a reference time) to one float per dish.
+Feature = Callable[[DishColumns, float], List[float]]
+
+
+def _source_feature(cols: DishColumns, now: float) -> List[float]:
+    points = {"google": GOOGLE_DEFAULT_POINTS, "blog": BLOG_DEFAULT_POINTS}
+    return cols.per_dish([points.get(s, 0) for s in cols.source_types])
+
+
+def _author_feature(cols: DishColumns, now: float) -> List[float]:
+    return cols.per_dish([
+        AUTHOR_POINTS if s == "google" and count_words(a) > 1 and len(a) > 5 else 0
+        for s, a in zip(cols.source_types, cols.authors)
+    ])
+
+
+def _name_length_feature(cols: DishColumns, now: float) -> List[float]:
+    # reward more words exponentially with a cap on 4
+    return [min(len(name.split()) ** 3, DISH_NAME_CAP) for name in cols.names]
+
+
+def _recency_feature(cols: DishColumns, now: float) -> List[float]:
+    decay = math.log(2) / (RECENCY_HALF_LIFE_DAYS * 86400)
+    return cols.per_dish([
+        RECENCY_POINTS * math.exp(-decay * max(0.0, now - ts)) if ts else 0.0
+        for ts in cols.timestamps
+    ])
+
+
+def _rating_feature(cols: DishColumns, now: float) -> List[float]:
+    return cols.per_dish([
+        (r - 3) * RATING_POINTS_PER_STAR if r is not None else 0.0
+        for r in cols.ratings
+    ])
+
+
+def _mention_frequency_feature(cols: DishColumns, now: float) -> List[float]:
+    keys = [fold(name).strip() for name in cols.names]
+    counts: Dict[str, int] = {}
+    for key in keys:
+        counts[key] = counts.get(key, 0) + 1
+    return [(counts[key] - 1) * MENTION_POINTS for key in keys]
+
+
+FEATURES: Dict[str, Feature] = {
+    "source": _source_feature,
+    "author": _author_feature,
+    "name_length": _name_length_feature,
+    "recency": _recency_feature,
+    "rating": _rating_feature,
+    "mention_frequency": _mention_frequency_feature,
+}
+
+
+def register_feature(name: str, feature: Feature) -> None:
+    """Adds or replaces a scoring feature; give it a weight to use it."""
+    FEATURES[name] = feature
+
+
 # main function
-def assign_dish_scores(reviews: List[Dict[str, Any]]) -> None:
+def assign_dish_scores(
+    reviews: List[Dict[str, Any]],
+    weights: Optional[Dict[str, float]] = None,
+    log_scores: bool = False,
+    now: Optional[float] = None,
+) -> None:
     """
     Assigns scores to dishes based on review source, author name, and dish name length.
 
     Google reviews get a small author bonus; blog reviews start with higher base points.
-    Longer dish names earn extra points up to a cap. Logs all scoring steps.
+    Longer dish names earn extra points up to a cap. Extra features (recency, rating,
+    mention frequency, or any registered one) are added with their weights.
 
     Args:
         reviews: List of review dicts with 'source_type', 'author', and 'dishes'.
+        weights: Feature name -> weight; defaults to DEFAULT_WEIGHTS.
+        log_scores: If True, logs the score breakdown of every dish (slow, debugging only).
+        now: Reference unix time for recency (defaults to the current time).
     """
-    
-    # constants
-    google_default_points = 0
-    blog_default_points = 1000
-    
-    logger.info("=" * 16 + " SCORING " +"=" * 15 )
-
     if any(
         dish.get("ranking") is not None
         for review in reviews
@@ -45,32 +179,30 @@ def assign_dish_scores(reviews: List[Dict[str, Any]]) -> None:
         for dish in review["dishes"]
     ):
         logger.warning("This review set already contains ranked dishes. Skipping scoring.")
-    else:
-        for i, review in enumerate(reviews):
-                # variables
-                final_score: int = 0
-                author_p: int = 0
-                source_p: int = 0
-                dish_name_p: int = 0
-
-                # scoring source type
-                if review.get("source_type") == "google" and review.get("dishes"):
-                    source_p = google_default_points
-                    if count_words(review.get("author","")) > 1 and len(review.get("author","")) > 5:
-                        author_p = 10 # rewards real min. two word names for google reviewrs
-
-                elif review.get("source_type") == "blog" and review.get("dishes"): 
-                    source_p = blog_default_points
-
-                # scoring dish based on number of words         
-                for dish in review["dishes"]:
-                    dish_name_p = 0
-                    if dish.get("ranking") is None:
-                        dish_name = dish.get("name")
-                        word_count = len(dish_name.split())
-                        dish_name_p = min(word_count**3, 50) # reward more words exponentially with a cap on 4
-                    
-                        final_score = author_p + source_p + dish_name_p
-                        dish["ranking"] = final_score
-                        logger.info(f"SCORE: Review #{i+1} -- {final_score}p -- {dish.get('name')} -- ({source_p} +{author_p} +{dish_name_p})")  
-                logger.info("=" * 40)
\ No newline at end of file
+        return
+
+    cols = DishColumns(reviews)
+    if not len(cols):
+        return
+
+    weights = DEFAULT_WEIGHTS if weights is None else weights
+    now = time.time() if now is None else now
+
+    # compute every weighted feature column, then sum them row-wise
+    columns: Dict[str, List[float]] = {}
+    for name, weight in weights.items():
+        if weight:
+            columns[name] = [weight * v for v in FEATURES[name](cols, now)]
+
+    totals = [round(sum(row)) for row in zip(*columns.values())] if columns else [0] * len(cols)
+    for dish, total in zip(cols.dishes, totals):
+        dish["ranking"] = int(total)
+
+    if log_scores:
+        logger.info("=" * 16 + " SCORING " +"=" * 15 )
+        for i, (dish, total) in enumerate(zip(cols.dishes, totals)):
+            parts = " +".join(f"{columns[name][i]:g}" for name in columns)
+            logger.info(f"SCORE: Review #{cols.review_idx[i]+1} -- {total}p -- {dish.get('name')} -- ({parts})")
+        logger.info("=" * 40)
+
+    logger.info(f"📊 Scored {len(cols)} dishes from {len(cols.source_types)} reviews.")
@@ -0,0 +1,176 @@
+"""
+aggregation.py
+--------------
+Merges dish mentions from different reviews into one recommendation per dish.
+
+"Pizza Margherita", "margherita pizza" and "margherita" are the same dish.
+Names are canonicalised (case + diacritic folding, light plural stripping,
+token-sort keys) and then clustered:
+
+    1. identical token-sort keys merge directly
+    2. otherwise candidates come from a blocking index (token prefixes), so
+       each name is only compared with clusters sharing a block, not O(n²)
+    3. a candidate matches on high string similarity (typos, plurals), or
+       when the name's tokens are contained in exactly one candidate
+       ("margherita" → "pizza margherita", but "pizza" stays on its own when
+       several pizzas exist)
+
+Each merged recommendation carries the mention count, the summed score and
+its supporting reviews.
+
+Public:
+    - canonical_tokens(name)
+    - aggregate_mentions(mentions)
+"""
+
+import logging
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.normalisation.schemas import Recommendation
+from src.normalisation.text import fold
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+SIMILARITY_THRESHOLD = 0.88  # SequenceMatcher ratio on token-sort keys
+BLOCK_PREFIX = 4             # characters of each token used as a blocking key
+STOPWORDS = {"the", "a", "an", "with", "and", "of", "der", "die", "das", "mit", "und", "vom", "von"}
+
+
+# ----------------------------------------------------------------------
+# Canonicalisation
+# ----------------------------------------------------------------------
+def _strip_plural(token: str) -> str:
+    """Drops an English plural 's' (burgers → burger, not 'ss' words)."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def canonical_tokens(name: str) -> Tuple[str, ...]:
+    """Folded, de-pluralised, sorted tokens of a dish name without stopwords."""
+    cleaned = "".join(ch if ch.isalnum() else " " for ch in fold(name or ""))
+    tokens = {_strip_plural(t) for t in cleaned.split() if t not in STOPWORDS}
+    return tuple(sorted(tokens))
+
+
+def _blocks(tokens: Tuple[str, ...]) -> Set[str]:
+    return {t[:BLOCK_PREFIX] for t in tokens}
+
+
+# ----------------------------------------------------------------------
+# Clustering
+# ----------------------------------------------------------------------
+class _Cluster:
+    __slots__ = ("tokens", "key", "mentions")
+
+    def __init__(self, tokens: Tuple[str, ...]):
+        self.tokens = set(tokens)
+        self.key = " ".join(tokens)
+        self.mentions: List[Dict[str, Any]] = []
+
+
+def _find_cluster(
+    tokens: Tuple[str, ...],
+    key: str,
+    clusters: List[_Cluster],
+    index: Dict[str, Set[int]],
+) -> Optional[int]:
+    """Returns the matching cluster id among blocked candidates, if any."""
+    candidates: Set[int] = set()
+    for block in _blocks(tokens):
+        candidates |= index.get(block, set())
+
+    best, best_ratio = None, SIMILARITY_THRESHOLD
+    containing = []
+    token_set = set(tokens)
+    for cid in candidates:
+        cluster = clusters[cid]
+        ratio = SequenceMatcher(None, key, cluster.key).ratio()
+        if ratio >= best_ratio:
+            best, best_ratio = cid, ratio
+        if token_set <= cluster.tokens:
+            containing.append(cid)
+
+    if best is not None:
+        return best
+    if len(containing) == 1:
+        return containing[0]
+    return None
+
+
+def _review_identity(mention: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (mention.get("source"), mention.get("author"), mention.get("timestamp"), mention.get("review_link"))
+
+
+def _merge(cluster: _Cluster) -> Recommendation:
+    """Builds one recommendation from a cluster of mentions."""
+    # one supporting entry per review: keep its best-scored variant
+    per_review: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    for mention in cluster.mentions:
+        identity = _review_identity(mention)
+        kept = per_review.get(identity)
+        if kept is None or (mention.get("ranking") or 0) > (kept.get("ranking") or 0):
+            per_review[identity] = mention
+    supporting = sorted(per_review.values(), key=lambda m: -(m.get("ranking") or 0))
+
+    variants = Counter(m.get("dish_name") for m in cluster.mentions)
+    top = supporting[0]
+    display_name = max(variants, key=lambda name: (variants[name], name == top.get("dish_name")))
+
+    rankings = [m.get("ranking") for m in supporting if m.get("ranking") is not None]
+    return Recommendation(
+        dish_name=display_name,
+        ranking=sum(rankings) if rankings else None,
+        author=top.get("author"),
+        source=top.get("source"),
+        timestamp=top.get("timestamp"),
+        review_link=top.get("review_link"),
+        mention_count=len(supporting),
+        reviews=[
+            Recommendation(
+                dish_name=m.get("dish_name"),
+                ranking=m.get("ranking"),
+                author=m.get("author"),
+                source=m.get("source"),
+                timestamp=m.get("timestamp"),
+                review_link=m.get("review_link"),
+            )
+            for m in supporting
+        ],
+    )
+
+
+def aggregate_mentions(mentions: List[Dict[str, Any]]) -> List[Recommendation]:
+    """
+    Groups per-review dish mentions (REC_SCHEMA records) into one entry per
+    canonical dish. Output order is unspecified; callers sort by ranking.
+    """
+    clusters: List[_Cluster] = []
+    exact: Dict[str, int] = {}
+    index: Dict[str, Set[int]] = {}
+
+    # longest names first, so specific dishes exist before bare sub-names arrive
+    keyed = [(canonical_tokens(m.get("dish_name")), m) for m in mentions]
+    keyed.sort(key=lambda item: -len(item[0]))
+
+    for tokens, mention in keyed:
+        if not tokens:
+            continue
+        key = " ".join(tokens)
+        cid = exact.get(key)
+        if cid is None:
+            cid = _find_cluster(tokens, key, clusters, index)
+        if cid is None:
+            cid = len(clusters)
+            clusters.append(_Cluster(tokens))
+            for block in _blocks(tokens):
+                index.setdefault(block, set()).add(cid)
+        exact.setdefault(key, cid)
+        clusters[cid].mentions.append(mention)
+
+    merged = [_merge(cluster) for cluster in clusters]
+    logger.info(f"🧩 Aggregated {len(mentions)} dish mentions into {len(merged)} dishes.")
+    return merged
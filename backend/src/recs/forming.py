@@ -1,23 +1,101 @@
+import json
+import heapq
+import base64
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.normalisation.schemas import Recommendation
+from src.recs.aggregation import aggregate_mentions
 
 logger = logging.getLogger(__name__)
 
-def form_recommendations(reviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+# ---- Pagination helpers ----
+def encode_cursor(offset: int) -> str:
+    """Opaque, URL-safe cursor pointing at the next page."""
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Returns the offset stored in a cursor or raises InvalidCursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded.encode()))["o"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(offset, int) or offset < 0:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+    return offset
+
+
+def _rank_key(item: Tuple[int, Dict[str, Any]]) -> Tuple[bool, float, int]:
+    """Sort key: highest ranking first, None rankings last, ties by input order."""
+    index, rec = item
+    return (rec["ranking"] is None, -(rec["ranking"] or 0), index)
+
+
+def _select(recommendations: List[Dict[str, Any]], offset: int, limit: Optional[int]) -> List[Dict[str, Any]]:
+    """
+    Returns the sorted slice [offset, offset + limit). With a limit, only the
+    top offset + limit entries are selected with a heap (O(n log k)) instead of
+    sorting everything.
+    """
+    indexed = list(enumerate(recommendations))
+    if limit is None:
+        ordered = sorted(indexed, key=_rank_key)
+    else:
+        ordered = heapq.nsmallest(offset + limit, indexed, key=_rank_key)
+    return [rec for _, rec in ordered[offset:]]
+
+
+def form_recommendations(
+    reviews: List[Dict[str, Any]],
+    aggregate: bool = True,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+) -> List[Dict[str, Any]]:
     """
     Combines all extracted dishes from review data into a flat, sorted list.
 
-    Each dish entry includes metadata (ranking, author, source, timestamp, etc.).
+    Each dish entry is a `Recommendation` record with metadata (ranking, author, source, timestamp, etc.).
     Ensures consistent structure for downstream use in ranking or display.
+    With `aggregate`, mentions of the same dish across reviews are merged
+    into one entry with summed ranking, `mention_count` and supporting `reviews`
+    (see aggregation.py).
 
     Args:
         reviews: List of normalized review dictionaries, each possibly containing a "dishes" list.
+        aggregate: Merge mentions of the same canonical dish (default True).
+        limit: Return at most this many entries (top-K selection instead of a full sort).
+        offset: Number of top entries to skip.
+        cursor: Opaque cursor from a previous page; overrides `offset`.
 
     Returns:
         A list of dish recommendation dictionaries, sorted by ranking (ascending).
     """
+    return form_recommendation_page(reviews, aggregate, limit, offset, cursor)["recommendations"]
+
 
-    recommendations: List[Dict[str, Any]] = []
+def form_recommendation_page(
+    reviews: List[Dict[str, Any]],
+    aggregate: bool = True,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Same as `form_recommendations`, but also returns the total number of
+    recommendations and a `next_cursor` (None on the last page).
+    """
+    if cursor is not None:
+        offset = decode_cursor(cursor)
+
+    recommendations: List[Recommendation] = []
 
     for review in reviews:
         source = review.get("source", "google")
@@ -30,21 +108,40 @@ def form_recommendations(reviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             continue
 
         for dish in dishes:
-            recommendations.append({
-                "dish_name": dish.get("name"),
-                "ranking": dish.get("ranking"),
-                "author": author,
-                "source": source,
-                "timestamp": timestamp,
-                "review_link": url,
-            })
-
-    # Sort: dishes with None rankings go last
-    recommendations.sort(
-        key=lambda rec: (rec["ranking"] is None, -(rec["ranking"] or 0))
-    )
-
-    logger.info(f"🍽️ Generated {len(recommendations)} recommendations from {len(reviews)} reviews.")
-    logger.info(f"🍽️ Sorted dish scores are {[rec.get('ranking','') for rec in recommendations]}.")
-    
-    return recommendations
+            recommendations.append(Recommendation(
+                dish_name=dish.get("name"),
+                ranking=dish.get("ranking"),
+                author=author,
+                source=source,
+                timestamp=timestamp,
+                review_link=url,
+            ))
+
+    mention_count = len(recommendations)
+    if aggregate:
+        recommendations = aggregate_mentions(recommendations)
+
+    page = paginate(recommendations, limit, offset)
+
+    logger.info(f"🍽️ Generated {page['total']} recommendations from {mention_count} mentions in {len(reviews)} reviews, returning {len(page['recommendations'])}.")
+    logger.debug(f"🍽️ Top dish scores are {[rec.get('ranking','') for rec in page['recommendations'][:10]]}.")
+
+    return page
+
+
+def paginate(
+    recommendations: List[Dict[str, Any]],
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> Dict[str, Any]:
+    """
+    Sorts / selects one page of already formed recommendations (e.g. from
+    the result store). Dishes with None rankings go last.
+    """
+    total = len(recommendations)
+    has_more = limit is not None and offset + limit < total
+    return {
+        "recommendations": _select(recommendations, offset, limit),
+        "total": total,
+        "next_cursor": encode_cursor(offset + limit) if has_more else None,
+    }
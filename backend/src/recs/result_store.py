@@ -0,0 +1,277 @@
+"""
+result_store.py
+---------------
+Store of precomputed recommendations per place, so the API can answer from
+a lookup instead of rerunning the LLM pipeline on every request.
+
+Each entry holds the restaurant info, the full ranked recommendation list
+(unpaginated, as returned by `form_recommendations`) and a fingerprint of
+the reviews it was computed from. An entry older than RESULT_TTL is stale:
+it is still served, but triggers a background refresh (see pipeline.py).
+A refresh whose reviews hash to the same fingerprint only renews the entry
+(and its restaurant info) and skips extraction entirely.
+
+The methods are blocking (SQLite I/O, JSON encoding, deep copies); async
+callers run them with `asyncio.to_thread`.
+
+Config (environment):
+    RESULT_STORE        "sqlite" (default), "memory" or "none"
+    RESULT_STORE_PATH   SQLite file path
+    RESULT_TTL          seconds before an entry is refreshed in the background
+
+Public:
+    - review_fingerprint(reviews, salt)
+    - ResultStore, MemoryResultStore, SQLiteResultStore
+    - get_result_store(), set_result_store(store)
+"""
+
+import os
+import abc
+import copy
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from src.metrics import CACHE_LOOKUPS
+from src.normalisation.schemas import json_default
+
+logger = logging.getLogger(__name__)
+
+# ---- Config ----
+RESULT_STORE = os.getenv("RESULT_STORE", "sqlite").lower()
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", ".cache/dishtip_results.sqlite3")
+RESULT_TTL = float(os.getenv("RESULT_TTL", str(6 * 3600)))  # seconds
+
+
+# ----------------------------------------------------------------------
+# Fingerprints
+# ----------------------------------------------------------------------
+def review_fingerprint(reviews: List[Dict[str, Any]], salt: str = "") -> str:
+    """
+    Order-independent hash of the review set. `salt` should name the
+    extraction model and prompt version, so a model change invalidates
+    stored results as well.
+    """
+    parts = sorted(
+        "\x1f".join(str(review.get(field) or "") for field in ("source", "author", "timestamp", "text"))
+        for review in reviews
+    )
+    payload = "\x1e".join([salt, *parts])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Backends
+# ----------------------------------------------------------------------
+class ResultStore(abc.ABC):
+    """
+    Interface for result stores. Entries are dicts with place_id,
+    fingerprint, restaurant_info, recommendations and computed_at.
+    """
+
+    def __init__(self, ttl: float = RESULT_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @abc.abstractmethod
+    def get(self, place_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abc.abstractmethod
+    def put(
+        self,
+        place_id: str,
+        fingerprint: str,
+        restaurant_info: Dict[str, Any],
+        recommendations: List[Dict[str, Any]],
+    ) -> None:
+        ...
+
+    @abc.abstractmethod
+    def touch(self, place_id: str, restaurant_info: Dict[str, Any]) -> None:
+        """
+        Marks an entry as freshly computed (reviews unchanged) and stores the
+        latest restaurant info (opening hours, rating, ... may still change).
+        """
+
+    def is_stale(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry["computed_at"] >= self.ttl
+
+    def _count(self, entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        CACHE_LOOKUPS.inc(cache="result", result="miss" if entry is None else "hit")
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class NullResultStore(ResultStore):
+    """Never stores anything; every request runs the pipeline."""
+
+    def get(self, place_id: str) -> Optional[Dict[str, Any]]:
+        return self._count(None)
+
+    def put(self, place_id, fingerprint, restaurant_info, recommendations) -> None:
+        pass
+
+    def touch(self, place_id: str, restaurant_info: Dict[str, Any]) -> None:
+        pass
+
+
+class MemoryResultStore(ResultStore):
+    """Process-local store; callers get deep copies."""
+
+    def __init__(self, ttl: float = RESULT_TTL):
+        super().__init__(ttl)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, place_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(place_id)
+            entry = copy.deepcopy(entry) if entry is not None else None
+        return self._count(entry)
+
+    def put(self, place_id, fingerprint, restaurant_info, recommendations) -> None:
+        with self._lock:
+            self._entries[place_id] = copy.deepcopy({
+                "place_id": place_id,
+                "fingerprint": fingerprint,
+                "restaurant_info": restaurant_info,
+                "recommendations": recommendations,
+                "computed_at": time.time(),
+            })
+        self.writes += 1
+
+    def touch(self, place_id: str, restaurant_info: Dict[str, Any]) -> None:
+        with self._lock:
+            entry = self._entries.get(place_id)
+            if entry is not None:
+                entry["restaurant_info"] = copy.deepcopy(restaurant_info)
+                entry["computed_at"] = time.time()
+
+
+class SQLiteResultStore(ResultStore):
+    """SQLite-backed store shared between workers via WAL mode."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            place_id        TEXT PRIMARY KEY,
+            fingerprint     TEXT NOT NULL,
+            restaurant_info TEXT NOT NULL,
+            recommendations TEXT NOT NULL,
+            computed_at     REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str = RESULT_STORE_PATH, ttl: float = RESULT_TTL):
+        super().__init__(ttl)
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+
+    def get(self, place_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, restaurant_info, recommendations, computed_at FROM results WHERE place_id = ?",
+                (place_id,),
+            ).fetchone()
+        if row is None:
+            return self._count(None)
+        fingerprint, restaurant_info, recommendations, computed_at = row
+        return self._count({
+            "place_id": place_id,
+            "fingerprint": fingerprint,
+            "restaurant_info": json.loads(restaurant_info),
+            "recommendations": json.loads(recommendations),
+            "computed_at": computed_at,
+        })
+
+    def put(self, place_id, fingerprint, restaurant_info, recommendations) -> None:
+        payload = (
+            json.dumps(restaurant_info, ensure_ascii=False, default=json_default),
+            json.dumps(recommendations, ensure_ascii=False, default=json_default),
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (place_id, fingerprint, restaurant_info, recommendations, computed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (place_id, fingerprint, *payload, time.time()),
+            )
+        self.writes += 1
+
+    def touch(self, place_id: str, restaurant_info: Dict[str, Any]) -> None:
+        payload = json.dumps(restaurant_info, ensure_ascii=False, default=json_default)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE results SET restaurant_info = ?, computed_at = ? WHERE place_id = ?",
+                (payload, time.time(), place_id),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        stats.update({"path": self.path, "entries": entries, "ttl": self.ttl})
+        return stats
+
+
+# ----------------------------------------------------------------------
+# Shared instance
+# ----------------------------------------------------------------------
+_store: Optional[ResultStore] = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """
+    Returns the process-wide store configured by RESULT_STORE, falling back
+    to memory if the SQLite file cannot be opened.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if RESULT_STORE == "none":
+                    _store = NullResultStore()
+                elif RESULT_STORE == "memory":
+                    _store = MemoryResultStore()
+                else:
+                    try:
+                        _store = SQLiteResultStore()
+                    except (sqlite3.Error, OSError) as e:
+                        logger.warning(f"⚠️ Could not open result store at {RESULT_STORE_PATH} ({e}), using memory.")
+                        _store = MemoryResultStore()
+                logger.info(f"🗄️ Result store: {type(_store).__name__}")
+    return _store
+
+
+def set_result_store(store: ResultStore) -> None:
+    """Overrides the shared store (tests, notebooks, offline jobs)."""
+    global _store
+    _store = store
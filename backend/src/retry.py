@@ -0,0 +1,32 @@
+"""
+retry.py
+--------
+Retry helpers shared by the upstream clients (Google Places, OpenAI), so
+the fetch layer does not depend on the NLP backend or the other way round.
+
+Public:
+    - backoff_delay(attempt)
+    - retry_after(exc)
+"""
+
+import random
+from typing import Optional
+
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_CAP = 20.0  # seconds
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2**attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_after(exc: Exception) -> Optional[float]:
+    """Reads a Retry-After header (seconds) from an HTTP / API error, if present."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,54 @@
+"""
+Shared fixtures. Google Places is served by the in-process stub
+(src/fetch/places_stub.py) from the recorded benchmark payloads, OpenAI by
+the benchmarks' FakeLLM, and every store lives in memory, so the suite runs
+offline and leaves no cache files behind.
+"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# stores are picked from the environment when first used
+os.environ.setdefault("EXTRACTION_STORE", "memory")
+os.environ.setdefault("RESULT_STORE", "memory")
+os.environ.setdefault("PLACE_INDEX", "memory")
+
+import pytest
+
+from benchmarks.fake_llm import FakeLLM
+from src.fetch.place_cache import place_cache
+from src.fetch.place_index import PlaceIndex, set_place_index
+from src.fetch.places_client import set_places_client
+from src.fetch.places_stub import make_stub_app, stub_client
+from src.nlp.extraction_store import MemoryExtractionStore, set_extraction_store
+from src.nlp.extractor_openai import set_backend
+from src.nlp.prefilter import set_prefilter
+from src.nlp.scheduler import ExtractionScheduler, set_scheduler
+from src.recs.result_store import MemoryResultStore, set_result_store
+
+FIXTURES_DIR = os.path.join(BACKEND_DIR, "benchmarks", "fixtures")
+
+
+@pytest.fixture
+def places_stub():
+    """The stub Places app; tests change `app.state` to inject latency or failures."""
+    return make_stub_app(FIXTURES_DIR)
+
+
+@pytest.fixture(autouse=True)
+def offline_app(places_stub):
+    """Fresh in-memory stores, the stub Places client and a fake LLM for every test."""
+    set_places_client(stub_client(FIXTURES_DIR, app=places_stub, client_options={"max_retries": 0}))
+    set_extraction_store(MemoryExtractionStore())
+    set_result_store(MemoryResultStore())
+    set_place_index(PlaceIndex())
+    set_prefilter(None)
+    set_scheduler(ExtractionScheduler())
+    llm = FakeLLM()
+    set_backend(llm)
+    place_cache.invalidate()
+    yield llm
+    place_cache.invalidate()
@@ -0,0 +1,72 @@
+from src.normalisation.schemas import Recommendation
+from src.recs.aggregation import aggregate_mentions, canonical_tokens
+
+
+def mention(name, author="Anna Berg", ranking=10, link=None):
+    return Recommendation(
+        dish_name=name, ranking=ranking, author=author, source="google",
+        timestamp=1700000000, review_link=link or f"https://example.com/{author}",
+    )
+
+
+def by_name(recs):
+    return {rec["dish_name"]: rec for rec in recs}
+
+
+def test_canonical_tokens_fold_sort_and_strip_plurals():
+    assert canonical_tokens("Pizza Margherita") == canonical_tokens("margherita pizza")
+    assert canonical_tokens("Crème Brûlée") == ("brulee", "creme")
+    assert canonical_tokens("The Burgers with Fries") == ("burger", "frie")
+    assert canonical_tokens("Kiss") == ("kiss",)
+    assert canonical_tokens("") == ()
+    assert canonical_tokens(None) == ()
+
+
+def test_name_variants_of_one_dish_merge():
+    recs = aggregate_mentions([
+        mention("Pizza Margherita", author="Anna Berg", ranking=10),
+        mention("margherita pizza", author="Ben Cole", ranking=5),
+        mention("Margherita", author="Cleo Dunn", ranking=3),
+        mention("pizza margheritta", author="Dan Ernst", ranking=1),  # typo
+    ])
+    assert len(recs) == 1
+    rec = recs[0]
+    assert rec["mention_count"] == 4
+    assert rec["ranking"] == 19
+    assert rec["author"] == "Anna Berg"  # best-scored supporting review
+    assert [r["author"] for r in rec["reviews"]] == ["Anna Berg", "Ben Cole", "Cleo Dunn", "Dan Ernst"]
+
+
+def test_bare_sub_name_stays_separate_when_ambiguous():
+    recs = by_name(aggregate_mentions([
+        mention("Pizza Margherita", author="Anna Berg"),
+        mention("Pizza Diavola", author="Ben Cole"),
+        mention("Pizza", author="Cleo Dunn"),
+    ]))
+    assert set(recs) == {"Pizza Margherita", "Pizza Diavola", "Pizza"}
+    assert all(rec["mention_count"] == 1 for rec in recs.values())
+
+
+def test_one_review_counts_once_with_its_best_variant():
+    recs = aggregate_mentions([
+        mention("Schnitzel", author="Anna Berg", ranking=1),
+        mention("schnitzels", author="Anna Berg", ranking=8),
+        mention("Schnitzel", author="Ben Cole", ranking=2),
+    ])
+    assert len(recs) == 1
+    rec = recs[0]
+    assert rec["mention_count"] == 2
+    assert rec["ranking"] == 10
+    assert rec["dish_name"] == "Schnitzel"  # most frequent variant
+    assert [r["ranking"] for r in rec["reviews"]] == [8, 2]
+
+
+def test_unranked_mentions_and_empty_names():
+    recs = aggregate_mentions([
+        mention("Tiramisu", ranking=None),
+        mention("tiramisu", author="Ben Cole", ranking=None),
+        mention("", author="Cleo Dunn"),
+    ])
+    assert len(recs) == 1
+    assert recs[0]["ranking"] is None
+    assert recs[0]["mention_count"] == 2
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+from conftest import FIXTURES_DIR
+from src.batch import JsonlWriter, load_checkpoint, read_place_ids, run_batch
+from src.fetch.fixtures import PlaceFixtures
+from src.nlp.extractor_openai import set_backend
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_read_place_ids_skips_comments_blanks_and_duplicates():
+    lines = ["# city centre\n", "a\n", "\n", "b  # second\n", "a\n", "   c\n"]
+    assert read_place_ids(lines) == ["a", "b", "c"]
+
+
+def test_missing_checkpoint_is_empty(tmp_path):
+    assert load_checkpoint(str(tmp_path / "none.checkpoint")) == set()
+
+
+def test_run_batch_checkpoints_written_places_and_resumes(tmp_path):
+    output = str(tmp_path / "out.jsonl")
+    checkpoint = output + ".checkpoint"
+    errors = output + ".errors.jsonl"
+    place_ids = ["bench_small", "unknown_place", "bench_large"]
+    fetch = PlaceFixtures(FIXTURES_DIR).load
+
+    def run():
+        writer = JsonlWriter(output)
+        try:
+            return asyncio.run(run_batch(
+                place_ids, writer, fetch, concurrency=2, checkpoint_path=checkpoint, errors_path=errors, limit=5,
+            ))
+        finally:
+            writer.close()
+
+    assert run() == {"done": 2, "failed": 1, "skipped": 0}
+    rows = read_jsonl(output)
+    assert sorted(row["place_id"] for row in rows) == ["bench_large", "bench_small"]
+    assert all(row["restaurant_info"] and 0 < len(row["recommendations"]) <= 5 for row in rows)
+    assert load_checkpoint(checkpoint) == {"bench_small", "bench_large"}
+    assert [e["place_id"] for e in read_jsonl(errors)] == ["unknown_place"]
+    assert read_jsonl(errors)[0]["error"].startswith("FileNotFoundError")
+
+    # resumed run: finished places are skipped, the failed one is retried
+    assert run() == {"done": 0, "failed": 1, "skipped": 2}
+    assert len(read_jsonl(output)) == 2
+    assert len(read_jsonl(errors)) == 2
+
+
+class FailingLLM:
+    async def complete(self, prompt, text_format=None):
+        raise RuntimeError("LLM down")
+
+
+def test_failed_extraction_is_not_checkpointed(tmp_path):
+    set_backend(FailingLLM())
+    output = str(tmp_path / "out.jsonl")
+    writer = JsonlWriter(output)
+    try:
+        counts = asyncio.run(run_batch(
+            ["bench_small"], writer, PlaceFixtures(FIXTURES_DIR).load,
+            checkpoint_path=output + ".checkpoint", errors_path=output + ".errors.jsonl",
+        ))
+    finally:
+        writer.close()
+    assert counts == {"done": 0, "failed": 1, "skipped": 0}
+    assert load_checkpoint(output + ".checkpoint") == set()
+    assert read_jsonl(output) == []
@@ -0,0 +1,41 @@
+import json
+import os
+
+import pytest
+from pydantic import ValidationError
+
+from conftest import FIXTURES_DIR
+from src.normalisation.bulk import normalise_reviews, parse_timestamp
+
+
+@pytest.fixture(scope="module")
+def raw_reviews():
+    with open(os.path.join(FIXTURES_DIR, "places", "bench_large.json"), encoding="utf-8") as f:
+        return json.load(f)["reviews"]
+
+
+def test_fast_and_strict_paths_produce_the_same_records(raw_reviews):
+    fast = normalise_reviews(raw_reviews)
+    strict = normalise_reviews(raw_reviews, strict=True)
+    assert [r.to_dict() for r in fast] == [r.to_dict() for r in strict]
+    assert all(type(r.url) is str for r in strict if r.url is not None)
+    assert any(r.url for r in strict)
+
+
+def test_strict_path_raises_on_malformed_url():
+    raw = [{"text": {"text": "Great pizza"}, "googleMapsUri": "not a url"}]
+    assert normalise_reviews(raw)[0].url is None
+    with pytest.raises(ValidationError):
+        normalise_reviews(raw, strict=True)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-02-18T12:00:00.123456789Z", 1708257600),
+    ("2024-02-18T14:00:00+02:00", 1708257600),
+    ("2024-02-18T12:00:00", 1708257600),
+    (1708257600.9, 1708257600),
+    ("yesterday", None),
+    (None, None),
+])
+def test_parse_timestamp(value, expected):
+    assert parse_timestamp(value) == expected
@@ -0,0 +1,71 @@
+import pytest
+
+from src.nlp.chunking import (
+    approx_tokens, conservative_tokens, get_token_counter, iter_chunks, iter_sentences,
+    normalise_dish_names, parse_dish_list,
+)
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def test_short_review_yields_its_normalised_text():
+    assert list(iter_chunks("  The schnitzel\n was   great.  ")) == ["The schnitzel was great."]
+    assert list(iter_chunks("   ")) == []
+
+
+def test_sentences_are_packed_within_the_budget():
+    text = "One two three. Four five. Six seven eight nine. Ten."
+    chunks = list(iter_chunks(text, max_tokens=5, count_tokens=count_words))
+    assert chunks == ["One two three. Four five.", "Six seven eight nine. Ten."]
+    assert all(count_words(c) <= 5 for c in chunks)
+
+
+def test_oversized_first_sentence_is_split_at_word_boundaries():
+    sentence = " ".join(f"word{i:02d}" for i in range(20)) + "."
+    chunks = list(iter_chunks(sentence + " Short one.", max_tokens=6, count_tokens=count_words))
+    assert all(chunks) and all(count_words(c) <= 6 for c in chunks)
+    assert " ".join(chunks).split() == (sentence + " Short one.").split()  # nothing lost or cut mid-word
+    assert chunks[0].startswith("word00 word01")
+
+
+def test_single_word_longer_than_the_budget_is_cut():
+    chunks = list(iter_chunks("x" * 100, max_tokens=5, count_tokens=approx_tokens))
+    assert "".join(chunks) == "x" * 100
+    assert all(approx_tokens(c) <= 6 for c in chunks)
+
+
+def test_overlap_repeats_trailing_sentences():
+    text = "A a. B b. C c. D d."
+    chunks = list(iter_chunks(text, max_tokens=4, overlap=2, count_tokens=count_words))
+    assert chunks == ["A a. B b.", "B b. C c.", "C c. D d."]
+
+
+def test_streaming_source_matches_whole_text():
+    text = "The soup was hot. The bread was fresh! Would we come back? Yes."
+    pieces = [text[i:i + 7] for i in range(0, len(text), 7)]
+    assert list(iter_sentences(pieces)) == list(iter_sentences(text))
+    assert list(iter_chunks(pieces, max_tokens=8, count_tokens=count_words)) == \
+        list(iter_chunks(text, max_tokens=8, count_tokens=count_words))
+
+
+def test_token_counters():
+    assert approx_tokens("x" * 40) == 11
+    assert conservative_tokens("x" * 40) == 21
+    assert get_token_counter(None) is approx_tokens
+
+
+@pytest.mark.parametrize("output, dishes", [
+    ("Schnitzel, pizza margherita , schnitzel", ["pizza margherita", "schnitzel"]),
+    ("none", []),
+    (" None ", []),
+    ("", []),
+    ("risotto, none,", ["risotto"]),
+])
+def test_parse_dish_list(output, dishes):
+    assert parse_dish_list(output) == dishes
+
+
+def test_normalise_dish_names():
+    assert normalise_dish_names([" Tiramisu", "tiramisu", "", "NONE"]) == ["tiramisu"]
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.nlp.extraction_store import (
+    ExtractionStore,
+    MemoryExtractionStore,
+    SQLiteExtractionStore,
+    make_extraction_key,
+    normalise_chunk,
+)
+
+
+def test_keys_ignore_case_and_whitespace():
+    assert normalise_chunk("  Great   Schnitzel\n") == "great schnitzel"
+    assert make_extraction_key("m", "v1", "Great  Schnitzel") == make_extraction_key("m", "v1", "great schnitzel")
+    assert make_extraction_key("m", "v1", "x") != make_extraction_key("m", "v2", "x")
+
+
+def test_sqlite_store_survives_reopening(tmp_path):
+    path = str(tmp_path / "extractions.sqlite3")
+    store = SQLiteExtractionStore(path)
+    store.put_many([("a", ["schnitzel"]), ("b", [])], "model")
+    reopened = SQLiteExtractionStore(path)
+    assert reopened.get_many(["a", "b", "c"]) == {"a": ["schnitzel"], "b": []}
+    assert reopened.get("c") is None
+    assert (reopened.hits, reopened.misses) == (2, 2)
+
+
+def test_sqlite_store_evicts_least_recently_used(tmp_path):
+    store = SQLiteExtractionStore(str(tmp_path / "extractions.sqlite3"), max_bytes=2000)
+    store._EVICT_CHECK_EVERY = 1
+    for i in range(100):
+        store.put(f"key-{i:03d}", ["dish " * 5])
+    stats = store.stats()
+    assert stats["bytes"] <= 2000
+    assert store.get("key-099") is not None and store.get("key-000") is None
+
+
+def test_old_hits_queue_one_batched_touch(tmp_path):
+    store = SQLiteExtractionStore(str(tmp_path / "extractions.sqlite3"))
+    store.put("a", ["schnitzel"])
+    old = time.time() - 2 * store._TOUCH_AFTER
+    store._conn.execute("UPDATE extractions SET last_access = ?", (old,))
+
+    threads = [threading.Thread(target=store.get, args=("a",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert list(store._pending_touches) == ["a"]
+
+    store.put("b", [])  # flushes queued touches
+    assert store._pending_touches == {}
+    last_access = store._conn.execute("SELECT last_access FROM extractions WHERE key = 'a'").fetchone()[0]
+    assert last_access > old
+
+
+def test_async_access_runs_blocking_stores_in_a_thread(tmp_path):
+    store = SQLiteExtractionStore(str(tmp_path / "extractions.sqlite3"))
+    loop_thread = threading.get_ident()
+    seen = []
+    put_many = store.put_many
+
+    def recording_put_many(entries, model_name=""):
+        seen.append(threading.get_ident())
+        put_many(entries, model_name)
+
+    store.put_many = recording_put_many
+
+    async def run():
+        await store.aput_many([("a", ["rösti"])], "model")
+        return await store.aget_many(["a", "b"])
+
+    assert asyncio.run(run()) == {"a": ["rösti"]}
+    assert seen and seen[0] != loop_thread
+
+
+def test_memory_store_is_bounded():
+    store = MemoryExtractionStore(max_entries=2)
+    store.put_many([("a", ["x"]), ("b", ["y"]), ("c", ["z"])])
+    assert store.get_many(["a", "b", "c"]) == {"b": ["y"], "c": ["z"]}
+
+
+def test_extraction_store_is_abstract():
+    with pytest.raises(TypeError):
+        ExtractionStore()
@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+import pytest
+
+from src.nlp import extractor_openai, prefilter
+from src.nlp.extraction_store import get_extraction_store, make_extraction_key, make_review_key
+from src.nlp.extractor_openai import (
+    extract_dishes_openai,
+    make_batch_prompt,
+    pack_batches,
+    parse_batch_output,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_prefilter(monkeypatch):
+    monkeypatch.setattr(prefilter, "PREFILTER_ENABLED", False)
+
+
+def _dishes(reviews):
+    return [sorted(d.name for d in r["dishes"]) for r in reviews]
+
+
+def test_parse_batch_output_normalises_names():
+    output = json.dumps({"c0": [" Schnitzel ", "none", "schnitzel"], "c1": []})
+    assert parse_batch_output(output, ["c0", "c1"]) == {"c0": ["schnitzel"], "c1": []}
+
+
+@pytest.mark.parametrize("output", [
+    "not json",
+    json.dumps({"c0": []}),                      # missing c1
+    json.dumps({"c0": [], "c1": [], "c2": []}),  # unexpected id
+    json.dumps({"c0": "schnitzel", "c1": []}),   # not a list
+    json.dumps({"c0": [1], "c1": []}),           # not strings
+])
+def test_parse_batch_output_rejects_malformed_answers(output):
+    with pytest.raises(ValueError):
+        parse_batch_output(output, ["c0", "c1"])
+
+
+def test_pack_batches_respects_budget_and_keeps_oversized_chunks():
+    chunks = ["a" * 400, "b" * 400, "c" * 4000, "d" * 40]
+    assert pack_batches(chunks, token_budget=250) == [["a" * 400, "b" * 400], ["c" * 4000], ["d" * 40]]
+    assert pack_batches(["x"] * 5, max_chunks=2) == [["x", "x"], ["x", "x"], ["x"]]
+
+
+def test_batch_prompt_lists_every_chunk_id():
+    prompt = make_batch_prompt([("c0", "Great schnitzel."), ("c1", "Nice risotto.")])
+    assert "[c0]\nGreat schnitzel." in prompt and "[c1]\nNice risotto." in prompt
+
+
+def test_reviews_share_one_batched_call(offline_app):
+    reviews = [{"text": "The schnitzel was great."}, {"text": "We loved the risotto."}]
+    result = asyncio.run(extract_dishes_openai(reviews))
+    assert _dishes(result) == [["schnitzel"], ["risotto"]]
+    assert offline_app.calls == 1
+
+
+def test_malformed_batch_falls_back_to_per_chunk_calls(offline_app, monkeypatch):
+    complete = offline_app.complete
+
+    async def broken_batches(prompt, text_format=None):
+        if text_format is not None:
+            offline_app.calls += 1
+            return "{not json"
+        return await complete(prompt)
+
+    monkeypatch.setattr(offline_app, "complete", broken_batches)
+    reviews = [{"text": "The schnitzel was great."}, {"text": "We loved the risotto."}]
+    result = asyncio.run(extract_dishes_openai(reviews))
+    assert _dishes(result) == [["schnitzel"], ["risotto"]]
+    assert offline_app.calls == 3  # one malformed batch + one call per chunk
+
+
+def test_batch_answers_are_cached_under_their_own_prompt_version(offline_app, monkeypatch):
+    chunk = "The schnitzel was great."
+    asyncio.run(extract_dishes_openai([{"text": chunk}]))
+    store = get_extraction_store()
+    batch_key = make_extraction_key(extractor_openai.MODEL_NAME, extractor_openai.BATCH_PROMPT_VERSION, chunk)
+    single_key = make_extraction_key(extractor_openai.MODEL_NAME, extractor_openai.PROMPT_VERSION, chunk)
+    assert store.get(batch_key) == ["schnitzel"] and store.get(single_key) is None
+
+    asyncio.run(extract_dishes_openai([{"text": chunk}]))
+    assert offline_app.calls == 1
+
+    monkeypatch.setattr(extractor_openai, "BATCH_PROMPT_VERSION", "b-next")
+    asyncio.run(extract_dishes_openai([{"text": chunk}]))
+    assert offline_app.calls == 2  # a new batch prompt invalidates only batched answers
+
+
+def _review_key(review_id):
+    return make_review_key(extractor_openai.MODEL_NAME, extractor_openai.ANSWERS_VERSION, review_id)
+
+
+def test_indexed_reviews_skip_chunking(offline_app):
+    reviews = [{"id": "r1", "text": "The schnitzel was great."}, {"id": "r2", "text": "We loved the risotto."}]
+    asyncio.run(extract_dishes_openai(reviews))
+    store = get_extraction_store()
+    assert store.get(_review_key("r1")) == ["schnitzel"]
+
+    # the index answers even if the chunk cache would say otherwise
+    store.put(_review_key("r1"), ["wiener schnitzel"])
+    again = [{"id": "r1", "text": "The schnitzel was great."}, {"id": "r3", "text": "Nice risotto."}]
+    assert _dishes(asyncio.run(extract_dishes_openai(again))) == [["wiener schnitzel"], ["risotto"]]
+    assert offline_app.calls == 2  # only r3 reached the model
+
+
+def test_failed_reviews_stay_out_of_the_index(offline_app, monkeypatch):
+    async def down(prompt, text_format=None):
+        raise RuntimeError("LLM down")
+
+    monkeypatch.setattr(offline_app, "complete", down)
+    reviews = [{"id": "r1", "text": "The schnitzel was great."}]
+    assert _dishes(asyncio.run(extract_dishes_openai(reviews))) == [[]]
+    assert get_extraction_store().get(_review_key("r1")) is None
@@ -0,0 +1,84 @@
+import pytest
+
+from src.normalisation.schemas import DishRecord
+from src.recs.forming import (
+    InvalidCursor, decode_cursor, encode_cursor, form_recommendation_page, form_recommendations, paginate,
+)
+
+
+def make_reviews(rankings):
+    return [
+        {"author": f"Author {i}", "url": f"https://example.com/{i}", "timestamp": 1700000000 + i,
+         "source": "google", "dishes": [DishRecord(f"Dish {i}", ranking)]}
+        for i, ranking in enumerate(rankings)
+    ]
+
+
+def names(recs):
+    return [rec["dish_name"] for rec in recs]
+
+
+def test_sorted_by_ranking_with_none_last_and_stable_ties():
+    reviews = make_reviews([5, None, 9, 5, 1])
+    assert names(form_recommendations(reviews, aggregate=False)) == ["Dish 2", "Dish 0", "Dish 3", "Dish 4", "Dish 1"]
+
+
+def test_top_k_matches_full_sort():
+    rankings = [(i * 37) % 101 for i in range(200)] + [None, None]
+    reviews = make_reviews(rankings)
+    full = names(form_recommendations(reviews, aggregate=False))
+    assert names(form_recommendations(reviews, aggregate=False, limit=10)) == full[:10]
+    assert names(form_recommendations(reviews, aggregate=False, limit=10, offset=195)) == full[195:]
+
+
+def test_cursor_pages_cover_everything_once():
+    reviews = make_reviews([3, 8, None, 1, 8, 6, 2])
+    full = names(form_recommendations(reviews, aggregate=False))
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = form_recommendation_page(reviews, aggregate=False, limit=3, cursor=cursor)
+        assert page["total"] == 7
+        seen += names(page["recommendations"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == full
+    assert pages == 3
+
+
+def test_cursor_round_trip():
+    for offset in (0, 1, 20, 12345):
+        cursor = encode_cursor(offset)
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == offset
+
+
+@pytest.mark.parametrize("cursor", ["", "!!!", "bm9wZQ", encode_cursor(-1), "eyJvIjogIngifQ"])
+def test_invalid_cursor_raises(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_paginate_formed_recommendations():
+    recs = [{"dish_name": name, "ranking": rank} for name, rank in [("a", 1), ("b", 3), ("c", None), ("d", 2)]]
+    page = paginate(recs, limit=2)
+    assert names(page["recommendations"]) == ["b", "d"]
+    assert page["total"] == 4
+    assert decode_cursor(page["next_cursor"]) == 2
+
+    last = paginate(recs, limit=2, offset=2)
+    assert names(last["recommendations"]) == ["a", "c"]
+    assert last["next_cursor"] is None
+    assert names(paginate(recs)["recommendations"]) == ["b", "d", "a", "c"]
+
+
+def test_aggregated_page_counts_dishes():
+    reviews = make_reviews([4, 6])
+    for review in reviews:
+        review["dishes"] = [DishRecord("Pizza Margherita", review["dishes"][0]["ranking"])]
+    page = form_recommendation_page(reviews, limit=5)
+    assert page["total"] == 1
+    assert page["recommendations"][0]["ranking"] == 10
+    assert page["recommendations"][0]["mention_count"] == 2
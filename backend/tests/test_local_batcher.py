@@ -0,0 +1,97 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from src.nlp import local_batcher
+from src.nlp.local_batcher import MicroBatcher
+
+
+def echo(prompts):
+    return [p.upper() for p in prompts]
+
+
+def test_concurrent_callers_share_batches():
+    batches = []
+
+    def generate(prompts):
+        batches.append(list(prompts))
+        return echo(prompts)
+
+    batcher = MicroBatcher(window_ms=20, max_prompts=32, executor=ThreadPoolExecutor(1), generate_fn=generate)
+
+    async def run():
+        return await asyncio.gather(batcher.generate(["a", "b"]), batcher.generate(["c"]), batcher.submit("d"))
+
+    try:
+        assert asyncio.run(run()) == [["A", "B"], ["C"], "D"]
+    finally:
+        batcher.close()
+    assert len(batches) == 1 and sorted(batches[0]) == ["a", "b", "c", "d"]
+    assert batcher.stats()["avg_batch_size"] == 4
+
+
+def test_full_batches_are_split_at_max_prompts():
+    sizes = []
+
+    def generate(prompts):
+        sizes.append(len(prompts))
+        return echo(prompts)
+
+    batcher = MicroBatcher(window_ms=200, max_prompts=3, executor=ThreadPoolExecutor(1), generate_fn=generate)
+
+    async def run():
+        return await batcher.generate([str(i) for i in range(7)])
+
+    try:
+        assert asyncio.run(asyncio.wait_for(run(), 5)) == [str(i) for i in range(7)]
+    finally:
+        batcher.close()
+    assert sizes[:2] == [3, 3] and sum(sizes) == 7
+
+
+def test_failed_batch_fails_every_caller():
+    def generate(prompts):
+        raise RuntimeError("model crashed")
+
+    batcher = MicroBatcher(window_ms=5, executor=ThreadPoolExecutor(1), generate_fn=generate)
+
+    async def run():
+        return await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        batcher.close()
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_dead_worker_process_is_replaced(monkeypatch):
+    executors = []
+
+    def make_executor():
+        executors.append(ThreadPoolExecutor(1))
+        return executors[-1]
+
+    calls = []
+
+    def generate(prompts):
+        calls.append(prompts)
+        if len(calls) == 1:
+            raise BrokenProcessPool("worker killed")
+        return echo(prompts)
+
+    monkeypatch.setattr(local_batcher, "_make_executor", make_executor)
+    batcher = MicroBatcher(window_ms=5, generate_fn=generate)
+
+    async def run():
+        with pytest.raises(BrokenProcessPool):
+            await batcher.submit("a")
+        return await batcher.submit("b")
+
+    try:
+        assert asyncio.run(run()) == "B"
+    finally:
+        batcher.close()
+    assert len(executors) == 2
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from src.nlp import local_engine
+from src.nlp.local_engine import LocalEngine, available_cores, cgroup_cpu_limit, onnx_export_dir
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return str(path)
+
+
+@pytest.mark.parametrize("cpu_max, expected", [
+    ("200000 100000\n", 2),
+    ("150000 100000\n", 1),
+    ("50000 100000\n", 1),
+    ("max 100000\n", None),
+])
+def test_cgroup_v2_quota(tmp_path, cpu_max, expected):
+    v2 = _write(tmp_path / "cpu.max", cpu_max)
+    assert cgroup_cpu_limit(v2, str(tmp_path / "missing")) == expected
+
+
+def test_cgroup_v1_quota(tmp_path):
+    _write(tmp_path / "cpu" / "cpu.cfs_quota_us", "400000\n")
+    _write(tmp_path / "cpu" / "cpu.cfs_period_us", "100000\n")
+    assert cgroup_cpu_limit(str(tmp_path / "missing"), str(tmp_path / "cpu")) == 4
+    _write(tmp_path / "cpu" / "cpu.cfs_quota_us", "-1\n")
+    assert cgroup_cpu_limit(str(tmp_path / "missing"), str(tmp_path / "cpu")) is None
+
+
+def test_no_cgroup_files_means_no_limit(tmp_path):
+    assert cgroup_cpu_limit(str(tmp_path / "a"), str(tmp_path / "b")) is None
+
+
+def test_available_cores_is_capped_by_the_quota(monkeypatch):
+    monkeypatch.setattr(local_engine, "cgroup_cpu_limit", lambda: 1)
+    assert available_cores() == 1
+    monkeypatch.setattr(local_engine, "cgroup_cpu_limit", lambda: None)
+    assert available_cores() >= 1
+
+
+def test_buckets_group_prompts_of_similar_length():
+    engine = LocalEngine(batch_size=2, num_threads=1)
+    assert engine._buckets([30, 5, 20, 6, 31]) == [[1, 3], [2, 0], [4]]
+
+
+class FakeORTModel:
+    exports = 0
+
+    @classmethod
+    def from_pretrained(cls, name, export=False, **kwargs):
+        if export:
+            cls.exports += 1
+        return cls()
+
+    def save_pretrained(self, path):
+        with open(os.path.join(path, "config.json"), "w") as f:
+            f.write("{}")
+
+
+def test_onnx_export_happens_once(tmp_path):
+    def engine():
+        return LocalEngine(model_name="google/flan-t5-small", num_threads=1, onnx_cache=str(tmp_path))
+
+    first = engine()._onnx_export(FakeORTModel)
+    second = engine()._onnx_export(FakeORTModel)
+    assert first == second == onnx_export_dir("google/flan-t5-small", str(tmp_path))
+    assert os.path.exists(os.path.join(first, "config.json"))
+    assert FakeORTModel.exports == 1
+    assert [p for p in os.listdir(tmp_path) if p.startswith(".export-")] == []
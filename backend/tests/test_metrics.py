@@ -0,0 +1,32 @@
+import pytest
+
+from src.metrics import Counter, Histogram, _Metric
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("dishtip_test", "test")
+
+
+def test_counter_and_histogram_render():
+    counter = Counter("dishtip_test_total", "Test counter", ["result"])
+    counter.inc(result="hit")
+    counter.inc(2, result="miss")
+    assert counter.render().splitlines() == [
+        "# HELP dishtip_test_total Test counter",
+        "# TYPE dishtip_test_total counter",
+        'dishtip_test_total{result="hit"} 1',
+        'dishtip_test_total{result="miss"} 2',
+    ]
+
+    histogram = Histogram("dishtip_test_seconds", "Test histogram", buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(5.0)
+    assert histogram.count() == 2
+    assert histogram.samples() == [
+        'dishtip_test_seconds_bucket{le="0.1"} 1',
+        'dishtip_test_seconds_bucket{le="1"} 1',
+        'dishtip_test_seconds_bucket{le="+Inf"} 2',
+        "dishtip_test_seconds_sum 5.05",
+        "dishtip_test_seconds_count 2",
+    ]
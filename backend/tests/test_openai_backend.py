@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from src.nlp import openai_backend
+from src.nlp.openai_backend import OpenAIBackend
+
+
+def _status_error(cls, status):
+    response = httpx.Response(status, request=httpx.Request("POST", "https://api.openai.com/v1/responses"))
+    return cls("upstream said no", response=response, body=None)
+
+
+class FakeResponses:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SimpleNamespace(output_text=f" {outcome} ")
+
+
+def _backend(outcomes, max_retries=2):
+    backend = OpenAIBackend("gpt-test", api_key="test", max_retries=max_retries)
+    responses = FakeResponses(outcomes)
+    backend._client = SimpleNamespace(responses=responses)
+    return backend, responses
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(openai_backend, "backoff_delay", lambda attempt: 0.0)
+
+
+def test_transient_errors_are_retried():
+    backend, responses = _backend([
+        _status_error(openai.RateLimitError, 429),
+        _status_error(openai.InternalServerError, 503),
+        "schnitzel",
+    ])
+    assert asyncio.run(backend.complete("prompt")) == "schnitzel"
+    assert len(responses.calls) == 3
+
+
+def test_client_errors_are_not_retried():
+    backend, responses = _backend([_status_error(openai.BadRequestError, 400), "unused"])
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(backend.complete("prompt"))
+    assert len(responses.calls) == 1
+
+
+def test_retries_are_bounded():
+    backend, responses = _backend([_status_error(openai.RateLimitError, 429)] * 3, max_retries=2)
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(backend.complete("prompt"))
+    assert len(responses.calls) == 3
+
+
+def test_text_format_is_passed_as_output_format():
+    backend, responses = _backend(["{}"])
+    schema = {"type": "json_schema", "name": "dishes"}
+    asyncio.run(backend.complete("prompt", text_format=schema))
+    assert responses.calls[0]["text"] == {"format": schema}
+    assert responses.calls[0]["model"] == "gpt-test"
@@ -0,0 +1,67 @@
+import asyncio
+
+from src.fetch.place_cache import PlaceCache
+from src.fetch.places_client import fetch_place_data
+from src.normalisation.schemas import DishRecord
+
+
+def test_concurrent_misses_share_one_upstream_call(places_stub):
+    places_stub.state.latency = 0.05
+    cache = PlaceCache(loader=fetch_place_data)
+
+    async def run():
+        return await asyncio.gather(*(cache.get("bench_small") for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert places_stub.state.requests == 1
+    assert cache.misses == 1 and cache.coalesced == 4
+    assert all(restaurant["name"] == results[0][0]["name"] for restaurant, _ in results)
+
+
+def test_hits_are_independent_copies(places_stub):
+    cache = PlaceCache(loader=fetch_place_data)
+
+    async def run():
+        first = await cache.get("bench_small")
+        first[0]["name"] = "changed"
+        first[1][0]["dishes"].append(DishRecord("leaked"))
+        return await cache.get("bench_small")
+
+    restaurant, reviews = asyncio.run(run())
+    assert places_stub.state.requests == 1
+    assert restaurant["name"] != "changed"
+    assert DishRecord("leaked") not in reviews[0]["dishes"]
+
+
+def test_failed_fetch_is_not_cached(places_stub):
+    places_stub.state.failure_rate = 1.0
+    cache = PlaceCache(loader=fetch_place_data)
+
+    async def run():
+        assert await cache.get("bench_small") == ({}, [])
+        places_stub.state.failure_rate = 0.0
+        return await cache.get("bench_small")
+
+    restaurant, reviews = asyncio.run(run())
+    assert restaurant and reviews
+    assert places_stub.state.requests == 2
+
+
+def test_cancelled_leader_does_not_cancel_followers(places_stub):
+    places_stub.state.latency = 0.05
+    cache = PlaceCache(loader=fetch_place_data)
+
+    async def run():
+        leader = asyncio.create_task(cache.get("bench_small"))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(cache.get("bench_small")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        return leader.cancelled(), results
+
+    leader_cancelled, results = asyncio.run(run())
+    assert leader_cancelled
+    assert all(restaurant["name"] for restaurant, _ in results)
+    assert places_stub.state.requests == 1 and cache.coalesced == 3
+    assert cache.stats()["size"] == 1
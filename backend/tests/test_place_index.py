@@ -0,0 +1,80 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from src.fetch import place_index
+from src.fetch.place_index import PlaceIndex, autocomplete, get_place_index
+
+
+def test_resolve_needs_an_exact_name():
+    index = PlaceIndex()
+    index.add("p1", "Luigi's Pizza")
+    index.add("p2", "Café Zur Rose", "Hauptstr. 1")
+    assert index.resolve("cafe zur rose!") == "p2"
+    assert index.resolve("Luigi") is None
+
+    index.add("p3", "Cafe zur Rose", "Bahnhofstr. 2")
+    assert index.resolve("Café Zur Rose") is None  # two places share the name
+
+
+def test_sqlite_index_persists_batched_writes(tmp_path):
+    path = str(tmp_path / "places.sqlite3")
+    index = PlaceIndex(path)
+    index.add_candidates([
+        {"place_id": "p1", "name": "Brasserie Torbar", "formatted_address": "Torweg 3"},
+        {"place_id": "p2", "name": "Osteria Nonna"},
+        {"place_id": None, "name": "no id"},
+    ])
+    reloaded = PlaceIndex(path)
+    assert len(reloaded) == 2
+    assert reloaded.search("torb")[0]["place_id"] == "p1"
+
+
+def test_autocomplete_prefix_match_stays_local():
+    get_place_index().add("p1", "Brasserie Torbar")
+    result = asyncio.run(autocomplete("torb"))
+    assert result["source"] == "local"
+    assert [r["place_id"] for r in result["results"]] == ["p1"]
+
+
+def test_autocomplete_merges_fuzzy_hits_with_google(monkeypatch):
+    get_place_index().add("p1", "Brasserie Torbar")
+    calls = []
+
+    async def find_remote(query):
+        calls.append(query)
+        return [{"place_id": "g1", "name": "Torbaar Grill", "formatted_address": "Somewhere 1"}]
+
+    monkeypatch.setattr(place_index, "_find_remote", find_remote)
+    result = asyncio.run(autocomplete("Torbaar"))
+    assert calls == ["Torbaar"]
+    assert result["source"] == "google"
+    assert [r["place_id"] for r in result["results"]] == ["g1", "p1"]
+
+
+def test_remote_misses_are_bounded_and_expire(monkeypatch):
+    calls = []
+
+    class NoCandidates:
+        async def find_places(self, query):
+            calls.append(query)
+            return []
+
+    monkeypatch.setattr(place_index, "get_places_client", NoCandidates)
+    monkeypatch.setattr(place_index, "_remote_misses", OrderedDict())
+    monkeypatch.setattr(place_index, "PLACE_INDEX_MISS_MAX", 2)
+
+    async def run(*queries):
+        for query in queries:
+            await place_index._find_remote(query)
+
+    asyncio.run(run("Nowhere A", "Nowhere A", "Nowhere B"))
+    assert calls == ["Nowhere A", "Nowhere B"]  # the repeated miss is remembered
+
+    asyncio.run(run("Nowhere C"))
+    assert list(place_index._remote_misses) == ["nowhere b", "nowhere c"]  # oldest dropped
+
+    place_index._remote_misses["nowhere b"] = time.monotonic() - place_index.PLACE_INDEX_MISS_TTL
+    asyncio.run(run("Nowhere C"))
+    assert list(place_index._remote_misses) == ["nowhere c"]  # expired miss evicted on lookup
+    assert calls == ["Nowhere A", "Nowhere B", "Nowhere C"]
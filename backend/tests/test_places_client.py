@@ -0,0 +1,94 @@
+import asyncio
+
+from src.fetch.places_client import CircuitBreaker
+from src.fetch.places_stub import stub_client
+from tests.conftest import FIXTURES_DIR
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_client(app, clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=30, clock=clock)
+    return stub_client(FIXTURES_DIR, app=app, client_options={"max_retries": 0, "breaker": breaker})
+
+
+def test_breaker_opens_half_opens_and_closes(places_stub):
+    clock = FakeClock()
+    client = make_client(places_stub, clock)
+
+    async def run():
+        places_stub.state.failure_rate = 1.0
+        assert await client.get_place_payload("bench_small") is None
+        assert client.breaker.state == "closed"
+        assert await client.get_place_payload("bench_small") is None
+        assert client.breaker.state == "open"
+
+        # open: fails fast without reaching upstream
+        served = places_stub.state.requests
+        assert await client.get_place_payload("bench_small") is None
+        assert places_stub.state.requests == served
+        assert client.breaker.rejected == 1
+
+        # half-open: a failed trial reopens the breaker
+        clock.now += 30
+        assert client.breaker.state == "half_open"
+        assert await client.get_place_payload("bench_small") is None
+        assert client.breaker.state == "open"
+
+        # half-open: a successful trial closes it
+        clock.now += 30
+        places_stub.state.failure_rate = 0.0
+        payload = await client.get_place_payload("bench_small")
+        assert payload["id"] == "bench_small"
+        assert client.breaker.state == "closed"
+        assert client.breaker.failures == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_trial_does_not_wedge_the_breaker(places_stub):
+    clock = FakeClock()
+    client = make_client(places_stub, clock)
+
+    async def run():
+        places_stub.state.failure_rate = 1.0
+        for _ in range(2):
+            await client.get_place_payload("bench_small")
+        assert client.breaker.state == "open"
+
+        clock.now += 30
+        places_stub.state.failure_rate = 0.0
+        places_stub.state.latency = 10
+        served = places_stub.state.requests
+        trial = asyncio.create_task(client.get_place_payload("bench_small"))
+        while places_stub.state.requests == served:
+            await asyncio.sleep(0.01)
+        trial.cancel()
+        try:
+            await trial
+        except asyncio.CancelledError:
+            pass
+
+        # the cancelled trial handed its slot back: the next call is the new trial
+        assert client.breaker.state == "half_open"
+        places_stub.state.latency = 0
+        payload = await client.get_place_payload("bench_small")
+        assert payload["id"] == "bench_small"
+        assert client.breaker.state == "closed"
+
+    asyncio.run(run())
+
+
+def test_unknown_place_returns_none(places_stub):
+    async def run():
+        client = stub_client(FIXTURES_DIR, app=places_stub)
+        assert await client.get_place_payload("no_such_place") is None
+        assert client.breaker.state == "closed"
+
+    asyncio.run(run())
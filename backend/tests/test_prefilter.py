@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from src.nlp import prefilter
+from src.nlp.extractor_openai import extract_dishes_openai
+from src.nlp.prefilter import AhoCorasick, DishPrefilter, learn_dishes, load_bundled_lexicon, set_prefilter
+
+
+@pytest.fixture(scope="module")
+def lexicon():
+    return DishPrefilter(load_bundled_lexicon(), learning=False)
+
+
+@pytest.mark.parametrize("text", [
+    "Great service!",
+    "Friendly staff, fair prices and a lovely terrace.",
+    "Would come back anytime.",
+    "Tolles Ambiente, netter Service.",
+    "Sehr freundliches Personal, gerne wieder!",
+])
+def test_short_texts_without_food_talk_are_skipped(lexicon, text):
+    decision = lexicon.classify(text)
+    assert decision.action == "skip_none" and decision.dishes == []
+
+
+@pytest.mark.parametrize("text", [
+    "The schnitzel was great",              # dish hit, but not only dishes
+    "The food was amazing!",                # food cue
+    "We ordered the house special.",        # unknown dish behind a cue
+    "Das Essen war super.",                 # German cue
+    "Der Schweinebraten war super",         # unknown compound dish ("...braten")
+    "Die Tagessuppe war lecker.",           # compound dish + cue
+    "Great service, friendly staff, fair prices, lovely terrace and a view over the whole old town",
+])
+def test_food_talk_and_long_texts_go_to_the_model(lexicon, text):
+    assert lexicon.classify(text).action == "llm"
+
+
+@pytest.mark.parametrize("text, dishes", [
+    ("Schnitzel und Käsespätzle", ["schnitzel", "käsespätzle"]),
+    ("Pizza Margherita with tiramisu", ["pizza margherita", "tiramisu"]),
+])
+def test_texts_made_only_of_dishes_are_accepted(lexicon, text, dishes):
+    decision = lexicon.classify(text)
+    assert decision.action == "accept" and sorted(decision.dishes) == sorted(dishes)
+
+
+def test_matching_ignores_case_and_diacritics(lexicon):
+    assert lexicon.match("KASESPATZLE and more") == ["käsespätzle"]
+
+
+def test_aho_corasick_prefers_longest_whole_word_matches():
+    automaton = AhoCorasick(["pizza", "pizza margherita", "tea"])
+    assert [m[2] for m in automaton.find("pizza margherita and pizzas, no steak")] == ["pizza margherita", "pizza"]
+
+
+def test_only_verbatim_model_dishes_are_learned(monkeypatch):
+    monkeypatch.setattr(prefilter, "REBUILD_INTERVAL", 0.0)
+    set_prefilter(DishPrefilter([]))
+    learn_dishes(["kumpir", "invented dish"], "Der Kumpir war riesig")
+    assert prefilter.get_prefilter().match("kumpir") == ["kumpir"]
+    assert prefilter.get_prefilter().match("invented dish") == []
+
+
+def test_prefilter_answers_skip_the_model_but_not_the_index(offline_app):
+    reviews = [{"id": "r1", "text": "Great service!"}, {"id": "r2", "text": "The schnitzel was great."}]
+    result = asyncio.run(extract_dishes_openai(reviews))
+    assert [[d.name for d in r["dishes"]] for r in result] == [[], ["schnitzel"]]
+    assert offline_app.calls == 1
+    assert prefilter.get_prefilter().decisions["skip_none"] == 1
@@ -0,0 +1,69 @@
+import asyncio
+import sys
+import types
+
+import pytest
+
+from src.nlp import extractor_openai, registry
+
+
+@pytest.fixture
+def fake_extractor(monkeypatch):
+    """A registered streaming-less extractor, selected as the configured one."""
+    module = types.ModuleType("fake_extractor")
+    module.MODEL_NAME = "fake-model"
+    module.PROMPT_VERSION = "p1"
+    module.warmed = False
+
+    async def extract(reviews, verbose=False, strict=False):
+        for review in reviews:
+            review["dishes"] = ["strict"] if strict else ["pizza"]
+        return reviews
+
+    async def warm_up():
+        module.warmed = True
+
+    module.extract = extract
+    module.warm_up = warm_up
+    monkeypatch.setitem(sys.modules, "fake_extractor", module)
+    monkeypatch.setattr(registry, "EXTRACTORS", dict(registry.EXTRACTORS))
+    monkeypatch.setattr(registry, "_modules", {})
+    monkeypatch.setattr(registry, "_report", {**registry._report, "extractor": "fake"})
+    monkeypatch.setattr(registry, "EXTRACTOR", "fake")
+    registry.register_extractor("fake", "fake_extractor", "extract")
+    return module
+
+
+def test_extractor_is_imported_on_first_use_only(fake_extractor):
+    assert not registry.startup_report()["loaded"]
+    assert registry.get_extractor() is fake_extractor
+    assert registry.get_extractor("fake") is fake_extractor
+    report = registry.startup_report()
+    assert report["loaded"] and report["import_seconds"] is not None
+
+
+def test_unknown_extractor_raises():
+    with pytest.raises(ValueError, match="Unknown extractor"):
+        registry.get_extractor("nope")
+
+
+def test_extractor_version_prefers_answers_version(fake_extractor):
+    assert registry.extractor_version() == "fake-model:p1"
+    assert registry.extractor_version("openai") == f"{extractor_openai.MODEL_NAME}:{extractor_openai.ANSWERS_VERSION}"
+
+
+def test_extract_and_non_streaming_iteration(fake_extractor):
+    async def run():
+        extracted = await registry.extract_dishes([{"text": "a"}], strict=True)
+        streamed = [item async for item in registry.iter_extract_dishes([{"text": "a"}, {"text": "b"}])]
+        return extracted, streamed
+
+    extracted, streamed = asyncio.run(run())
+    assert extracted[0]["dishes"] == ["strict"]
+    assert [(i, review["dishes"]) for i, review in streamed] == [(0, ["pizza"]), (1, ["pizza"])]
+
+
+def test_warm_up_runs_the_extractor_warm_up(fake_extractor):
+    asyncio.run(registry.warm_up())
+    assert fake_extractor.warmed
+    assert registry.startup_report()["warmup_seconds"] is not None
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from conftest import FIXTURES_DIR
+from src import pipeline
+from src.fetch.fixtures import PlaceFixtures
+from src.recs.result_store import MemoryResultStore, ResultStore, SQLiteResultStore, get_result_store, review_fingerprint
+
+RECS = [{"dish_name": "schnitzel", "ranking": 10}]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryResultStore(ttl=60)
+    return SQLiteResultStore(str(tmp_path / "results.sqlite3"), ttl=60)
+
+
+def test_put_get_and_touch(store):
+    assert store.get("p1") is None
+    store.put("p1", "fp", {"name": "Old name"}, RECS)
+    entry = store.get("p1")
+    assert entry["fingerprint"] == "fp" and entry["recommendations"] == RECS
+    assert not store.is_stale(entry)
+
+    entry["computed_at"] -= 120
+    assert store.is_stale(entry)
+
+    store.touch("p1", {"name": "New name"})
+    touched = store.get("p1")
+    assert touched["restaurant_info"] == {"name": "New name"}
+    assert touched["recommendations"] == RECS
+    assert touched["computed_at"] >= entry["computed_at"] + 120
+
+    store.touch("missing", {"name": "x"})
+    assert store.get("missing") is None
+    assert store.stats()["hits"] == 2 and store.stats()["misses"] == 2
+
+
+def test_fingerprint_ignores_order_and_uses_salt():
+    reviews = [{"author": "a", "text": "Great pizza"}, {"author": "b", "text": "Nice pasta"}]
+    assert review_fingerprint(reviews, "m:v1") == review_fingerprint(reviews[::-1], "m:v1")
+    assert review_fingerprint(reviews, "m:v1") != review_fingerprint(reviews, "m:v2")
+
+
+def test_unchanged_refresh_skips_extraction_and_keeps_restaurant_info_fresh(offline_app):
+    load = PlaceFixtures(FIXTURES_DIR).load
+    rating = {"value": 4.1}
+
+    async def fetch(place_id):
+        restaurant, reviews = await load(place_id)
+        return {**restaurant, "rating": rating["value"]}, reviews
+
+    first = asyncio.run(pipeline.refresh_recommendations("bench_small", fetch))
+    calls = offline_app.calls
+    assert first["recommendations"] and calls
+
+    rating["value"] = 4.6
+    second = asyncio.run(pipeline.refresh_recommendations("bench_small", fetch))
+    assert offline_app.calls == calls
+    assert second["restaurant_info"]["rating"] == 4.6
+    assert second["recommendations"] == first["recommendations"]
+    assert get_result_store().get("bench_small")["restaurant_info"]["rating"] == 4.6
+
+
+def test_stale_entry_is_served_while_refreshing(monkeypatch):
+    async def run():
+        stored = await pipeline.get_stored_recommendations("bench_small")
+        store = get_result_store()
+        monkeypatch.setattr(store, "ttl", 0)
+        served = await pipeline.get_stored_recommendations("bench_small")
+        assert served["recommendations"] == stored["recommendations"]
+        assert "bench_small" in pipeline._refreshing
+        await pipeline._refreshing["bench_small"]
+        return store.get("bench_small")
+
+    entry = asyncio.run(run())
+    assert entry is not None and not pipeline._refreshing
+
+
+def test_result_store_is_abstract():
+    with pytest.raises(TypeError):
+        ResultStore()
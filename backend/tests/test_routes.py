@@ -0,0 +1,102 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from src.fetch.place_cache import place_cache
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_cursor_pages_cover_the_full_list(client):
+    full = client.get("/recommendations/bench_large").json()["recommendations"]
+    assert len(full) > 3
+
+    names, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/recommendations/bench_large", params=params).json()
+        names.extend(rec["dish_name"] for rec in page["recommendations"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert names == [rec["dish_name"] for rec in full]
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get("/recommendations/bench_small", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_batch_isolates_failing_places(client, monkeypatch):
+    loader = place_cache._loader
+
+    async def flaky_loader(place_id):
+        if place_id == "bench_large":
+            raise RuntimeError("upstream exploded")
+        return await loader(place_id)
+
+    monkeypatch.setattr(place_cache, "_loader", flaky_loader)
+    response = client.post(
+        "/recommendations/batch",
+        json={"place_ids": ["bench_small", "no_such_place", "bench_large"], "limit": 5},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    statuses = {r["place_id"]: r["status"] for r in body["results"]}
+    assert statuses == {"bench_small": "ok", "no_such_place": "not_found", "bench_large": "error"}
+    assert body["ok"] == 1 and body["failed"] == 2
+
+    ok = body["results"][0]
+    assert ok["restaurant_info"]["name"] and 0 < len(ok["recommendations"]) <= 5
+
+
+def test_failed_requests_are_timed_with_their_status(client):
+    from src import metrics
+
+    before = metrics.REQUEST_SECONDS.count(route="get_recommendations", status="400")
+    client.get("/recommendations/bench_small", params={"cursor": "not-a-cursor"})
+    assert metrics.REQUEST_SECONDS.count(route="get_recommendations", status="400") == before + 1
+
+
+def test_background_refresh_runs_outside_the_request_trace():
+    import asyncio
+
+    from src import metrics, pipeline
+
+    async def spans_of_refresh(background):
+        with metrics.trace() as spans:
+            await pipeline._start_refresh("bench_small", background=background)
+        return len(spans)
+
+    assert asyncio.run(spans_of_refresh(background=False)) > 0
+    assert asyncio.run(spans_of_refresh(background=True)) == 0
+
+
+def test_stream_emits_restaurant_first_and_full_list_last(client):
+    import json
+
+    response = client.get("/recommendations/bench_small/stream")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["event"] == "restaurant_info" and events[0]["restaurant_info"]["name"]
+    assert events[-1]["event"] == "recommendations"
+    assert {e["event"] for e in events[1:-1]} <= {"dishes"}
+
+    streamed = {r["dish_name"] for e in events[1:-1] for r in e["recommendations"]}
+    assert streamed == {r["dish_name"] for r in events[-1]["recommendations"]}
+
+
+def test_stream_speaks_sse(client):
+    response = client.get("/recommendations/bench_small/stream", params={"format": "sse"})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    messages = [m for m in response.text.split("\n\n") if m]
+    assert messages[0].startswith("event: restaurant_info\ndata: {")
+    assert messages[-1].startswith("event: recommendations\n")
+
+
+def test_stream_rejects_unknown_format(client):
+    assert client.get("/recommendations/bench_small/stream", params={"format": "xml"}).status_code == 400
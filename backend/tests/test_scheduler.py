@@ -0,0 +1,91 @@
+import asyncio
+
+from src.nlp.scheduler import ExtractionScheduler, RateLimiter, SQLiteTokenBucket, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_at_its_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=20, clock=clock)
+    assert bucket.try_take(20) == 0
+    assert bucket.try_take(5) == 0.5
+
+    clock.now = 0.5
+    assert bucket.try_take(5) == 0
+    clock.now = 100
+    assert bucket.try_take(20) == 0  # refill is capped at capacity
+    assert bucket.try_take(1) > 0
+
+
+def test_oversized_requests_wait_for_a_full_bucket():
+    bucket = TokenBucket(rate=10, capacity=20, clock=FakeClock())
+    assert bucket.try_take(500) == 0
+
+
+def test_refused_tokens_do_not_burn_request_budget():
+    limiter = RateLimiter(requests_per_second=1, tokens_per_minute=60, shared_path=None)
+    assert limiter.try_acquire(60) == 0
+    assert limiter.try_acquire(60) > 0  # tokens exhausted, request bucket untouched
+    limiter.release(60)
+    assert limiter.try_acquire(60) == 0
+
+
+def test_sqlite_buckets_share_one_budget(tmp_path):
+    path = str(tmp_path / "rate.sqlite3")
+    first = SQLiteTokenBucket(path, "requests", rate=0.001, capacity=2)
+    second = SQLiteTokenBucket(path, "requests", rate=0.001, capacity=2)
+    assert first.try_take(1) == 0
+    assert second.try_take(1) == 0
+    assert first.try_take(1) > 0 and second.try_take(1) > 0
+
+
+def test_groups_are_served_round_robin():
+    scheduler = ExtractionScheduler(max_concurrency=1, limiter=RateLimiter(1e6, 1e9, shared_path=None))
+    order = []
+
+    async def call(group, n, hold=None):
+        async with scheduler.slot(group):
+            order.append((group, n))
+            if hold is not None:
+                await hold.wait()
+
+    async def run():
+        hold = asyncio.Event()
+        first = asyncio.create_task(call("big", 0, hold))
+        await asyncio.sleep(0.01)  # "big" holds the only slot
+        rest = [asyncio.create_task(call("big", n)) for n in range(1, 4)]
+        rest += [asyncio.create_task(call("small", n)) for n in range(2)]
+        await asyncio.sleep(0.01)
+        hold.set()
+        await asyncio.gather(first, *rest)
+
+    asyncio.run(run())
+    # after the held grant, the groups alternate instead of "big" draining first
+    assert order == [("big", 0), ("big", 1), ("small", 0), ("big", 2), ("small", 1), ("big", 3)]
+    assert scheduler.granted == 6 and scheduler.active == 0
+
+
+def test_concurrency_cap_is_respected():
+    scheduler = ExtractionScheduler(max_concurrency=2, limiter=RateLimiter(1e6, 1e9, shared_path=None))
+    running = peak = 0
+
+    async def call(n):
+        nonlocal running, peak
+        async with scheduler.slot(n % 3):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+
+    async def run():
+        await asyncio.gather(*(call(n) for n in range(10)))
+
+    asyncio.run(run())
+    assert peak == 2
@@ -0,0 +1,66 @@
+import json
+
+import orjson
+import pytest
+from pydantic import HttpUrl
+
+from src.normalisation.schemas import DishRecord, Recommendation, ReviewRecord, json_default, make_review_id
+
+
+def test_records_behave_like_dicts():
+    review = ReviewRecord(id="r1", text="Great pizza", dishes=[DishRecord("pizza")])
+    assert review["text"] == "Great pizza" and review.get("rating") is None
+    assert review.get("missing", "default") == "default"
+    assert review.get("to_dict") is None  # methods are not keys
+    assert "text" in review and "to_dict" not in review
+    assert list(review.keys()) == list(review.to_dict())
+
+    review["rating"] = 5.0
+    assert review.rating == 5.0
+    with pytest.raises(KeyError):
+        review["missing"]
+    with pytest.raises(KeyError):
+        review["missing"] = 1
+    with pytest.raises(AttributeError):
+        review.missing = 1  # slotted
+
+
+def test_copy_is_shallow():
+    review = ReviewRecord(text="Great pizza", dishes=[DishRecord("pizza")])
+    clone = review.copy()
+    clone["text"] = "changed"
+    assert review.text == "Great pizza"
+    assert clone.dishes is review.dishes
+
+
+def test_recommendation_dict_hides_aggregate_fields_of_single_mentions():
+    single = Recommendation(dish_name="pizza", ranking=3)
+    assert "mention_count" not in single.to_dict() and "reviews" not in single.to_dict()
+    merged = Recommendation(dish_name="pizza", ranking=6, mention_count=2, reviews=[single, single])
+    assert merged.to_dict()["mention_count"] == 2
+
+
+def test_json_default_serialises_records_and_urls():
+    rec = Recommendation(
+        dish_name="pizza", ranking=3, review_link=HttpUrl("https://example.com/r/1"),
+        mention_count=1, reviews=[Recommendation(dish_name="pizza", ranking=3)],
+    )
+    expected = {
+        "dish_name": "pizza", "ranking": 3, "author": None, "source": None, "timestamp": None,
+        "review_link": "https://example.com/r/1", "mention_count": 1,
+        "reviews": [{"dish_name": "pizza", "ranking": 3, "author": None, "source": None,
+                     "timestamp": None, "review_link": None}],
+    }
+    assert json.loads(json.dumps(rec, default=json_default)) == expected
+    dumped = orjson.dumps([rec], default=json_default, option=orjson.OPT_PASSTHROUGH_DATACLASS)
+    assert orjson.loads(dumped) == [expected]
+
+
+def test_json_default_rejects_unknown_objects():
+    with pytest.raises(TypeError):
+        json.dumps({"x": object()}, default=json_default)
+
+
+def test_review_id_ignores_whitespace_but_not_source():
+    assert make_review_id("Great  pizza\n", "google") == make_review_id("Great pizza", "google")
+    assert make_review_id("Great pizza", "google") != make_review_id("Great pizza", "blog")
@@ -0,0 +1,70 @@
+import pytest
+
+from src.normalisation.schemas import DishRecord
+from src.ranking import scoring
+from src.ranking.scoring import DishColumns, assign_dish_scores, register_feature
+
+NOW = 1_700_000_000.0
+
+
+def review(source_type="google", author="Anna Berg", dishes=("Pizza",), **extra):
+    return {"source_type": source_type, "author": author, "dishes": [DishRecord(d) for d in dishes], **extra}
+
+
+def rankings(reviews):
+    return [[dish["ranking"] for dish in r["dishes"]] for r in reviews]
+
+
+def test_default_weights_score_source_author_and_name_length():
+    reviews = [
+        review("google", "Anna Berg", ["Pizza", "Pizza Margherita"]),
+        review("google", "Ben", ["Spaghetti Aglio e Olio"]),  # one-word author: no bonus
+        review("blog", "Food Blog", ["Tiramisu"]),
+        review("google", "Cleo Dunn", []),
+    ]
+    assign_dish_scores(reviews, now=NOW)
+    assert rankings(reviews) == [[10 + 1, 10 + 8], [0 + 50], [1000 + 1], []]
+
+
+def test_already_ranked_reviews_are_left_alone():
+    reviews = [review()]
+    reviews[0]["dishes"][0]["ranking"] = 7
+    assign_dish_scores(reviews, now=NOW)
+    assert rankings(reviews) == [[7]]
+
+
+def test_optional_features_use_their_weights():
+    reviews = [
+        review(author="Ben", dishes=["Pizza"], timestamp=NOW, rating=5),
+        review(author="Ben", dishes=["pizza"], timestamp=NOW - 365 * 86400, rating=None),
+    ]
+    weights = {"recency": 1.0, "rating": 1.0, "mention_frequency": 1.0}
+    assign_dish_scores(reviews, weights=weights, now=NOW)
+    assert rankings(reviews) == [[50 + 20 + 10], [25 + 0 + 10]]
+
+
+def test_zero_weights_give_zero_scores():
+    reviews = [review()]
+    assign_dish_scores(reviews, weights={"source": 0.0}, now=NOW)
+    assert rankings(reviews) == [[0]]
+
+
+def test_registered_feature_is_scored(monkeypatch):
+    monkeypatch.setattr(scoring, "FEATURES", dict(scoring.FEATURES))
+    register_feature("vegan", lambda cols, now: [5.0 if "vegan" in n.lower() else 0.0 for n in cols.names])
+    reviews = [review(author="Ben", dishes=["Vegan Burger", "Burger"])]
+    assign_dish_scores(reviews, weights={"vegan": 2.0}, now=NOW)
+    assert rankings(reviews) == [[10, 0]]
+
+
+def test_columns_store_review_attributes_once():
+    cols = DishColumns([review(dishes=["A", "B", "C"]), review(dishes=[]), review("blog", dishes=["D"])])
+    assert len(cols) == 4
+    assert cols.review_idx == [0, 0, 0, 1]
+    assert cols.source_types == ["google", "blog"]
+    assert cols.per_dish([1.0, 2.0]) == [1.0, 1.0, 1.0, 2.0]
+
+
+def test_unknown_weight_raises():
+    with pytest.raises(KeyError):
+        assign_dish_scores([review()], weights={"nope": 1.0}, now=NOW)
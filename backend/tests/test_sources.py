@@ -0,0 +1,33 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from src.fetch.sources import BlogSource, DumpSource, ReviewSource
+
+
+def write_dump(directory, name, reviews):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+        json.dump(reviews, f)
+
+
+def test_dump_source_reads_place_file(tmp_path):
+    write_dump(tmp_path / "dumps", "place_1.json", [{"author_name": "A", "text": "Great ramen", "time": 1}])
+    _, reviews = asyncio.run(DumpSource(str(tmp_path)).fetch("place_1"))
+    assert [r.text for r in reviews] == ["Great ramen"]
+
+
+@pytest.mark.parametrize("place_id", ["../secret", "..", "a/b", "/etc/passwd", "x\\..\\y", ""])
+def test_file_sources_reject_path_traversal(tmp_path, place_id):
+    # a readable file one level above the dumps directory
+    write_dump(tmp_path, "secret.json", [{"author_name": "A", "text": "leaked"}])
+    for source in (DumpSource(str(tmp_path)), BlogSource(str(tmp_path))):
+        with pytest.raises(ValueError):
+            asyncio.run(source.fetch(place_id))
+
+
+def test_review_source_is_abstract():
+    with pytest.raises(TypeError):
+        ReviewSource()